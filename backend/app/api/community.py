@@ -1,83 +1,196 @@
 # app/api/community.py
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
-from sqlalchemy.orm import Session
+import os
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import crud, schemas
-from app.database import get_db
-from app.core.storage import delete_post_images, upload_post_images
+from app import async_crud, schemas
+from app.database import get_async_db, get_read_db
+from app.core import auth, events, images
+from app.core.storage import upload_post_images
 
 router = APIRouter(prefix="/api/community", tags=["community"])
 
+COMMENTS_PAGE_SIZE = int(os.getenv("COMMUNITY_COMMENTS_PAGE_SIZE", "50"))
+COMMENTS_MAX_PAGE_SIZE = 200
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_RETRY_MS = 5000
+MODERATOR_IDS = {
+    int(value) for value in os.getenv("COMMUNITY_MODERATOR_IDS", "").split(",") if value.strip()
+}
+
 
 @router.get("/posts", response_model=list[schemas.CommunityPostOut])
-def get_posts(db: Session = Depends(get_db)):
-    return crud.list_posts(db)
+async def get_posts(db: AsyncSession = Depends(get_read_db)):
+    return await async_crud.list_posts(db)
+
+
+@router.get("/feed/hot", response_model=schemas.CommunityFeedPage)
+async def get_hot_feed(
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Recent posts ranked by engagement with time decay; pass ``next_cursor`` back as ``cursor``."""
+    try:
+        items, next_cursor = await async_crud.list_hot_posts(db, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return schemas.CommunityFeedPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/search", response_model=schemas.CommunitySearchPage)
+async def search(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Full-text search over post and comment content, best matches first."""
+    # min_length counts surrounding spaces; "  a " must not reach MATCH as "a"
+    query = q.strip()
+    if len(query) < 2:
+        raise HTTPException(status_code=400, detail="Search text must be at least 2 characters")
+    items, next_offset = await async_crud.search_posts(db, query, limit=limit, offset=offset)
+    return schemas.CommunitySearchPage(items=items, next_offset=next_offset)
+
+
+@router.get("/stream")
+async def stream(request: Request):
+    """
+    Server-sent events for new posts (``post_created``), comments
+    (``comment_created``) and reaction counts (``reactions_changed``).
+
+    When the client falls behind, the oldest events are dropped and a
+    ``dropped`` event reports how many were lost so it can re-fetch.
+    """
+    subscription = events.broker.subscribe()
+
+    async def event_source():
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            while not await request.is_disconnected():
+                batch = await subscription.next_batch(timeout=STREAM_KEEPALIVE_SECONDS)
+                if subscription.dropped:
+                    yield f"event: dropped\ndata: {subscription.dropped}\n\n"
+                    subscription.dropped = 0
+                if not batch:
+                    yield ": keep-alive\n\n"
+                    continue
+                for event in batch:
+                    yield event.to_sse()
+        finally:
+            events.broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/posts", response_model=schemas.CommunityPostOut, status_code=201)
 async def create_post(
+    background_tasks: BackgroundTasks,
     user_id: int = Form(...),
     content: str = Form(...),
     visibility: str = Form("public"),
     images: list[UploadFile] | None = File(default=None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    uploaded = await upload_post_images(images or [])
+    uploaded = await upload_post_images(
+        images or [],
+        find_existing=lambda hashes: async_crud.find_images_by_hash(db, hashes),
+    )
     payload = schemas.CommunityPostCreate(
         user_id=user_id,
         content=content,
         visibility=visibility,
         images=uploaded,
     )
-    return crud.create_post(db, payload)
+    post = await async_crud.create_post(db, payload)
+    if post.images:
+        background_tasks.add_task(images.process_post_images, post.post_id)
+    return post
 
 
 @router.delete("/posts/{post_id}", status_code=204)
-def delete_post(post_id: int, user_id: int, db: Session = Depends(get_db)):
-    stored_images = crud.list_post_images(db, post_id)
-    result = crud.delete_post(db, post_id, user_id)
+async def delete_post(post_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    result = await async_crud.delete_post(db, post_id, user_id)
     if result == "not_found":
         raise HTTPException(status_code=404, detail="Post not found")
     if result == "forbidden":
         raise HTTPException(status_code=403, detail="Not allowed to delete this post")
-    delete_post_images(image.storage_path for image in stored_images)
     return {}
 
 
 @router.get("/posts/{post_id}", response_model=schemas.CommunityPostOut)
-def get_post(post_id: int, db: Session = Depends(get_db)):
-    post = crud.get_post(db, post_id)
+async def get_post(post_id: int, db: AsyncSession = Depends(get_read_db)):
+    post = await async_crud.get_post(db, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     return post
 
 
 @router.get("/posts/{post_id}/comments", response_model=list[schemas.PostCommentOut])
-def get_comments(post_id: int, db: Session = Depends(get_db)):
-    return crud.list_comments(db, post_id)
+async def get_comments(
+    post_id: int,
+    response: Response,
+    limit: int = Query(default=COMMENTS_PAGE_SIZE, ge=1, le=COMMENTS_MAX_PAGE_SIZE),
+    after: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    One page of comments oldest-first (``COMMENTS_PAGE_SIZE`` by default).
+    Pass the ``X-Next-Cursor`` header as ``after`` for the next page; the
+    first page also carries the thread size in ``X-Total-Count``.
+    """
+    try:
+        comments, next_cursor = await async_crud.list_comments(db, post_id, limit=limit, after=after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if not after:
+        total = len(comments) if next_cursor is None else await async_crud.count_comments(db, post_id)
+        response.headers["X-Total-Count"] = str(total)
+    return comments
 
 
 @router.post("/posts/{post_id}/comments", response_model=schemas.PostCommentOut, status_code=201)
-def create_comment(
+async def create_comment(
     post_id: int,
     comment_in: schemas.PostCommentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     payload = comment_in.model_copy(update={"post_id": post_id})
-    return crud.add_comment(db, payload)
+    return await async_crud.add_comment(db, payload)
 
 
 @router.delete(
     "/posts/{post_id}/comments/{comment_id}",
     status_code=204,
 )
-def delete_comment(
+async def delete_comment(
     post_id: int,
     comment_id: int,
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    result = crud.delete_comment(db, post_id, comment_id, user_id)
+    result = await async_crud.delete_comment(db, post_id, comment_id, user_id)
     if result == "not_found":
         raise HTTPException(status_code=404, detail="Comment not found")
     if result == "forbidden":
@@ -85,25 +198,43 @@ def delete_comment(
     return {}
 
 
+@router.post("/moderation/bulk-delete", response_model=schemas.ModerationBulkDeleteOut)
+async def bulk_delete(
+    payload: schemas.ModerationBulkDelete,
+    identity: auth.Identity = Depends(auth.current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Delete many posts and comments at once, all or nothing.
+
+    Post ids take their comments, reactions and images with them; stored
+    image objects are removed later by the deletion worker.
+    """
+    if identity.user_id not in MODERATOR_IDS:
+        raise HTTPException(status_code=403, detail="Moderator access required")
+    deleted = await async_crud.bulk_delete(db, payload.post_ids, payload.comment_ids)
+    return schemas.ModerationBulkDeleteOut(deleted=deleted)
+
+
 @router.post("/posts/{post_id}/reactions", status_code=204)
-def create_reaction(
+async def create_reaction(
     post_id: int,
     reaction_in: schemas.PostReactionCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     payload = reaction_in.model_copy(update={"post_id": post_id})
-    crud.add_reaction(db, payload)
+    await async_crud.add_reaction(db, payload)
     return {}
 
 
 @router.get("/posts/{post_id}/reactions", response_model=list[schemas.ReactionSummary])
-def get_reactions(post_id: int, db: Session = Depends(get_db)):
-    return crud.reaction_summary(db, post_id)
+async def get_reactions(post_id: int, db: AsyncSession = Depends(get_read_db)):
+    return await async_crud.reaction_summary(db, post_id)
 
 
 @router.delete("/posts/{post_id}/reactions", status_code=204)
-def delete_reaction(post_id: int, user_id: int, db: Session = Depends(get_db)):
-    crud.remove_reaction(db, post_id, user_id)
+async def delete_reaction(post_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    await async_crud.remove_reaction(db, post_id, user_id)
     return {}
 
 
@@ -111,5 +242,5 @@ def delete_reaction(post_id: int, user_id: int, db: Session = Depends(get_db)):
     "/posts/{post_id}/reactions/by-user/{user_id}",
     response_model=schemas.PostReactionOut | None,
 )
-def get_reaction_for_user(post_id: int, user_id: int, db: Session = Depends(get_db)):
-    return crud.get_reaction_for_user(db, post_id, user_id)
+async def get_reaction_for_user(post_id: int, user_id: int, db: AsyncSession = Depends(get_read_db)):
+    return await async_crud.get_reaction_for_user(db, post_id, user_id)
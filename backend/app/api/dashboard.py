@@ -1,17 +1,54 @@
 # app/api/dashboard.py
 
 from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 from datetime import date, timedelta
 
 from app import database, schemas
+from app.core import statements
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
+_TODAY = statements.define(
+    "dashboard.today",
+    """
+    SELECT steps, calories_burned, sleep_hours
+    FROM HealthLogs
+    WHERE user_id = :user_id AND date = :today
+    ORDER BY created_at DESC
+    LIMIT 1
+    """,
+)
+_WEEKLY_STEPS = statements.define(
+    "dashboard.weekly_steps",
+    """
+    SELECT date, steps
+    FROM HealthLogs
+    WHERE user_id = :user_id
+      AND date BETWEEN :start_date AND :end_date
+    """,
+)
+_LATEST_GOAL = statements.define(
+    "dashboard.latest_goal",
+    """
+    SELECT metric, target_value, description, start_date, end_date, recurrence
+    FROM Goals
+    WHERE user_id = :user_id
+    ORDER BY
+      COALESCE(end_date, start_date, CURRENT_DATE) DESC,
+      goal_id DESC
+    LIMIT 1
+    """,
+)
+
 
 @router.get("/{user_id}", response_model=schemas.DashboardSummary)
-def get_dashboard_summary(user_id: int, db: Session = Depends(database.get_db)):
+async def get_dashboard_summary(user_id: int, db: AsyncSession = Depends(database.get_read_db)):
+    return await db.run_sync(_dashboard_summary, user_id)
+
+
+def _dashboard_summary(db: Session, user_id: int) -> schemas.DashboardSummary:
     """
     Returns:
       - steps_today
@@ -25,18 +62,7 @@ def get_dashboard_summary(user_id: int, db: Session = Depends(database.get_db)):
     start_date = today - timedelta(days=6)
 
     # 1) Today's health summary
-    today_row = db.execute(
-        text(
-            """
-            SELECT steps, calories_burned, sleep_hours
-            FROM HealthLogs
-            WHERE user_id = :user_id AND date = :today
-            ORDER BY created_at DESC
-            LIMIT 1
-            """
-        ),
-        {"user_id": user_id, "today": today},
-    ).mappings().first()
+    today_row = db.execute(_TODAY, {"user_id": user_id, "today": today}).mappings().first()
 
     steps_today = int(today_row["steps"] or 0) if today_row else 0
     calories_today = (
@@ -52,15 +78,7 @@ def get_dashboard_summary(user_id: int, db: Session = Depends(database.get_db)):
 
     # 2) Weekly steps
     weekly_rows = db.execute(
-        text(
-            """
-            SELECT date, steps
-            FROM HealthLogs
-            WHERE user_id = :user_id
-              AND date BETWEEN :start_date AND :end_date
-            """
-        ),
-        {"user_id": user_id, "start_date": start_date, "end_date": today},
+        _WEEKLY_STEPS, {"user_id": user_id, "start_date": start_date, "end_date": today}
     ).mappings().all()
 
     steps_by_date = {row["date"]: int(row["steps"] or 0) for row in weekly_rows}
@@ -70,20 +88,7 @@ def get_dashboard_summary(user_id: int, db: Session = Depends(database.get_db)):
     ]
 
     # 3) Latest goal description
-    goal_row = db.execute(
-        text(
-            """
-            SELECT metric, target_value, description, start_date, end_date, recurrence
-            FROM Goals
-            WHERE user_id = :user_id
-            ORDER BY
-              COALESCE(end_date, start_date, CURRENT_DATE) DESC,
-              goal_id DESC
-            LIMIT 1
-            """
-        ),
-        {"user_id": user_id},
-    ).mappings().first()
+    goal_row = db.execute(_LATEST_GOAL, {"user_id": user_id}).mappings().first()
 
     latest_goal_description = None
     if goal_row:
@@ -1,72 +1,189 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from app.database import get_db
+from app.database import SessionLocal, get_async_db, get_read_db
 from app import schemas
+from app.core import follow_graph, statements, suggestions, user_directory
+from app.core.pagination import decode_cursor, encode_cursor
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 router = APIRouter(prefix="/api/followers", tags=["followers"])
 
+_PROFILE_CARDS = statements.define(
+    "followers.profile_cards",
+    """
+    SELECT u.user_id, u.username, u.email,
+           p.age, p.gender, p.height_cm, p.weight_kg, p.bio, p.timezone
+    FROM Users u
+    JOIN Profiles p ON u.user_id = p.user_id
+    WHERE u.user_id IN :ids
+    """,
+    expanding=["ids"],
+)
+_EXISTING_EDGES = statements.define(
+    "followers.existing_edges",
+    """
+    SELECT follower_user_id FROM Followers
+    WHERE user_id = :user_id AND follower_user_id IN :targets
+    """,
+    expanding=["targets"],
+)
+# run with executemany: PyMySQL/aiomysql rewrite it into one multi-row INSERT
+_INSERT_EDGES = statements.define(
+    "followers.insert_edges",
+    """
+    INSERT IGNORE INTO Followers (user_id, follower_user_id, since)
+    VALUES (:user_id, :follower_user_id, :since)
+    """,
+)
+_EDGES_SINCE = statements.define(
+    "followers.edges_since",
+    """
+    SELECT follower_user_id FROM Followers
+    WHERE user_id = :user_id AND follower_user_id IN :targets AND since = :since
+    """,
+    expanding=["targets"],
+)
+_DELETE_EDGES = statements.define(
+    "followers.delete_edges",
+    """
+    DELETE FROM Followers
+    WHERE user_id = :user_id AND follower_user_id IN :targets
+    """,
+    expanding=["targets"],
+)
+_BUMP_COUNTS = statements.define(
+    "follow_counts.bump",
+    """
+    INSERT INTO FollowCounts (user_id, followers_count, following_count)
+    VALUES (:user_id, GREATEST(:followers, 0), GREATEST(:following, 0))
+    ON DUPLICATE KEY UPDATE
+        followers_count = GREATEST(followers_count + :followers, 0),
+        following_count = GREATEST(following_count + :following, 0)
+    """,
+)
+# executemany like _INSERT_EDGES; the VALUES list holds only placeholders so
+# the driver can still fold it into one statement
+_ADD_FOLLOWERS = statements.define(
+    "follow_counts.add_followers",
+    """
+    INSERT INTO FollowCounts (user_id, followers_count)
+    VALUES (:user_id, :followers)
+    ON DUPLICATE KEY UPDATE followers_count = followers_count + VALUES(followers_count)
+    """,
+)
+_DROP_FOLLOWERS = statements.define(
+    "follow_counts.drop_followers",
+    """
+    UPDATE FollowCounts SET followers_count = GREATEST(followers_count - 1, 0)
+    WHERE user_id IN :targets
+    """,
+    expanding=["targets"],
+)
+_COUNTS = statements.define(
+    "follow_counts.for_user",
+    "SELECT followers_count, following_count FROM FollowCounts WHERE user_id = :user_id",
+)
+# (side, after a cursor) -> keyset page on (since, follower_id), served by the (side, since) indexes
+_FOLLOW_PAGES = {
+    (side, after): statements.define(
+        f"followers.page.{side}" + (".after_cursor" if after else ""),
+        f"""
+        SELECT f.follower_id, f.since, f.{other} AS user_id
+        FROM Followers f
+        WHERE f.{side} = :user_id
+        {"AND (f.since < :since OR (f.since = :since AND f.follower_id < :follower_id))" if after else ""}
+        ORDER BY f.since DESC, f.follower_id DESC
+        LIMIT :limit
+        """,
+    )
+    for side, other in [("user_id", "follower_user_id"), ("follower_user_id", "user_id")]
+    for after in (False, True)
+}
+
 class FollowAction(BaseModel):
     user_id: int
     follower_user_id: int
 
+class FollowBatch(BaseModel):
+    user_id: int
+    follow: list[int] = Field(default_factory=list, max_length=1000)
+    unfollow: list[int] = Field(default_factory=list, max_length=1000)
+
+class FollowBatchResult(BaseModel):
+    target_id: int
+    status: str
+
+class FollowBatchOut(BaseModel):
+    results: list[FollowBatchResult]
+
 # --- Get suggested profiles ---
 @router.get("/suggestions/{user_id}", response_model=list[schemas.ProfileWithFollowStatus])
-def suggested_profiles(user_id: int, db: Session = Depends(get_db)):
-    # Get current user's profile
-    my_profile = db.execute(
-        text("SELECT age, gender FROM Profiles WHERE user_id = :user_id"),
-        {"user_id": user_id},
-    ).mappings().first()
-    if not my_profile:
+async def suggested_profiles(
+    user_id: int,
+    limit: int = Query(default=5, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Users most similar to ``user_id`` by profile and recent activity, not yet followed."""
+    ids = await run_in_threadpool(_similar_ids, user_id, limit)
+    if ids is None:
         raise HTTPException(status_code=404, detail="User profile not found")
+    return await _profile_cards(db, ids)
 
-    # First, try to find similar users
-    rows = db.execute(
-        text("""
-            SELECT u.user_id, u.username, u.email,
-                   p.age, p.gender, p.height_cm, p.weight_kg, p.bio, p.timezone,
-                   EXISTS(
-                       SELECT 1 FROM Followers f
-                       WHERE f.user_id = :user_id AND f.follower_user_id = u.user_id
-                   ) AS is_following
-            FROM Users u
-            JOIN Profiles p ON u.user_id = p.user_id
-            WHERE u.user_id != :user_id
-              AND p.gender = :gender
-              AND p.age BETWEEN :age_minus AND :age_plus
-            LIMIT 5
-        """),
-        {
-            "user_id": user_id,
-            "gender": my_profile["gender"],
-            "age_minus": my_profile["age"] - 5,
-            "age_plus": my_profile["age"] + 5
-        }
-    ).mappings().all()
-
-    # If not enough, fill with other users (excluding self and already-followed)
-    if len(rows) < 2:
-        extra_rows = db.execute(
-            text("""
-                SELECT u.user_id, u.username, u.email,
-                       p.age, p.gender, p.height_cm, p.weight_kg, p.bio, p.timezone,
-                       EXISTS(
-                           SELECT 1 FROM Followers f
-                           WHERE f.user_id = :user_id AND f.follower_user_id = u.user_id
-                       ) AS is_following
-                FROM Users u
-                JOIN Profiles p ON u.user_id = p.user_id
-                WHERE u.user_id != :user_id
-                LIMIT :limit
-            """),
-            {"user_id": user_id, "limit": 2 - len(rows)}
-        ).mappings().all()
-        # Avoid duplicates
-        seen_ids = {r["user_id"] for r in rows}
-        rows += [r for r in extra_rows if r["user_id"] not in seen_ids]
+
+def _similar_ids(user_id: int, limit: int) -> list[int] | None:
+    """Index upkeep, the graph lookup and the kNN pass, in a worker thread.
+
+    They block on SQL, NumPy and the graph lock, so they stay off the event
+    loop and use their own session on the primary.
+    """
+    with SessionLocal() as db:
+        suggestions.ensure_ready(db)
+        following = follow_graph.ensure_loaded(db).following(user_id).tolist()
+
+        ids = suggestions.index.nearest(user_id, limit, exclude=following)
+        if ids is None:
+            # profile created since the last refresh
+            suggestions.index.refresh(db, [user_id])
+            ids = suggestions.index.nearest(user_id, limit, exclude=following)
+    return ids
+
+
+# --- Suggestions from the follow graph ---
+@router.get("/suggestions/{user_id}/network", response_model=list[schemas.ProfileWithFollowStatus])
+async def network_suggestions(
+    user_id: int,
+    limit: int = Query(default=10, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Users followed by the people ``user_id`` follows, most shared first."""
+    ids = await run_in_threadpool(_two_hop_ids, user_id, limit)
+    return await _profile_cards(db, ids)
+
+
+def _two_hop_ids(user_id: int, limit: int) -> list[int]:
+    return [candidate for candidate, _ in follow_graph.ensure_loaded().two_hop(user_id, limit)]
+
+
+# --- Mutual follows ---
+@router.get("/mutuals/{user_id}", response_model=list[schemas.ProfileWithFollowStatus])
+async def mutual_follows(user_id: int, db: AsyncSession = Depends(get_read_db)):
+    ids = await run_in_threadpool(_mutual_ids, user_id)
+    return await _profile_cards(db, ids, is_following=True)
+
+
+def _mutual_ids(user_id: int) -> list[int]:
+    return follow_graph.ensure_loaded().mutuals(user_id).tolist()
+
+
+async def _profile_cards(db: AsyncSession, ids: list[int], *, is_following: bool = False) -> list[dict]:
+    """Profile rows for ``ids`` in the given order."""
+    if not ids:
+        return []
+    rows = (await db.execute(_PROFILE_CARDS, {"ids": ids})).mappings().all()
+    by_id = {r["user_id"]: r for r in rows}
 
     return [
         {
@@ -79,38 +196,185 @@ def suggested_profiles(user_id: int, db: Session = Depends(get_db)):
             "weight_kg": r["weight_kg"],
             "bio": r["bio"],
             "timezone": r["timezone"],
-            "is_following": bool(r["is_following"])
+            "is_following": is_following,
         }
-        for r in rows
+        for r in (by_id.get(profile_id) for profile_id in ids)
+        if r is not None
     ]
 
 # --- Follow a user ---
 @router.post("/add")
-def follow_user(action: FollowAction, db: Session = Depends(get_db)):
-    user_id = action.user_id
-    follower_user_id = action.follower_user_id
-    exists = db.execute(
-        text("SELECT 1 FROM Followers WHERE user_id = :user_id AND follower_user_id = :follower_user_id"),
-        {"user_id": user_id, "follower_user_id": follower_user_id}
-    ).first()
-    if exists:
-        return {"status": "already following"}
-
-    db.execute(
-        text("INSERT INTO Followers (user_id, follower_user_id, since) VALUES (:user_id, :follower_user_id, :since)"),
-        {"user_id": user_id, "follower_user_id": follower_user_id, "since": datetime.utcnow()}
-    )
-    db.commit()
-    return {"status": "followed"}
+async def follow_user(action: FollowAction, db: AsyncSession = Depends(get_async_db)):
+    statuses = await _apply_batch(db, action.user_id, follow=[action.follower_user_id], unfollow=[])
+    return {"status": statuses[action.follower_user_id]}
 
 # --- Unfollow a user ---
 @router.post("/unfollow")
-def unfollow_user(action: FollowAction, db: Session = Depends(get_db)):
-    user_id = action.user_id
-    follower_user_id = action.follower_user_id
-    db.execute(
-        text("DELETE FROM Followers WHERE user_id = :user_id AND follower_user_id = :follower_user_id"),
-        {"user_id": user_id, "follower_user_id": follower_user_id}
+async def unfollow_user(action: FollowAction, db: AsyncSession = Depends(get_async_db)):
+    await _apply_batch(db, action.user_id, follow=[], unfollow=[action.follower_user_id])
+    return {"status": "unfollowed"}
+
+# --- Follow / unfollow many users at once ---
+@router.post("/batch", response_model=FollowBatchOut)
+async def follow_batch(batch: FollowBatch, db: AsyncSession = Depends(get_async_db)):
+    """
+    Apply many follows and unfollows in one transaction.
+
+    Returns a status per target: "followed", "already following",
+    "unfollowed", "not following" or "skipped" (self, or listed in both).
+    """
+    statuses = await _apply_batch(db, batch.user_id, follow=batch.follow, unfollow=batch.unfollow)
+    return FollowBatchOut(
+        results=[FollowBatchResult(target_id=target_id, status=status) for target_id, status in statuses.items()]
+    )
+
+
+async def _apply_batch(db: AsyncSession, user_id: int, *, follow: list[int], unfollow: list[int]) -> dict[int, str]:
+    """
+    Follow/unfollow for one user in one transaction: one SELECT of the
+    current edges, one multi-row INSERT IGNORE and one DELETE ... IN, plus
+    two counter statements per direction. The unique key makes a concurrent
+    duplicate follow insert nothing. When the insert's rowcount falls short,
+    the edges carrying this request's ``since`` are re-read to tell which
+    ones it created, so counters only move for those.
+    """
+    follow_set, unfollow_set = set(follow), set(unfollow)
+    statuses = {
+        target_id: "skipped"
+        for target_id in [*follow, *unfollow]
+        if target_id == user_id or (target_id in follow_set and target_id in unfollow_set)
+    }
+    follow_ids = sorted(follow_set - statuses.keys())
+    unfollow_ids = sorted(unfollow_set - statuses.keys())
+    targets = follow_ids + unfollow_ids
+    if not targets:
+        return statuses
+
+    existing = set((await db.execute(_EXISTING_EDGES, {"user_id": user_id, "targets": targets})).scalars())
+
+    to_insert = [target_id for target_id in follow_ids if target_id not in existing]
+    to_delete = [target_id for target_id in unfollow_ids if target_id in existing]
+    statuses.update({target_id: "already following" for target_id in follow_ids if target_id in existing})
+    statuses.update({target_id: "followed" for target_id in to_insert})
+    statuses.update({target_id: "not following" for target_id in unfollow_ids if target_id not in existing})
+    statuses.update({target_id: "unfollowed" for target_id in to_delete})
+
+    if to_insert:
+        # whole seconds, as stored in the DATETIME column, so the re-read below matches
+        now = datetime.utcnow().replace(microsecond=0)
+        result = await db.execute(
+            _INSERT_EDGES,
+            [{"user_id": user_id, "follower_user_id": target_id, "since": now} for target_id in to_insert],
+        )
+        if result.rowcount != len(to_insert):
+            # a concurrent request followed some of them first; its rows keep their own since
+            ours = set(
+                (
+                    await db.execute(_EDGES_SINCE, {"user_id": user_id, "targets": to_insert, "since": now})
+                ).scalars()
+            )
+            statuses.update({target_id: "already following" for target_id in to_insert if target_id not in ours})
+            to_insert = [target_id for target_id in to_insert if target_id in ours]
+        await _bump_counts(db, user_id, to_insert, 1)
+
+    if to_delete:
+        await db.execute(_DELETE_EDGES, {"user_id": user_id, "targets": to_delete})
+        await _bump_counts(db, user_id, to_delete, -1)
+
+    await db.commit()
+    if to_insert or to_delete:
+        # the graph lock can be held by a reload; wait for it in a worker thread
+        await run_in_threadpool(_apply_to_graph, user_id, to_insert, to_delete)
+    return statuses
+
+
+def _apply_to_graph(user_id: int, followed: list[int], unfollowed: list[int]) -> None:
+    for target_id in followed:
+        follow_graph.follow(user_id, target_id)
+    for target_id in unfollowed:
+        follow_graph.unfollow(user_id, target_id)
+
+
+async def _bump_counts(db: AsyncSession, user_id: int, target_ids: list[int], delta: int) -> None:
+    """Adjust FollowCounts for ``user_id`` following (or unfollowing) ``target_ids``.
+
+    Runs inside the caller's transaction, so counters move with the rows.
+    One statement for ``user_id`` and one for all targets.
+    """
+    if not target_ids:
+        return
+    await db.execute(_BUMP_COUNTS, {"user_id": user_id, "followers": 0, "following": delta * len(target_ids)})
+    if delta > 0:
+        await db.execute(_ADD_FOLLOWERS, [{"user_id": target_id, "followers": 1} for target_id in sorted(target_ids)])
+    else:
+        await db.execute(_DROP_FOLLOWERS, {"targets": sorted(target_ids)})
+
+
+# --- Counts for a profile header ---
+@router.get("/{user_id}/counts", response_model=schemas.FollowCountsOut)
+async def follow_counts(user_id: int, db: AsyncSession = Depends(get_read_db)):
+    result = await db.execute(_COUNTS, {"user_id": user_id})
+    row = result.mappings().first()
+    return schemas.FollowCountsOut(
+        user_id=user_id,
+        followers=row["followers_count"] if row else 0,
+        following=row["following_count"] if row else 0,
+    )
+
+
+# --- Followers / following lists ---
+@router.get("/{user_id}/followers", response_model=schemas.FollowListPage)
+async def list_followers(
+    user_id: int,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Users following ``user_id``, newest first."""
+    return await db.run_sync(_follow_page, "follower_user_id", user_id, limit, cursor)
+
+
+@router.get("/{user_id}/following", response_model=schemas.FollowListPage)
+async def list_following(
+    user_id: int,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Users ``user_id`` follows, most recently followed first."""
+    return await db.run_sync(_follow_page, "user_id", user_id, limit, cursor)
+
+
+def _follow_page(
+    db: Session,
+    side: str,
+    user_id: int,
+    limit: int,
+    cursor: str | None,
+) -> schemas.FollowListPage:
+    params = {"user_id": user_id, "limit": limit + 1}
+    if cursor:
+        try:
+            params["since"], params["follower_id"] = decode_cursor(cursor, datetime, int)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows = db.execute(_FOLLOW_PAGES[side, bool(cursor)], params).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["since"], rows[-1]["follower_id"])
+
+    users = user_directory.directory.get_many(db, [r["user_id"] for r in rows])
+    return schemas.FollowListPage(
+        items=[
+            schemas.FollowListEntry(
+                user_id=r["user_id"],
+                username=users[r["user_id"]].username if r["user_id"] in users else None,
+                since=r["since"],
+            )
+            for r in rows
+        ],
+        next_cursor=next_cursor,
     )
-    db.commit()
-    return {"status": "unfollowed"}
\ No newline at end of file
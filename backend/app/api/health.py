@@ -1,5 +1,6 @@
 from fastapi import APIRouter  # type: ignore
 from .. import schemas
+from ..core import db_pool, metrics
 
 router = APIRouter(prefix="/api/health", tags=["health"])
 
@@ -8,3 +9,15 @@ router = APIRouter(prefix="/api/health", tags=["health"])
 def ping():
     """Simple health check endpoint."""
     return {"message": "pong"}
+
+
+@router.get("/metrics")
+def get_metrics():
+    """In-process counters, gauges and latency histograms for this worker."""
+    return metrics.snapshot()
+
+
+@router.get("/db-pool")
+def get_db_pool():
+    """Pool settings and current usage for the sync and async engines."""
+    return db_pool.status()
@@ -2,17 +2,30 @@
 from datetime import date
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_read_db
 from app import schemas
+from app.core import follow_graph, statements, user_directory
 
 router = APIRouter(prefix="/api/leaderboard", tags=["leaderboard"])
 
+_STEPS_TODAY = statements.define(
+    "leaderboard.steps_today",
+    """
+    SELECT user_id, COALESCE(SUM(steps), 0) AS steps
+    FROM HealthLogs
+    WHERE user_id IN :user_ids
+      AND date = :today
+    GROUP BY user_id
+    """,
+    expanding=["user_ids"],
+)
+
 
 @router.get("/{user_id}", response_model=schemas.LeaderboardResponseOut)
-def get_leaderboard(user_id: int, db: Session = Depends(get_db)):
+async def get_leaderboard(user_id: int, db: AsyncSession = Depends(get_read_db)):
     """
     Returns today's leaderboard for the user and the users they follow.
 
@@ -23,17 +36,8 @@ def get_leaderboard(user_id: int, db: Session = Depends(get_db)):
     today = date.today()
 
     # 1) Who do I follow? (Followers.user_id = me, follower_user_id = friend)
-    follow_rows = db.execute(
-        text(
-            """
-            SELECT follower_user_id
-            FROM Followers
-            WHERE user_id = :user_id
-            """
-        ),
-        {"user_id": user_id},
-    ).mappings().all()
-    friend_ids = [row["follower_user_id"] for row in follow_rows]
+    # The graph may load or wait on a reload, so ask it from a worker thread.
+    friend_ids = await run_in_threadpool(_following_ids, user_id)
 
     # 2) Build the set of users in the leaderboard: me + my friends
     user_ids = [user_id] + friend_ids
@@ -44,38 +48,16 @@ def get_leaderboard(user_id: int, db: Session = Depends(get_db)):
             entries=[], current_user_entry=None
         )
 
-    # Helper to build IN clause safely
-    id_params = {f"id_{i}": uid for i, uid in enumerate(user_ids)}
-    placeholders = ", ".join(f":id_{i}" for i in range(len(user_ids)))
-
     # 3) Get today's steps
-    steps_sql = text(
-        f"""
-        SELECT user_id, COALESCE(SUM(steps), 0) AS steps
-        FROM HealthLogs
-        WHERE user_id IN ({placeholders})
-          AND date = :today
-        GROUP BY user_id
-        """
-    )
-    steps_params = dict(id_params)
-    steps_params["today"] = today
-    steps_rows = db.execute(steps_sql, steps_params).mappings().all()
+    steps_rows = (await db.execute(_STEPS_TODAY, {"user_ids": user_ids, "today": today})).mappings().all()
 
     steps_by_user = {row["user_id"]: int(row["steps"] or 0) for row in steps_rows}
     for uid in user_ids:
         steps_by_user.setdefault(uid, 0)
 
-    # 4) Get display names (username or email)
-    users_sql = text(
-        f"""
-        SELECT user_id, COALESCE(username, email) AS username
-        FROM Users
-        WHERE user_id IN ({placeholders})
-        """
-    )
-    users_rows = db.execute(users_sql, id_params).mappings().all()
-    username_by_id = {row["user_id"]: row["username"] for row in users_rows}
+    # 4) Get display names (username or email) from the shared user directory
+    users = await db.run_sync(user_directory.directory.get_many, user_ids)
+    username_by_id = {uid: entry.display_name for uid, entry in users.items()}
 
     # 5) Build and sort entries
     raw_entries = [
@@ -108,3 +90,7 @@ def get_leaderboard(user_id: int, db: Session = Depends(get_db)):
         entries=leaderboard_entries,
         current_user_entry=current_user_entry,
     )
+
+
+def _following_ids(user_id: int) -> list[int]:
+    return follow_graph.ensure_loaded().following(user_id).tolist()
@@ -0,0 +1,126 @@
+# app/api/media.py
+import hashlib
+import mimetypes
+import os
+import re
+from pathlib import PurePosixPath
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+
+from app.core import media_cache, storage
+from app.core.storage_backends import CACHE_CONTROL, LocalBackend
+
+router = APIRouter(tags=["media"])
+
+_SINGLE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+# a cached file evicted between lookup and response is fetched again, at most this often
+FETCH_ATTEMPTS = 2
+
+
+def _etag(object_name: str) -> str:
+    # stored objects are immutable, so the name identifies the bytes; the
+    # original and its _thumb/_feed variants share a digest, so the rest of
+    # the file name is kept to tell them apart
+    digest = storage.content_hash_of(object_name)
+    if digest is None:
+        return f'"{hashlib.sha256(object_name.encode("utf-8")).hexdigest()}"'
+    return f'"{digest}{PurePosixPath(object_name).name[len(digest):]}"'
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _check_access(object_name: str, expires: int | None, signature: str | None) -> None:
+    if ".." in object_name.split("/") or not object_name.startswith(f"{storage.image_folder()}/"):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    store = storage.backend()
+    # local objects behind signed URLs stay private unless the proxy is the public front
+    if isinstance(store, LocalBackend) and store.should_sign() and not storage.MEDIA_PROXY_ENABLED:
+        if expires is None or signature is None or not store.verify(object_name, expires, signature):
+            raise HTTPException(status_code=403, detail="Invalid or expired media signature")
+
+
+@router.get("/media/{object_name:path}")
+def get_media(
+    object_name: str,
+    request: Request,
+    expires: int | None = None,
+    signature: str | None = None,
+):
+    """
+    Serve a stored object, from the local disk cache when possible.
+
+    Cached objects support single and multi-part ``Range`` requests. Objects
+    larger than the cache entry limit are sized first and streamed from
+    storage without caching, honouring a single ``Range``.
+    """
+    _check_access(object_name, expires, signature)
+
+    etag = _etag(object_name)
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": etag}
+    cache = media_cache.get_cache()
+    store = storage.backend()
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        # only confirm a copy we could still serve; deleted objects get 404
+        if cache.get(object_name) is None:
+            try:
+                store.size(object_name)
+            except FileNotFoundError:
+                raise HTTPException(status_code=404, detail="Not found")
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(object_name)[0] or "application/octet-stream"
+
+    for _ in range(FETCH_ATTEMPTS):
+        path = cache.get(object_name)
+        if path is None:
+            try:
+                # sized first, so objects over the entry limit are not fetched twice
+                size = store.size(object_name)
+                if size <= cache.max_entry_bytes:
+                    path = cache.put(object_name, store.stream(object_name))
+            except FileNotFoundError:
+                raise HTTPException(status_code=404, detail="Not found")
+            if path is None:
+                return _stream_range(store, object_name, size, request, media_type, headers)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # evicted since the lookup
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
+    raise HTTPException(status_code=503, detail="Media cache is thrashing, retry", headers={"Retry-After": "1"})
+
+
+def _stream_range(store, object_name: str, size: int, request: Request, media_type: str, headers: dict):
+    """Serve an uncached object straight from storage, honouring a single ``Range``.
+
+    Multi-range requests on these (large) objects get the whole body, which
+    RFC 9110 allows.
+    """
+    headers = {**headers, "Accept-Ranges": "bytes"}
+    match = _SINGLE_RANGE.match(request.headers.get("range", "").strip())
+    if not match or match.groups() == ("", ""):
+        return StreamingResponse(
+            store.stream(object_name), media_type=media_type, headers={**headers, "Content-Length": str(size)}
+        )
+
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        # suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or start > end:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    return StreamingResponse(
+        store.stream(object_name, start, end),
+        status_code=206,
+        media_type=media_type,
+        headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)},
+    )
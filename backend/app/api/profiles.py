@@ -1,36 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app import crud, schemas
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_read_db
+from app import async_crud, schemas
 
 router = APIRouter(prefix="/api/profiles", tags=["profiles"])
 
+MAX_BATCH_IDS = 200
+
+@router.get("", response_model=list[schemas.ProfileOut])
+async def get_profiles(
+    ids: str = Query(..., description="Comma-separated user ids, e.g. 1,2,3"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Many profiles in one query, in the requested order; users without a profile get defaults."""
+    try:
+        user_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if len(user_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+
+    rows = await async_crud.get_profiles(db, user_ids)
+    return [
+        schemas.ProfileOut(**rows[user_id]) if user_id in rows else schemas.ProfileOut(user_id=user_id)
+        for user_id in user_ids
+    ]
+
 @router.post("/auto-create", response_model=schemas.ProfileOut)
-def auto_create_profile(user_id: int, db: Session = Depends(get_db)):
-    crud.create_profile(db, user_id)
-    row = crud.get_profile(db, user_id)
+async def auto_create_profile(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    await async_crud.create_profile(db, user_id)
+    row = await async_crud.get_profile(db, user_id)
     return schemas.ProfileOut(**row)
 
 @router.get("/{user_id}", response_model=schemas.ProfileOut)
-def get_profile(user_id: int, db: Session = Depends(get_db)):
-    row = crud.get_profile(db, user_id)
+async def get_profile(user_id: int, db: AsyncSession = Depends(get_read_db)):
+    row = await async_crud.get_profile(db, user_id)
     if not row:
-        crud.create_profile(db, user_id)
-        row = crud.get_profile(db, user_id)
-        if not row:
-            raise HTTPException(status_code=500, detail="Profile could not be created")
+        # reads never write; the row is created on the first PUT
+        return schemas.ProfileOut(user_id=user_id)
     return schemas.ProfileOut(**row)
 
 @router.put("/{user_id}", response_model=schemas.ProfileOut)
-def update_profile(user_id: int, profile_in: schemas.ProfileUpdate, db: Session = Depends(get_db)):
-    # Try to get the profile first
-    row = crud.get_profile(db, user_id)
-    if not row:
-        # Auto-create profile if not found
-        crud.create_profile(db, user_id)
-    # Now update
-    crud.update_profile(db, user_id, profile_in)
-    row = crud.get_profile(db, user_id)
-    if not row:
-        raise HTTPException(status_code=500, detail="Profile could not be created")
-    return schemas.ProfileOut(**row)
\ No newline at end of file
+async def update_profile(user_id: int, profile_in: schemas.ProfileUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.upsert_profile(db, user_id, profile_in)
@@ -1,97 +1,111 @@
 import logging
-import os
 
-from fastapi import APIRouter, Depends, HTTPException, Request  # type: ignore
+from fastapi import APIRouter, Depends, HTTPException  # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
-from sqlalchemy import text
-import bcrypt  # type: ignore
 
-from .. import crud, schemas
-from ..database import get_db
+from .. import async_crud, schemas
+from ..core import auth, passwords, statements, user_directory
+from ..database import get_async_db
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
+_USER_BY_EMAIL = statements.define(
+    "users.by_email",
+    "SELECT user_id, email, username, password_hash, created_at FROM Users WHERE email = :email",
+)
+_USER_BY_ID = statements.define(
+    "users.by_id",
+    "SELECT user_id, email, username, created_at FROM Users WHERE user_id = :user_id",
+)
+_INSERT_USER = statements.define(
+    "users.insert",
+    "INSERT INTO Users (email, username, password_hash) VALUES (:email, :username, :password_hash)",
+)
+_UPDATE_PASSWORD_HASH = statements.define(
+    "users.update_password_hash",
+    "UPDATE Users SET password_hash = :password_hash WHERE user_id = :user_id",
+)
+
 logger = logging.getLogger("wahoowell.users")
-logging.basicConfig(level=logging.DEBUG)
 
 
-@router.post("/register", response_model=schemas.User)
-def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
+@router.post("/register", response_model=schemas.AuthenticatedUser)
+async def register(user_in: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     # 1) Check if email already exists
-    existing = db.execute(
-        text(
-            """
-            SELECT user_id, email, username, created_at
-            FROM Users
-            WHERE email = :email
-            """
-        ),
-        {"email": user_in.email},
-    ).mappings().first()
-
+    existing = await db.run_sync(_find_user, user_in.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # 2) Hash password
+    # 2) Hash password (in the hashing pool, not on this worker's threads)
     if not user_in.password:
         raise HTTPException(status_code=400, detail="Password is required")
 
-    hashed_pw = bcrypt.hashpw(user_in.password.encode("utf-8"), bcrypt.gensalt())
+    hashed_pw = await _hash_or_503(passwords.hash_password(user_in.password))
     username = user_in.username or user_in.email.split("@")[0]
 
     # 3) Insert user
+    row = await db.run_sync(_insert_user, user_in.email, username, hashed_pw)
+    return _with_token(schemas.User(**row))
+
+
+def _with_token(user: schemas.User) -> schemas.AuthenticatedUser:
+    return schemas.AuthenticatedUser(
+        **user.model_dump(),
+        access_token=auth.issue_token(user.user_id, user.username),
+        expires_in=auth.TOKEN_TTL_SECONDS,
+    )
+
+
+def _find_user(db: Session, email: str):
+    return db.execute(_USER_BY_EMAIL, {"email": email}).mappings().first()
+
+
+def _insert_user(db: Session, email: str, username: str, password_hash: str):
     result = db.execute(
-        text(
-            """
-            INSERT INTO Users (email, username, password_hash)
-            VALUES (:email, :username, :password_hash)
-            """
-        ),
+        _INSERT_USER,
         {
-            "email": user_in.email,
+            "email": email,
             "username": username,
-            "password_hash": hashed_pw.decode("utf-8"),
+            "password_hash": password_hash,
         },
     )
     user_id = result.lastrowid
+    db.commit()
+    # the id may be cached as unknown from an earlier lookup
+    user_directory.directory.invalidate(user_id)
+
+    return db.execute(_USER_BY_ID, {"user_id": user_id}).mappings().first()
 
-    row = db.execute(
-        text(
-            """
-            SELECT user_id, email, username, created_at
-            FROM Users
-            WHERE user_id = :user_id
-            """
-        ),
-        {"user_id": user_id},
-    ).mappings().first()
 
-    return schemas.User(**row)
+def _store_rehash(db: Session, user_id: int, password_hash: str) -> None:
+    db.execute(_UPDATE_PASSWORD_HASH, {"user_id": user_id, "password_hash": password_hash})
+    db.commit()
 
 
-@router.post("/upsert", response_model=schemas.User)
-async def upsert_user(
-    request: Request, payload: schemas.UserCreate, db: Session = Depends(get_db)
-):
+async def _hash_or_503(operation):
+    try:
+        return await operation
+    except passwords.HasherBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many sign-ins right now, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+
+@router.post("/upsert", response_model=schemas.AuthenticatedUser, dependencies=[Depends(auth.service_caller)])
+async def upsert_user(payload: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
-    Upsert endpoint used e.g. by external login.
-    Delegates to crud.upsert_user (now raw SQL).
+    Upsert endpoint used by the frontend server after an external login.
+    Only the frontend server holds the shared service secret and it has
+    already verified the sign-in, so the user gets a session token as on login.
+    Delegates to crud.upsert_user (one write, or none if nothing changed).
     """
     try:
-        logger.info("Upsert request payload: %s", payload.dict())
-        logger.info("Running against DATABASE_URL=%s", os.getenv("DATABASE_URL"))
-
-        user = crud.upsert_user(db, payload)
-        # Ensure username in response matches what we just passed in (if provided)
-        if payload.username:
-            user.username = payload.username
-
-        logger.info(
-            "Upsert OK user_id=%s email=%s",
-            getattr(user, "user_id", None),
-            getattr(user, "email", None),
-        )
-        return user
+        user = await async_crud.upsert_user(db, payload)
+        logger.debug("Upsert OK user_id=%s", user.user_id)
+        return _with_token(user)
     except Exception as e:
         logger.exception("Upsert failed")
         raise HTTPException(
@@ -99,26 +113,31 @@ async def upsert_user(
             detail={"error": str(e), "type": type(e).__name__},
         )
 
-@router.post("/login", response_model=schemas.User)
-def login(user_in: schemas.UserLogin, db: Session = Depends(get_db)):
-    row = db.execute(
-        text("""
-            SELECT user_id, email, username, password_hash, created_at
-            FROM Users
-            WHERE email = :email
-        """),
-        {"email": user_in.email},
-    ).mappings().first()
+@router.post("/login", response_model=schemas.AuthenticatedUser)
+async def login(user_in: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    row = await db.run_sync(_find_user, user_in.email)
 
     if not row or not row["password_hash"]:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    if not bcrypt.checkpw(user_in.password.encode("utf-8"), row["password_hash"].encode("utf-8")):
+    ok, new_hash = await _hash_or_503(passwords.verify_password(user_in.password, row["password_hash"]))
+    if not ok:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    if new_hash:
+        # stored with an older cost factor; upgrade while we have the password
+        await db.run_sync(_store_rehash, row["user_id"], new_hash)
+
+    return _with_token(
+        schemas.User(
+            user_id=row["user_id"],
+            email=row["email"],
+            username=row["username"],
+            created_at=row["created_at"],
+        )
+    )
+
 
-    return schemas.User(
-        user_id=row["user_id"],
-        email=row["email"],
-        username=row["username"],
-        created_at=row["created_at"],
-    )
\ No newline at end of file
+@router.get("/me", response_model=schemas.Identity)
+def me(identity: auth.Identity = Depends(auth.current_user)):
+    """Who the bearer token belongs to; answered without touching the database."""
+    return schemas.Identity(user_id=identity.user_id, username=identity.username)
@@ -0,0 +1,131 @@
+# app/async_crud.py
+"""Async entry points to the CRUD layer for request handlers.
+
+Each function takes an ``AsyncSession`` and runs the matching function from
+:mod:`app.crud` through ``AsyncSession.run_sync``. The SQL is therefore
+written once. On the asyncio driver every query yields to the event loop
+instead of holding a threadpool thread, so one worker can keep thousands of
+slow clients open. Workers and scripts keep calling :mod:`app.crud`
+directly with a sync ``Session``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Mapping, Sequence, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, schemas
+
+T = TypeVar("T")
+
+
+async def run(db: AsyncSession, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a sync ``function(session, *args)`` on the async session's connection."""
+    return await db.run_sync(function, *args, **kwargs)
+
+
+# ---------- USERS ----------
+
+async def upsert_user(db: AsyncSession, user_in: schemas.UserCreate) -> schemas.User:
+    return await run(db, crud.upsert_user, user_in)
+
+
+# ---------- COMMUNITY / POSTS ----------
+
+async def create_post(db: AsyncSession, post_in: schemas.CommunityPostCreate) -> schemas.CommunityPostOut:
+    return await run(db, crud.create_post, post_in)
+
+
+async def list_posts(db: AsyncSession) -> list[schemas.CommunityPostOut]:
+    return await run(db, crud.list_posts)
+
+
+async def list_hot_posts(
+    db: AsyncSession, *, limit: int, cursor: str | None = None
+) -> tuple[list[schemas.CommunityPostOut], str | None]:
+    return await run(db, crud.list_hot_posts, limit=limit, cursor=cursor)
+
+
+async def search_posts(
+    db: AsyncSession, query: str, *, limit: int, offset: int = 0
+) -> tuple[list[schemas.CommunitySearchHit], int | None]:
+    return await run(db, crud.search_posts, query, limit=limit, offset=offset)
+
+
+async def get_post(db: AsyncSession, post_id: int) -> schemas.CommunityPostOut | None:
+    return await run(db, crud.get_post, post_id)
+
+
+async def find_images_by_hash(
+    db: AsyncSession, hashes: Sequence[str]
+) -> dict[str, schemas.CommunityPostImageCreate]:
+    return await run(db, crud.find_images_by_hash, hashes)
+
+
+async def delete_post(db: AsyncSession, post_id: int, user_id: int) -> str:
+    return await run(db, crud.delete_post, post_id, user_id)
+
+
+async def bulk_delete(
+    db: AsyncSession, post_ids: Sequence[int], comment_ids: Sequence[int] = ()
+) -> dict[str, int]:
+    return await run(db, crud.bulk_delete, post_ids, comment_ids)
+
+
+# ---------- COMMENTS ----------
+
+async def add_comment(db: AsyncSession, comment_in: schemas.PostCommentCreate) -> schemas.PostCommentOut:
+    return await run(db, crud.add_comment, comment_in)
+
+
+async def list_comments(
+    db: AsyncSession, post_id: int, *, limit: int, after: str | None = None
+) -> tuple[list[schemas.PostCommentOut], str | None]:
+    return await run(db, crud.list_comments, post_id, limit=limit, after=after)
+
+
+async def count_comments(db: AsyncSession, post_id: int) -> int:
+    return await run(db, crud.count_comments, post_id)
+
+
+async def delete_comment(db: AsyncSession, post_id: int, comment_id: int, user_id: int) -> str:
+    return await run(db, crud.delete_comment, post_id, comment_id, user_id)
+
+
+# ---------- REACTIONS ----------
+
+async def add_reaction(db: AsyncSession, reaction_in: schemas.PostReactionCreate) -> None:
+    await run(db, crud.add_reaction, reaction_in)
+
+
+async def remove_reaction(db: AsyncSession, post_id: int, user_id: int) -> None:
+    await run(db, crud.remove_reaction, post_id, user_id)
+
+
+async def get_reaction_for_user(db: AsyncSession, post_id: int, user_id: int):
+    return await run(db, crud.get_reaction_for_user, post_id, user_id)
+
+
+async def reaction_summary(db: AsyncSession, post_id: int) -> list[schemas.ReactionSummary]:
+    return await run(db, crud.reaction_summary, post_id)
+
+
+# ---------- PROFILES ----------
+
+async def create_profile(db: AsyncSession, user_id: int) -> None:
+    await run(db, crud.create_profile, user_id)
+
+
+async def get_profile(db: AsyncSession, user_id: int):
+    return await run(db, crud.get_profile, user_id)
+
+
+async def get_profiles(db: AsyncSession, user_ids: Sequence[int]) -> dict[int, Mapping[str, Any]]:
+    return await run(db, crud.get_profiles, user_ids)
+
+
+async def upsert_profile(
+    db: AsyncSession, user_id: int, profile_in: schemas.ProfileUpdate
+) -> schemas.ProfileOut:
+    return await run(db, crud.upsert_profile, user_id, profile_in)
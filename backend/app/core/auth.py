@@ -0,0 +1,127 @@
+"""Signed, expiring session tokens.
+
+Login, register and the external sign-in upsert hand out a token carrying
+the user's id and username, signed with ``AUTH_SECRET_KEYS``. Verifying it
+is an HMAC check, with no database access. Clients send it as ``Authorization: Bearer <token>``.
+
+Server-to-server routes (the external sign-in upsert) also require the
+``X-Service-Secret`` header to match ``SERVICE_SECRET``. Without
+``SERVICE_SECRET`` those routes are disabled and a warning is logged at
+startup.
+
+``AUTH_SECRET_KEYS`` is a comma-separated list, newest first. New tokens are
+signed with the first key, and tokens signed with any listed key are
+accepted. To rotate, prepend a new key and drop the oldest one once
+``AUTH_TOKEN_TTL_SECONDS`` has passed.
+"""
+
+from __future__ import annotations
+
+import hmac
+import logging
+import os
+import secrets
+from dataclasses import dataclass
+
+from fastapi import Depends, Header, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+logger = logging.getLogger(__name__)
+
+TOKEN_TTL_SECONDS = int(os.getenv("AUTH_TOKEN_TTL_SECONDS", str(7 * 24 * 3600)))
+TOKEN_SALT = "wahoowell.session"
+SERVICE_SECRET = os.getenv("SERVICE_SECRET", "")
+if not SERVICE_SECRET:
+    logger.warning(
+        "SERVICE_SECRET is not set; /api/users/upsert answers 403, so external (Google) "
+        "sign-ins fail. Set it here and as BACKEND_SERVICE_SECRET on the frontend server."
+    )
+
+
+def _secret_keys() -> list[str]:
+    keys = [key.strip() for key in os.getenv("AUTH_SECRET_KEYS", "").split(",") if key.strip()]
+    if not keys:
+        logger.warning(
+            "AUTH_SECRET_KEYS is not set; using a random key, so tokens do not survive "
+            "restarts and are not shared between workers."
+        )
+        keys = [secrets.token_urlsafe(32)]
+    return keys
+
+
+def _serializer_for(keys: list[str]) -> URLSafeTimedSerializer:
+    # itsdangerous signs with the last key and accepts all of them
+    return URLSafeTimedSerializer(list(reversed(keys)), salt=TOKEN_SALT)
+
+
+_serializer = _serializer_for(_secret_keys())
+_bearer = HTTPBearer(auto_error=False)
+
+
+class InvalidToken(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Identity:
+    user_id: int
+    username: str | None
+
+
+def issue_token(user_id: int, username: str | None) -> str:
+    return _serializer.dumps({"u": user_id, "n": username})
+
+
+def verify_token(token: str) -> Identity:
+    """Decode a token; raises :class:`InvalidToken` if forged, malformed or expired."""
+    try:
+        payload = _serializer.loads(token, max_age=TOKEN_TTL_SECONDS)
+    except SignatureExpired as exc:
+        raise InvalidToken("Token expired") from exc
+    except BadSignature as exc:
+        raise InvalidToken("Invalid token") from exc
+    try:
+        return Identity(user_id=int(payload["u"]), username=payload.get("n"))
+    except (KeyError, TypeError, ValueError) as exc:
+        raise InvalidToken("Invalid token") from exc
+
+
+def optional_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer),
+) -> Identity | None:
+    """The caller's identity if a valid bearer token was sent."""
+    if credentials is None:
+        return None
+    try:
+        return verify_token(credentials.credentials)
+    except InvalidToken:
+        return None
+
+
+def current_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer),
+) -> Identity:
+    """Require a valid bearer token; 401 otherwise."""
+    if credentials is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        return verify_token(credentials.credentials)
+    except InvalidToken as exc:
+        raise HTTPException(
+            status_code=401,
+            detail=str(exc),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def service_caller(x_service_secret: str | None = Header(default=None)) -> None:
+    """Require ``X-Service-Secret`` to match ``SERVICE_SECRET``; 403 otherwise."""
+    if not SERVICE_SECRET:
+        raise HTTPException(status_code=403, detail="Service routes are disabled (SERVICE_SECRET is not set)")
+    if x_service_secret is None or not hmac.compare_digest(x_service_secret.encode(), SERVICE_SECRET.encode()):
+        raise HTTPException(status_code=403, detail="Invalid service secret")
@@ -0,0 +1,66 @@
+"""Small helper for in-process periodic background jobs."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """Run ``target`` on a daemon thread every ``interval`` seconds.
+
+    ``wake()`` triggers an immediate run, e.g. right after new work was queued.
+    Exceptions are logged and never stop the loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        target: Callable[[], None],
+        *,
+        run_immediately: bool = True,
+    ):
+        self.name = name
+        self.interval = interval
+        self.target = target
+        self.run_immediately = run_immediately
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        if not self.run_immediately:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+        while not self._stopping.is_set():
+            try:
+                self.target()
+            except Exception:  # pragma: no cover - keep the loop alive
+                logger.exception("Background job %s failed", self.name)
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
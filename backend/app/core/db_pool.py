@@ -0,0 +1,142 @@
+"""Connection pool settings and telemetry.
+
+Every engine in :mod:`app.database` takes its pool settings from the
+environment and uses a pool class that times every checkout. :func:`instrument`
+attaches pool event listeners that count checkouts, overflow use, timeouts
+and invalidations, and registers gauges for the live pool state. Everything
+appears in ``GET /api/health/metrics`` under ``db_pool.<engine>.*``, and
+``GET /api/health/db-pool`` shows the settings next to the current numbers.
+
+A high ``checkout_seconds`` p95 or any ``timeouts`` means requests wait for
+connections, so raise ``DB_POOL_SIZE`` or ``DB_MAX_OVERFLOW``. If
+``overflow_checkouts`` stays near zero and ``idle`` stays high, the pool is
+bigger than it needs to be.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core import metrics
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# below MySQL's wait_timeout so the server never drops a pooled connection first
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in {"1", "true", "yes"}
+
+_engines: dict[str, Engine] = {}
+
+
+class _TimedCheckout:
+    """Pool mixin recording how long ``connect()`` waits for a connection."""
+
+    checkout_seconds: metrics.Histogram | None = None
+    timeouts: metrics.Counter | None = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            if self.timeouts is not None:
+                self.timeouts.inc()
+            raise
+        finally:
+            if self.checkout_seconds is not None:
+                self.checkout_seconds.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep it instrumented
+        pool = super().recreate()
+        pool.checkout_seconds, pool.timeouts = self.checkout_seconds, self.timeouts
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(*, asyncio: bool = False) -> dict[str, Any]:
+    """``create_engine`` keyword arguments for the configured pool."""
+    return {
+        "poolclass": TimedAsyncQueuePool if asyncio else TimedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+
+
+def instrument(engine: Engine, name: str) -> None:
+    """Count pool events for ``engine`` (a sync engine, or ``async_engine.sync_engine``)."""
+    prefix = f"db_pool.{name}"
+    pool = engine.pool
+    if isinstance(pool, _TimedCheckout):
+        pool.checkout_seconds = metrics.histogram(f"{prefix}.checkout_seconds")
+        pool.timeouts = metrics.counter(f"{prefix}.timeouts")
+
+    checkouts = metrics.counter(f"{prefix}.checkouts")
+    overflow_checkouts = metrics.counter(f"{prefix}.overflow_checkouts")
+    connects = metrics.counter(f"{prefix}.connects")
+    invalidations = metrics.counter(f"{prefix}.invalidations")
+
+    # listeners on the pool carry over to the pool recreated by dispose()
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.inc()
+        current = engine.pool
+        if current.checkedout() > current.size():
+            overflow_checkouts.inc()
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        connects.inc()
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        invalidations.inc()
+
+    @event.listens_for(pool, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_connection, connection_record, exception):
+        invalidations.inc()
+
+    metrics.gauge(f"{prefix}.size", lambda: engine.pool.size())
+    metrics.gauge(f"{prefix}.checked_out", lambda: engine.pool.checkedout())
+    metrics.gauge(f"{prefix}.idle", lambda: engine.pool.checkedin())
+    metrics.gauge(f"{prefix}.overflow", lambda: max(0, engine.pool.overflow()))
+    _engines[name] = engine
+
+
+def status() -> dict[str, Any]:
+    """Settings and live state of every instrumented pool.
+
+    Every engine is built from :func:`engine_options`, so the settings shown
+    are the module's configured values rather than pool internals.
+    """
+    return {
+        name: {
+            "pool_class": type(engine.pool).__name__,
+            "pool_size": POOL_SIZE,
+            "max_overflow": MAX_OVERFLOW,
+            "timeout": POOL_TIMEOUT,
+            "recycle": POOL_RECYCLE,
+            "pre_ping": POOL_PRE_PING,
+            "checked_out": engine.pool.checkedout(),
+            "idle": engine.pool.checkedin(),
+            "overflow": max(0, engine.pool.overflow()),
+        }
+        for name, engine in _engines.items()
+    }
@@ -0,0 +1,275 @@
+"""Durable, retrying deletion of stored objects.
+
+Request handlers never delete objects themselves. They insert the paths into
+``StorageDeletionOutbox`` in the same transaction that removes the database
+rows, and a background worker drains the outbox in batches. Failed deletions
+are retried with exponential backoff. A slower sweep finds objects under the
+image folder that no row references and queues them as well.
+
+Images are content-addressed and shared between posts, so only objects whose
+last reference is gone are queued, and the worker re-checks references just
+before deleting.
+
+Every API process runs the worker. A batch is claimed before any object is
+touched: the due rows are locked with ``FOR UPDATE SKIP LOCKED`` and their
+``next_attempt_at`` is pushed ``STORAGE_DELETE_LEASE`` seconds ahead in one
+short transaction, so other workers skip them. If a worker dies mid-batch, its
+rows become due again when the lease runs out.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Sequence
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.orm import Session
+
+from app.core import storage
+from app.core.background import PeriodicWorker
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+DRAIN_INTERVAL_SECONDS = float(os.getenv("STORAGE_DELETE_INTERVAL", "10"))
+DRAIN_BATCH_SIZE = int(os.getenv("STORAGE_DELETE_BATCH", "100"))
+MAX_ATTEMPTS = int(os.getenv("STORAGE_DELETE_MAX_ATTEMPTS", "8"))
+BACKOFF_BASE_SECONDS = int(os.getenv("STORAGE_DELETE_BACKOFF", "30"))
+BACKOFF_MAX_SECONDS = 6 * 60 * 60
+DELETE_DELAY_SECONDS = int(os.getenv("STORAGE_DELETE_DELAY", "60"))
+LEASE_SECONDS = int(os.getenv("STORAGE_DELETE_LEASE", "300"))
+SWEEP_INTERVAL_HOURS = float(os.getenv("STORAGE_ORPHAN_SWEEP_HOURS", "24"))
+ORPHAN_GRACE_HOURS = float(os.getenv("STORAGE_ORPHAN_GRACE_HOURS", "24"))
+WORKER_ENABLED = os.getenv("STORAGE_DELETE_WORKER", "true").lower() in {"1", "true", "yes"}
+
+_UNSHARED_POST_IMAGES = text(
+    """
+    SELECT DISTINCT img.storage_path, img.thumbnail_path, img.feed_path
+    FROM CommunityPostImages AS img
+    WHERE img.post_id IN :post_ids
+      AND NOT EXISTS (
+          SELECT 1
+          FROM CommunityPostImages AS other
+          WHERE other.storage_path = img.storage_path
+            AND other.post_id NOT IN :post_ids
+      )
+    """
+).bindparams(bindparam("post_ids", expanding=True))
+
+
+def enqueue_post_images(db: Session, post_ids: Sequence[int]) -> None:
+    """Queue the objects of ``post_ids`` that no other post references.
+
+    Must run before the image rows are deleted; the caller commits.
+    """
+    if not post_ids:
+        return
+    rows = db.execute(_UNSHARED_POST_IMAGES, {"post_ids": list(post_ids)}).all()
+    enqueue_paths(db, (path for row in rows for path in row))
+
+
+def enqueue_paths(db: Session, paths: Iterable[str]) -> None:
+    now = datetime.utcnow()
+    params = [
+        {
+            "storage_path": path,
+            "next_attempt_at": now + timedelta(seconds=DELETE_DELAY_SECONDS),
+            "now": now,
+        }
+        for path in dict.fromkeys(paths)
+        if path
+    ]
+    if not params:
+        return
+    db.execute(
+        text(
+            """
+            INSERT INTO StorageDeletionOutbox (storage_path, next_attempt_at, created_at)
+            VALUES (:storage_path, :next_attempt_at, :now)
+            """
+        ),
+        params,
+    )
+
+
+def _referenced_hashes(db: Session, paths: Iterable[str]) -> set[str]:
+    """Content hashes among ``paths`` that image rows still point at."""
+    hashes = {digest for digest in map(storage.content_hash_of, paths) if digest}
+    if not hashes:
+        return set()
+    rows = db.execute(
+        text(
+            """
+            SELECT DISTINCT content_hash
+            FROM CommunityPostImages
+            WHERE content_hash IN :hashes
+            """
+        ).bindparams(bindparam("hashes", expanding=True)),
+        {"hashes": sorted(hashes)},
+    ).all()
+    return {row[0] for row in rows}
+
+
+def _backoff(attempts: int) -> timedelta:
+    delay = BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1)
+    return timedelta(seconds=min(BACKOFF_MAX_SECONDS, delay))
+
+
+def _claim(db: Session) -> Sequence[RowMapping]:
+    """Lease a batch of due rows to this worker and commit the lease."""
+    sql = """
+        SELECT outbox_id, storage_path, attempts
+        FROM StorageDeletionOutbox
+        WHERE next_attempt_at <= :now AND attempts < :max_attempts
+        ORDER BY next_attempt_at ASC, outbox_id ASC
+        LIMIT :limit
+        """
+    if db.get_bind().dialect.name == "mysql":
+        # rows another worker is claiming right now are skipped, not waited for
+        sql += " FOR UPDATE SKIP LOCKED"
+    now = datetime.utcnow()
+    rows = db.execute(
+        text(sql),
+        {"now": now, "max_attempts": MAX_ATTEMPTS, "limit": DRAIN_BATCH_SIZE},
+    ).mappings().all()
+    if rows:
+        db.execute(
+            text(
+                """
+                UPDATE StorageDeletionOutbox
+                SET next_attempt_at = :lease_until
+                WHERE outbox_id IN :ids
+                """
+            ).bindparams(bindparam("ids", expanding=True)),
+            {
+                "lease_until": now + timedelta(seconds=LEASE_SECONDS),
+                "ids": [row["outbox_id"] for row in rows],
+            },
+        )
+    db.commit()
+    return rows
+
+
+def drain_once(db: Session) -> int:
+    """Process one batch of due deletions. Returns the number of rows claimed."""
+    rows = _claim(db)
+    if not rows:
+        return 0
+
+    # a re-upload of the same content may have re-referenced the object
+    # after it was queued; such rows are resolved without deleting anything
+    referenced = _referenced_hashes(db, (row["storage_path"] for row in rows))
+    failures = storage.delete_post_images(
+        row["storage_path"]
+        for row in rows
+        if storage.content_hash_of(row["storage_path"]) not in referenced
+    )
+
+    done = [row["outbox_id"] for row in rows if row["storage_path"] not in failures]
+    if done:
+        db.execute(
+            text("DELETE FROM StorageDeletionOutbox WHERE outbox_id IN :ids").bindparams(
+                bindparam("ids", expanding=True)
+            ),
+            {"ids": done},
+        )
+
+    now = datetime.utcnow()
+    for row in rows:
+        error = failures.get(row["storage_path"])
+        if error is None:
+            continue
+        attempts = row["attempts"] + 1
+        if attempts >= MAX_ATTEMPTS:
+            logger.error(
+                "Giving up on deleting %s after %s attempts: %s",
+                row["storage_path"],
+                attempts,
+                error,
+            )
+        db.execute(
+            text(
+                """
+                UPDATE StorageDeletionOutbox
+                SET attempts = :attempts,
+                    next_attempt_at = :next_attempt_at,
+                    last_error = :last_error
+                WHERE outbox_id = :outbox_id
+                """
+            ),
+            {
+                "outbox_id": row["outbox_id"],
+                "attempts": attempts,
+                "next_attempt_at": now + _backoff(attempts),
+                "last_error": error[:512],
+            },
+        )
+
+    db.commit()
+    return len(rows)
+
+
+def drain() -> None:
+    db = SessionLocal()
+    try:
+        while drain_once(db) >= DRAIN_BATCH_SIZE:
+            pass
+    finally:
+        db.close()
+
+
+def sweep_orphans() -> None:
+    """Queue objects under the image folder that no image row references."""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=ORPHAN_GRACE_HOURS)
+    db = SessionLocal()
+    try:
+        referenced: set[str] = set()
+        for row in db.execute(
+            text(
+                """
+                SELECT storage_path, thumbnail_path, feed_path
+                FROM CommunityPostImages
+                """
+            )
+        ):
+            referenced.update(path for path in row if path)
+        referenced.update(
+            path for (path,) in db.execute(text("SELECT storage_path FROM StorageDeletionOutbox"))
+        )
+
+        orphans = [
+            name
+            for name, updated in storage.list_objects(f"{storage.image_folder()}/")
+            if name not in referenced and (updated is None or updated < cutoff)
+        ]
+        if orphans:
+            enqueue_paths(db, orphans)
+            db.commit()
+            logger.info("Queued %s orphaned objects for deletion", len(orphans))
+    finally:
+        db.close()
+
+
+_drain_worker = PeriodicWorker("storage-delete", DRAIN_INTERVAL_SECONDS, drain)
+_sweep_worker = PeriodicWorker(
+    "storage-sweep",
+    SWEEP_INTERVAL_HOURS * 3600,
+    sweep_orphans,
+    run_immediately=False,
+)
+
+
+def start() -> None:
+    if not WORKER_ENABLED:
+        return
+    _drain_worker.start()
+    if SWEEP_INTERVAL_HOURS > 0:
+        _sweep_worker.start()
+
+
+def stop() -> None:
+    _drain_worker.stop()
+    _sweep_worker.stop()
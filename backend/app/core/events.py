@@ -0,0 +1,105 @@
+"""In-process pub/sub for pushing community activity to connected clients.
+
+Each subscriber owns a bounded queue. When a slow client falls behind, the
+oldest events are dropped and the client is told how many it missed, so a
+single stalled connection can never hold memory or block publishers.
+Publishing is thread-safe; the sync CRUD layer runs in the threadpool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("COMMUNITY_STREAM_QUEUE_SIZE", "256"))
+
+
+@dataclass(frozen=True)
+class Event:
+    id: int
+    type: str
+    data: dict[str, Any]
+
+    def to_sse(self) -> str:
+        payload = json.dumps(self.data, separators=(",", ":"), default=str)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.loop = loop
+        self._queue: deque[Event] = deque(maxlen=maxsize)
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def _push(self, event: Event) -> None:
+        # runs on the subscriber's event loop
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(event)
+        self._ready.set()
+
+    async def next_batch(self, timeout: float) -> list[Event]:
+        """Wait up to ``timeout`` seconds and return everything queued."""
+        if not self._queue:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._ready.clear()
+        batch = list(self._queue)
+        self._queue.clear()
+        return batch
+
+
+class EventBroker:
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type: str, data: dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        event = Event(next(self._ids), event_type, data)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._push, event)
+            except RuntimeError:  # loop already closed; the stream is going away
+                self.unsubscribe(subscription)
+
+
+broker = EventBroker()
+
+
+def publish(event_type: str, data: dict[str, Any]) -> None:
+    try:
+        broker.publish(event_type, data)
+    except Exception:  # pragma: no cover - never fail the write path
+        logger.exception("Failed to publish %s event", event_type)
@@ -0,0 +1,312 @@
+"""In-process follow graph stored as compressed sparse rows (CSR).
+
+``Followers.user_id`` follows ``Followers.follower_user_id``. The graph keeps
+both directions as NumPy arrays: ``nodes`` and ``indptr`` (int64, one slot
+per user id that has neighbours in that direction, so sparse or large ids
+cost nothing) and ``indices`` (int32, sorted neighbour ids), about 4 bytes
+per edge per direction. A row is found by binary search on ``nodes`` and
+is an array slice, so following, followers, mutual and two-hop queries
+cost O(log users + degree).
+
+Writes made through this process are applied to a small overlay of added
+and removed edges. The overlay is folded into fresh CSR arrays once it
+grows past ``FOLLOW_GRAPH_COMPACT_EDGES``. A periodic reload from the
+database picks up writes made by other processes, so each worker's copy can
+miss another worker's follows and unfollows for up to
+``FOLLOW_GRAPH_RELOAD_MINUTES``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicWorker
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+RELOAD_INTERVAL_SECONDS = float(os.getenv("FOLLOW_GRAPH_RELOAD_MINUTES", "10")) * 60
+COMPACT_EDGES = int(os.getenv("FOLLOW_GRAPH_COMPACT_EDGES", "10000"))
+WORKER_ENABLED = os.getenv("FOLLOW_GRAPH_WORKER", "true").lower() in {"1", "true", "yes"}
+LOAD_PARTITION_ROWS = 50_000
+
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+@dataclass(frozen=True)
+class CSR:
+    nodes: np.ndarray  # int64, sorted ids that have at least one neighbour
+    indptr: np.ndarray  # int64, len = len(nodes) + 1
+    indices: np.ndarray  # int32, neighbours sorted within each row
+
+    @classmethod
+    def from_edges(cls, src: np.ndarray, dst: np.ndarray) -> "CSR":
+        """Build from parallel arrays of edges; duplicate edges are dropped."""
+        if len(src) == 0:
+            return cls(np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64), _EMPTY)
+        order = np.lexsort((dst, src))
+        src, dst = src[order], dst[order]
+        keep = np.ones(len(src), dtype=bool)
+        keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        src, dst = src[keep], dst[keep]
+        nodes, counts = np.unique(src, return_counts=True)
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return cls(nodes.astype(np.int64), indptr, dst.astype(np.int32))
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    def span(self, node: int) -> tuple[int, int]:
+        """``[start, end)`` of ``node``'s neighbours in ``indices``; empty if absent."""
+        position = int(np.searchsorted(self.nodes, node))
+        if position == len(self.nodes) or self.nodes[position] != node:
+            return 0, 0
+        return int(self.indptr[position]), int(self.indptr[position + 1])
+
+    def row(self, node: int) -> np.ndarray:
+        start, end = self.span(node)
+        return self.indices[start:end]
+
+    def has_edge(self, src: int, dst: int) -> bool:
+        row = self.row(src)
+        position = np.searchsorted(row, dst)
+        return bool(position < len(row) and row[position] == dst)
+
+    def edges(self) -> tuple[np.ndarray, np.ndarray]:
+        src = np.repeat(self.nodes, np.diff(self.indptr))
+        return src, self.indices.astype(np.int64)
+
+
+class FollowGraph:
+    def __init__(self) -> None:
+        self._following = CSR.from_edges(_EMPTY, _EMPTY)
+        self._followers = CSR.from_edges(_EMPTY, _EMPTY)
+        # overlay of writes since the last build, keyed by source user
+        self._added: dict[int, set[int]] = defaultdict(set)
+        self._removed: dict[int, set[int]] = defaultdict(set)
+        self._added_in: dict[int, set[int]] = defaultdict(set)
+        self._removed_in: dict[int, set[int]] = defaultdict(set)
+        self._overlay_size = 0
+        self._lock = threading.RLock()
+        # one load at a time, so loads never overwrite each other's journal;
+        # readers and writes only take _lock
+        self._load_lock = threading.RLock()
+        # writes seen while a load is reading the table, replayed on top of it
+        self._journal: list[tuple[bool, int, int]] | None = None
+        self.loaded = False
+
+    # -- building ---------------------------------------------------------
+
+    def build(self, src: np.ndarray, dst: np.ndarray) -> None:
+        self._install(CSR.from_edges(src, dst), CSR.from_edges(dst, src))
+
+    def _install(self, following: CSR, followers: CSR) -> None:
+        with self._lock:
+            self._following, self._followers = following, followers
+            for overlay in (self._added, self._removed, self._added_in, self._removed_in):
+                overlay.clear()
+            self._overlay_size = 0
+            self.loaded = True
+
+    def load(self, db: Session) -> int:
+        """Replace the graph with the current contents of ``Followers``.
+
+        Concurrent calls run one after another.
+        """
+        with self._load_lock:
+            return self._load(db)
+
+    def _load(self, db: Session) -> int:
+        with self._lock:
+            self._journal = []
+        try:
+            src_parts, dst_parts = [], []
+            result = db.execute(
+                text("SELECT user_id, follower_user_id FROM Followers").execution_options(
+                    stream_results=True
+                )
+            )
+            for rows in result.partitions(LOAD_PARTITION_ROWS):
+                pairs = np.array(rows, dtype=np.int64).reshape(-1, 2)
+                src_parts.append(pairs[:, 0])
+                dst_parts.append(pairs[:, 1])
+            src = np.concatenate(src_parts) if src_parts else np.empty(0, dtype=np.int64)
+            dst = np.concatenate(dst_parts) if dst_parts else np.empty(0, dtype=np.int64)
+            # sort outside the lock so readers only wait for the swap and replay
+            following, followers = CSR.from_edges(src, dst), CSR.from_edges(dst, src)
+            with self._lock:
+                self._install(following, followers)
+                journal, self._journal = self._journal, None
+                for added, user_id, target_id in journal:
+                    (self.add if added else self.remove)(user_id, target_id)
+        finally:
+            self._journal = None
+        return self.edge_count
+
+    def _compact(self) -> None:
+        src, dst = self._following.edges()
+        keep = np.ones(len(src), dtype=bool)
+        for user_id, removed in self._removed.items():
+            start, end = self._following.span(user_id)
+            keep[start:end] &= ~np.isin(dst[start:end], list(removed))
+        added_src = [user_id for user_id, targets in self._added.items() for _ in targets]
+        added_dst = [target for targets in self._added.values() for target in targets]
+        self.build(
+            np.concatenate([src[keep], np.array(added_src, dtype=np.int64)]),
+            np.concatenate([dst[keep], np.array(added_dst, dtype=np.int64)]),
+        )
+
+    # -- writes -----------------------------------------------------------
+
+    def add(self, user_id: int, target_id: int) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((True, user_id, target_id))
+            if target_id in self._removed.get(user_id, ()):
+                self._removed[user_id].discard(target_id)
+                self._removed_in[target_id].discard(user_id)
+            elif not self._following.has_edge(user_id, target_id):
+                self._added[user_id].add(target_id)
+                self._added_in[target_id].add(user_id)
+            self._overlay_size += 1
+            if self._overlay_size >= COMPACT_EDGES:
+                self._compact()
+
+    def remove(self, user_id: int, target_id: int) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((False, user_id, target_id))
+            if target_id in self._added.get(user_id, ()):
+                self._added[user_id].discard(target_id)
+                self._added_in[target_id].discard(user_id)
+            elif self._following.has_edge(user_id, target_id):
+                self._removed[user_id].add(target_id)
+                self._removed_in[target_id].add(user_id)
+            self._overlay_size += 1
+            if self._overlay_size >= COMPACT_EDGES:
+                self._compact()
+
+    @property
+    def tracking(self) -> bool:
+        """Whether writes should be applied: loaded, or a load is underway."""
+        return self.loaded or self._journal is not None
+
+    # -- reads ------------------------------------------------------------
+
+    @property
+    def edge_count(self) -> int:
+        with self._lock:
+            added = sum(len(targets) for targets in self._added.values())
+            removed = sum(len(targets) for targets in self._removed.values())
+            return self._following.edge_count + added - removed
+
+    @staticmethod
+    def _merge(row: np.ndarray, added: set[int] | None, removed: set[int] | None) -> np.ndarray:
+        if removed:
+            row = row[~np.isin(row, list(removed))]
+        if added:
+            row = np.union1d(row, np.fromiter(added, dtype=np.int32, count=len(added)))
+        return row
+
+    def following(self, user_id: int) -> np.ndarray:
+        """Sorted ids of the users ``user_id`` follows."""
+        with self._lock:
+            return self._merge(
+                self._following.row(user_id), self._added.get(user_id), self._removed.get(user_id)
+            )
+
+    def followers(self, user_id: int) -> np.ndarray:
+        """Sorted ids of the users following ``user_id``."""
+        with self._lock:
+            return self._merge(
+                self._followers.row(user_id), self._added_in.get(user_id), self._removed_in.get(user_id)
+            )
+
+    def is_following(self, user_id: int, target_id: int) -> bool:
+        with self._lock:
+            if target_id in self._added.get(user_id, ()):
+                return True
+            if target_id in self._removed.get(user_id, ()):
+                return False
+            return self._following.has_edge(user_id, target_id)
+
+    def mutuals(self, user_id: int) -> np.ndarray:
+        """Users that ``user_id`` follows and who follow back."""
+        return np.intersect1d(self.following(user_id), self.followers(user_id), assume_unique=True)
+
+    def two_hop(self, user_id: int, limit: int) -> list[tuple[int, int]]:
+        """Users followed by people ``user_id`` follows, as ``(user_id, via_count)``.
+
+        Ranked by how many of the caller's followees follow them; users the
+        caller already follows (and the caller) are left out.
+        """
+        following = self.following(user_id)
+        if not len(following):
+            return []
+        candidates = np.concatenate([self.following(int(friend)) for friend in following])
+        candidates = candidates[~np.isin(candidates, following) & (candidates != user_id)]
+        if not len(candidates):
+            return []
+        ids, counts = np.unique(candidates, return_counts=True)
+        order = np.lexsort((ids, -counts))[:limit]
+        return [(int(ids[i]), int(counts[i])) for i in order]
+
+
+graph = FollowGraph()
+
+
+def ensure_loaded(db: Session | None = None) -> FollowGraph:
+    """The graph, loaded first if needed (from ``db``, or a new session on the
+    primary). Loading and the NumPy queries block, so request handlers call
+    this from a worker thread, not the event loop."""
+    if not graph.loaded:
+        with graph._load_lock:
+            # threads that queued behind the first load reuse its result
+            if not graph.loaded:
+                if db is None:
+                    _reload()
+                else:
+                    graph.load(db)
+    return graph
+
+
+def follow(user_id: int, target_id: int) -> None:
+    """Record a committed follow; a no-op until the graph starts loading."""
+    if graph.tracking:
+        graph.add(user_id, target_id)
+
+
+def unfollow(user_id: int, target_id: int) -> None:
+    if graph.tracking:
+        graph.remove(user_id, target_id)
+
+
+def _reload() -> None:
+    db = SessionLocal()
+    try:
+        edges = graph.load(db)
+        logger.debug("Follow graph loaded with %s edges", edges)
+    finally:
+        db.close()
+
+
+_worker = PeriodicWorker("follow-graph", RELOAD_INTERVAL_SECONDS, _reload)
+
+
+def start() -> None:
+    if WORKER_ENABLED:
+        _worker.start()
+
+
+def stop() -> None:
+    _worker.stop()
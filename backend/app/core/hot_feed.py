@@ -0,0 +1,123 @@
+"""Background recomputation of the "hot" community feed ranking.
+
+Scores are written to ``PostHotScores`` and served with keyset pagination on
+``(score, post_id)``, so requests never aggregate reactions or comments.
+
+The score is a time-decayed engagement count::
+
+    (reactions + COMMENT_WEIGHT * comments + 1) / (age_hours + 2) ** GRAVITY
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicWorker
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+RECOMPUTE_INTERVAL_SECONDS = float(os.getenv("HOT_FEED_INTERVAL", "60"))
+WINDOW_DAYS = int(os.getenv("HOT_FEED_WINDOW_DAYS", "7"))
+GRAVITY = float(os.getenv("HOT_FEED_GRAVITY", "1.8"))
+COMMENT_WEIGHT = float(os.getenv("HOT_FEED_COMMENT_WEIGHT", "2"))
+WORKER_ENABLED = os.getenv("HOT_FEED_WORKER", "true").lower() in {"1", "true", "yes"}
+UPSERT_BATCH_SIZE = 500
+
+
+def hot_score(reactions: int, comments: int, created_at: datetime, now: datetime) -> float:
+    age_hours = max(0.0, (now - created_at).total_seconds() / 3600)
+    return (reactions + COMMENT_WEIGHT * comments + 1) / (age_hours + 2) ** GRAVITY
+
+
+def recompute(db: Session) -> int:
+    """Rescore every post inside the window; returns the number of posts scored."""
+    # PostHotScores.computed_at is DATETIME(0): MySQL rounds the fraction, so
+    # an untruncated ``now`` could store rows just below it and the cleanup
+    # below would delete the scores it has just written
+    now = datetime.utcnow().replace(microsecond=0)
+    # each count is limited to windowed posts, so a run reads the window's
+    # reactions and comments (through their post_id indexes), not all history
+    rows = db.execute(
+        text(
+            """
+            SELECT cp.post_id,
+                   cp.created_at,
+                   COALESCE(r.reaction_count, 0) AS reaction_count,
+                   COALESCE(c.comment_count, 0) AS comment_count
+            FROM CommunityPosts AS cp
+            LEFT JOIN (
+                SELECT post_id, COUNT(*) AS reaction_count
+                FROM PostReactions
+                WHERE post_id IN (SELECT post_id FROM CommunityPosts WHERE created_at >= :since)
+                GROUP BY post_id
+            ) AS r ON r.post_id = cp.post_id
+            LEFT JOIN (
+                SELECT post_id, COUNT(*) AS comment_count
+                FROM PostComments
+                WHERE post_id IN (SELECT post_id FROM CommunityPosts WHERE created_at >= :since)
+                GROUP BY post_id
+            ) AS c ON c.post_id = cp.post_id
+            WHERE cp.created_at >= :since
+            """
+        ),
+        {"since": now - timedelta(days=WINDOW_DAYS)},
+    ).mappings().all()
+
+    params = [
+        {
+            "post_id": row["post_id"],
+            "score": hot_score(row["reaction_count"], row["comment_count"], row["created_at"], now),
+            "reaction_count": row["reaction_count"],
+            "comment_count": row["comment_count"],
+            "computed_at": now,
+        }
+        for row in rows
+    ]
+
+    upsert = text(
+        """
+        INSERT INTO PostHotScores (post_id, score, reaction_count, comment_count, computed_at)
+        VALUES (:post_id, :score, :reaction_count, :comment_count, :computed_at)
+        ON DUPLICATE KEY UPDATE
+            score = VALUES(score),
+            reaction_count = VALUES(reaction_count),
+            comment_count = VALUES(comment_count),
+            computed_at = VALUES(computed_at)
+        """
+    )
+    for start in range(0, len(params), UPSERT_BATCH_SIZE):
+        db.execute(upsert, params[start : start + UPSERT_BATCH_SIZE])
+
+    # posts that aged out of the window (or were deleted) leave the ranking
+    db.execute(
+        text("DELETE FROM PostHotScores WHERE computed_at < :now"),
+        {"now": now},
+    )
+    db.commit()
+    return len(params)
+
+
+def _run() -> None:
+    db = SessionLocal()
+    try:
+        recompute(db)
+    finally:
+        db.close()
+
+
+_worker = PeriodicWorker("hot-feed", RECOMPUTE_INTERVAL_SECONDS, _run)
+
+
+def start() -> None:
+    if WORKER_ENABLED:
+        _worker.start()
+
+
+def stop() -> None:
+    _worker.stop()
@@ -0,0 +1,138 @@
+"""Background processing for community post images.
+
+Uploads only store the original object. Decoding, measuring and resizing
+happen afterwards in a process pool, which fills in ``width``/``height`` and
+writes WebP renditions next to the original.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import text
+
+from app.core import storage
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = {
+    "thumb": int(os.getenv("COMMUNITY_THUMB_WIDTH", "320")),
+    "feed": int(os.getenv("COMMUNITY_FEED_WIDTH", "1080")),
+}
+WEBP_QUALITY = int(os.getenv("COMMUNITY_WEBP_QUALITY", "80"))
+IMAGE_WORKERS = int(os.getenv("COMMUNITY_IMAGE_WORKERS", "2"))
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn keeps the workers free of locks held by the server's threads
+        _executor = ProcessPoolExecutor(
+            max_workers=max(1, IMAGE_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def render_variants(
+    data: bytes,
+    widths: dict[str, int],
+    quality: int = WEBP_QUALITY,
+) -> tuple[int, int, dict[str, bytes]]:
+    """Decode ``data`` and return ``(width, height, {label: webp_bytes})``.
+
+    Runs inside the worker processes; images are never upscaled.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        width, height = image.size
+        if image.mode not in {"RGB", "RGBA"}:
+            has_alpha = image.mode in {"LA", "PA"} or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+        variants: dict[str, bytes] = {}
+        for label, target in widths.items():
+            resized = image
+            if width > target:
+                resized = image.resize(
+                    (target, max(1, round(height * target / width))),
+                    Image.Resampling.LANCZOS,
+                )
+            buffer = io.BytesIO()
+            resized.save(buffer, "WEBP", quality=quality, method=4)
+            variants[label] = buffer.getvalue()
+
+    return width, height, variants
+
+
+def process_post_images(post_id: int) -> None:
+    """Measure and resize every unprocessed image attached to ``post_id``."""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text(
+                """
+                SELECT image_id, storage_path
+                FROM CommunityPostImages
+                WHERE post_id = :post_id AND width IS NULL
+                """
+            ),
+            {"post_id": post_id},
+        ).mappings().all()
+
+        for row in rows:
+            try:
+                _process_image(db, row["image_id"], row["storage_path"])
+            except Exception as exc:  # pragma: no cover - best effort
+                db.rollback()
+                logger.warning("Failed to process image %s: %s", row["storage_path"], exc)
+    finally:
+        db.close()
+
+
+def _process_image(db, image_id: int, object_name: str) -> None:
+    data = storage.download_object(object_name)
+    future = _get_executor().submit(render_variants, data, VARIANT_WIDTHS, WEBP_QUALITY)
+    width, height, variants = future.result()
+
+    paths: dict[str, str] = {}
+    for label, payload in variants.items():
+        paths[label] = storage.variant_object_name(object_name, label)
+        storage.upload_object(paths[label], payload, "image/webp")
+
+    db.execute(
+        text(
+            """
+            UPDATE CommunityPostImages
+            SET width = :width,
+                height = :height,
+                thumbnail_path = :thumbnail_path,
+                feed_path = :feed_path
+            WHERE image_id = :image_id
+            """
+        ),
+        {
+            "image_id": image_id,
+            "width": width,
+            "height": height,
+            "thumbnail_path": paths.get("thumb"),
+            "feed_path": paths.get("feed"),
+        },
+    )
+    db.commit()
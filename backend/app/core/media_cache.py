@@ -0,0 +1,137 @@
+"""Size-bounded LRU disk cache for objects served by the media proxy."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+CACHE_ROOT = os.getenv("MEDIA_CACHE_DIR", "var/media-cache")
+CACHE_MAX_MB = int(os.getenv("MEDIA_CACHE_MAX_MB", "1024"))
+CACHE_MAX_ENTRY_MB = int(os.getenv("MEDIA_CACHE_MAX_ENTRY_MB", "16"))
+
+
+class DiskLRUCache:
+    """Objects cached as files, evicted least-recently-used once over ``max_bytes``.
+
+    The in-memory index is rebuilt from the directory on start-up, ordered by
+    access time, so the cache survives restarts.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int, max_entry_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def _key(self, object_name: str) -> str:
+        return hashlib.sha256(object_name.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def _load(self) -> None:
+        entries = []
+        for path in self.root.glob("*/*"):
+            if path.name.startswith(".tmp-"):
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            entries.append((stat.st_atime, path.name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._size += size
+        self._evict()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, object_name: str) -> Path | None:
+        key = self._key(object_name)
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        path = self._path(key)
+        if not path.is_file():
+            self._forget(key)
+            return None
+        return path
+
+    def put(self, object_name: str, chunks: Iterable[bytes]) -> Path | None:
+        """Write ``chunks`` into the cache and return the cached file.
+
+        Returns ``None`` (and caches nothing) when the object is larger than
+        the per-entry limit; the caller must then stream it directly.
+        """
+        key = self._key(object_name)
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_entry_bytes:
+                        raise _TooLarge
+                    handle.write(chunk)
+            os.replace(tmp_name, target)
+        except _TooLarge:
+            Path(tmp_name).unlink(missing_ok=True)
+            return None
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            self._size += size - self._index.pop(key, 0)
+            self._index[key] = size
+        self._evict()
+        return target
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._size -= self._index.pop(key, 0)
+
+    def _evict(self) -> None:
+        while True:
+            with self._lock:
+                if self._size <= self.max_bytes or not self._index:
+                    return
+                key, size = self._index.popitem(last=False)
+                self._size -= size
+            try:
+                self._path(key).unlink(missing_ok=True)
+            except OSError as exc:  # pragma: no cover - best effort
+                logger.warning("Failed to evict cached media %s: %s", key, exc)
+
+
+class _TooLarge(Exception):
+    pass
+
+
+_cache: DiskLRUCache | None = None
+
+
+def get_cache() -> DiskLRUCache:
+    global _cache
+    if _cache is None:
+        _cache = DiskLRUCache(
+            CACHE_ROOT,
+            max_bytes=CACHE_MAX_MB * 1024 * 1024,
+            max_entry_bytes=CACHE_MAX_ENTRY_MB * 1024 * 1024,
+        )
+    return _cache
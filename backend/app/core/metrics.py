@@ -0,0 +1,113 @@
+"""Process-local counters, gauges and latency histograms.
+
+Instruments are created on first use by name and are cheap enough for hot
+paths (one lock per update). ``snapshot()`` returns everything as plain
+JSON-friendly data and is served at ``GET /api/health/metrics``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Any, Callable
+
+# seconds; the last bucket catches everything slower
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> int:
+        return self.value
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "max": round(self.max, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+_lock = threading.Lock()
+_counters: dict[str, Counter] = {}
+_histograms: dict[str, Histogram] = {}
+_gauges: dict[str, Callable[[], Any]] = {}
+
+
+def counter(name: str) -> Counter:
+    with _lock:
+        return _counters.setdefault(name, Counter())
+
+
+def histogram(name: str, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+    with _lock:
+        if name not in _histograms:
+            _histograms[name] = Histogram(buckets)
+        return _histograms[name]
+
+
+def gauge(name: str, read: Callable[[], Any]) -> None:
+    """Register a callback sampled whenever a snapshot is taken."""
+    with _lock:
+        _gauges[name] = read
+
+
+def snapshot() -> dict[str, Any]:
+    with _lock:
+        counters = dict(_counters)
+        histograms = dict(_histograms)
+        gauges = dict(_gauges)
+    values: dict[str, Any] = {}
+    for name, read in gauges.items():
+        try:
+            values[name] = read()
+        except Exception as exc:  # pragma: no cover - a broken gauge must not hide the rest
+            values[name] = f"error: {exc}"
+    return {
+        "counters": {name: item.snapshot() for name, item in sorted(counters.items())},
+        "gauges": dict(sorted(values.items())),
+        "histograms": {name: item.snapshot() for name, item in sorted(histograms.items())},
+    }
@@ -0,0 +1,210 @@
+"""Versioned schema migrations from ``backend/migrations/NNN_name.sql``.
+
+Applied versions are recorded in ``SchemaMigrations`` together with a
+checksum of the file. Run from ``backend/``::
+
+    python -m app.core.migrations              # apply everything pending
+    python -m app.core.migrations --status     # list applied and pending files
+    python -m app.core.migrations --baseline 8 # record 001-008 as applied without running them
+
+Use ``--baseline`` once on a database whose earlier files were applied by
+hand. Each file runs statement by statement. MySQL commits DDL implicitly,
+so a file that fails halfway is not recorded: fix the cause, undo or finish
+the applied part, and run again. On MySQL a named lock keeps two deploys
+from migrating at the same time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+LOCK_NAME = "wahoowell.schema_migrations"
+LOCK_TIMEOUT_SECONDS = 60
+
+_FILE_NAME = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+_CREATE_TABLE = text(
+    """
+    CREATE TABLE IF NOT EXISTS SchemaMigrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        applied_at DATETIME NOT NULL
+    )
+    """
+)
+_APPLIED = text("SELECT version, checksum FROM SchemaMigrations")
+_RECORD = text(
+    """
+    INSERT INTO SchemaMigrations (version, name, checksum, applied_at)
+    VALUES (:version, :name, :checksum, :applied_at)
+    """
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.path.read_bytes()).hexdigest()
+
+    def statements(self) -> list[str]:
+        return split_statements(self.sql)
+
+
+def split_statements(sql: str) -> list[str]:
+    """Statements of a migration file: ``--`` comment lines dropped, split on
+    a ``;`` that ends a line. Files must not put ``;`` at a line end inside
+    string literals."""
+    lines = [line for line in sql.splitlines() if not line.lstrip().startswith("--")]
+    parts = re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE)
+    return [part.strip() for part in parts if part.strip()]
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    migrations: dict[int, Migration] = {}
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILE_NAME.match(path.name)
+        if not match:
+            raise ValueError(f"Migration file {path.name!r} does not match NNN_name.sql")
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Two migration files share version {version}")
+        migrations[version] = Migration(version, match.group(2), path)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def applied(conn: Connection) -> dict[int, str]:
+    conn.execute(_CREATE_TABLE)
+    return {row.version: row.checksum for row in conn.execute(_APPLIED)}
+
+
+def pending(conn: Connection, directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    done = applied(conn)
+    todo = []
+    for migration in discover(directory):
+        if migration.version not in done:
+            todo.append(migration)
+        elif done[migration.version] != migration.checksum:
+            logger.warning(
+                "Migration %03d_%s changed after it was applied; edits to applied files are not re-run",
+                migration.version,
+                migration.name,
+            )
+    return todo
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(
+        _RECORD,
+        {
+            "version": migration.version,
+            "name": migration.name,
+            "checksum": migration.checksum,
+            "applied_at": datetime.utcnow(),
+        },
+    )
+
+
+@contextmanager
+def _locked(engine: Engine) -> Iterator[Connection]:
+    """Connection holding the migration lock (MySQL ``GET_LOCK``; a plain connection elsewhere)."""
+    with engine.connect() as conn:
+        if engine.dialect.name != "mysql":
+            yield conn
+            return
+        got = conn.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"),
+            {"name": LOCK_NAME, "timeout": LOCK_TIMEOUT_SECONDS},
+        ).scalar()
+        conn.commit()
+        if got != 1:
+            raise RuntimeError("Another process is running migrations")
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+            conn.commit()
+
+
+def migrate(engine: Engine, directory: Path = MIGRATIONS_DIR, *, target: int | None = None) -> list[Migration]:
+    """Apply pending migrations up to ``target`` (all by default); returns those applied."""
+    done: list[Migration] = []
+    with _locked(engine) as conn:
+        with conn.begin():
+            todo = pending(conn, directory)
+        for migration in todo:
+            if target is not None and migration.version > target:
+                break
+            logger.info("Applying migration %03d_%s", migration.version, migration.name)
+            with conn.begin():
+                for statement in migration.statements():
+                    conn.exec_driver_sql(statement)
+                _record(conn, migration)
+            done.append(migration)
+    return done
+
+
+def baseline(engine: Engine, version: int, directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """Record migrations up to ``version`` as applied without running them."""
+    marked: list[Migration] = []
+    with _locked(engine) as conn:
+        with conn.begin():
+            for migration in pending(conn, directory):
+                if migration.version > version:
+                    break
+                _record(conn, migration)
+                marked.append(migration)
+    return marked
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    group.add_argument("--baseline", type=int, metavar="VERSION", help="mark migrations up to VERSION as applied")
+    group.add_argument("--target", type=int, metavar="VERSION", help="apply pending migrations up to VERSION")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from app.database import engine
+
+    if args.status:
+        with engine.begin() as conn:
+            done = applied(conn)
+        for migration in discover():
+            state = "applied" if migration.version in done else "pending"
+            print(f"{migration.version:03d}_{migration.name}: {state}")
+    elif args.baseline is not None:
+        for migration in baseline(engine, args.baseline):
+            print(f"marked {migration.version:03d}_{migration.name} as applied")
+    else:
+        applied_now = migrate(engine, target=args.target)
+        print(f"applied {len(applied_now)} migration(s)")
+
+
+if __name__ == "__main__":
+    main()
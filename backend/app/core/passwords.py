@@ -0,0 +1,125 @@
+"""Password hashing off the request threadpool.
+
+bcrypt is deliberately slow (hundreds of milliseconds of CPU at cost 12), so
+hashing and checking run in a small dedicated process pool. Admission is
+bounded: at most ``PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE`` calls
+may be in flight, and anything beyond that is rejected immediately with
+:class:`HasherBusy` instead of queueing behind a login storm.
+
+``BCRYPT_ROUNDS`` sets the cost for new hashes. A successful check of a
+hash made with a different cost also returns a fresh hash so callers can
+store it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt  # type: ignore
+
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, HASH_WORKERS) + max(0, MAX_QUEUE))
+_in_flight = 0
+
+_latency = metrics.histogram("password_hash.seconds")
+_rejected = metrics.counter("password_hash.rejected")
+_rehashed = metrics.counter("password_hash.rehashed")
+metrics.gauge("password_hash.in_flight", lambda: _in_flight)
+metrics.gauge("password_hash.queue_depth", lambda: max(0, _in_flight - HASH_WORKERS))
+
+
+class HasherBusy(RuntimeError):
+    """All workers are busy and the wait queue is full."""
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn keeps the workers free of locks held by the server's threads
+            _executor = ProcessPoolExecutor(
+                max_workers=max(1, HASH_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def rounds_of(hashed: str) -> int | None:
+    """Cost factor of a ``$2b$12$...`` hash."""
+    parts = hashed.split("$")
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+# -- run inside the worker processes ------------------------------------------
+
+
+def _hash(password: bytes, rounds: int) -> str:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _verify(password: bytes, hashed: str, rounds: int) -> tuple[bool, str | None]:
+    if not bcrypt.checkpw(password, hashed.encode("utf-8")):
+        return False, None
+    if rounds_of(hashed) != rounds:
+        return True, _hash(password, rounds)
+    return True, None
+
+
+# -----------------------------------------------------------------------------
+
+
+async def _run(function, *args):
+    global _in_flight
+    if not _slots.acquire(blocking=False):
+        _rejected.inc()
+        raise HasherBusy("Password hashing is at capacity")
+    _in_flight += 1
+    started = time.perf_counter()
+    try:
+        return await asyncio.wrap_future(_get_executor().submit(function, *args))
+    finally:
+        _latency.observe(time.perf_counter() - started)
+        _in_flight -= 1
+        _slots.release()
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password.encode("utf-8"), BCRYPT_ROUNDS)
+
+
+async def verify_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    """Check ``password``; returns ``(ok, new_hash)`` where ``new_hash`` is set
+    when the stored hash should be replaced because the cost changed."""
+    try:
+        ok, new_hash = await _run(_verify, password.encode("utf-8"), hashed, BCRYPT_ROUNDS)
+    except ValueError:  # not a bcrypt hash
+        return False, None
+    if new_hash is not None:
+        _rehashed.inc()
+    return ok, new_hash
@@ -0,0 +1,102 @@
+"""Optional write-behind buffer for reaction toggles.
+
+With ``REACTION_BUFFER_ENABLED=true`` reaction writes only record the
+viewer's latest state in memory. Repeated toggles on the same
+``(post_id, user_id)`` collapse to the final state, and a background worker
+flushes everything pending at most every ``REACTION_BUFFER_FLUSH_MS`` using
+set-based statements. Pending writes are lost if the process dies before
+the next flush.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.core.background import PeriodicWorker
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("REACTION_BUFFER_ENABLED", "false").lower() in {"1", "true", "yes"}
+FLUSH_INTERVAL_SECONDS = int(os.getenv("REACTION_BUFFER_FLUSH_MS", "250")) / 1000
+MAX_PENDING = int(os.getenv("REACTION_BUFFER_MAX_PENDING", "5000"))
+
+ReactionKey = tuple[int, int]
+
+
+@dataclass(frozen=True)
+class PendingReaction:
+    reaction_type: str | None  # None means "remove"
+    created_at: datetime
+
+
+class ReactionBuffer:
+    def __init__(self) -> None:
+        self._pending: dict[ReactionKey, PendingReaction] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def set(self, post_id: int, user_id: int, reaction_type: str | None) -> None:
+        """Record the viewer's latest reaction; ``None`` removes it."""
+        with self._lock:
+            self._pending[(post_id, user_id)] = PendingReaction(reaction_type, datetime.utcnow())
+            size = len(self._pending)
+        if size >= MAX_PENDING:
+            _worker.wake()
+
+    def get(self, post_id: int, user_id: int) -> PendingReaction | None:
+        """The unflushed state for this viewer, if any."""
+        with self._lock:
+            return self._pending.get((post_id, user_id))
+
+    def discard_posts(self, post_ids: set[int]) -> None:
+        """Forget pending toggles on posts that were deleted."""
+        with self._lock:
+            for key in [key for key in self._pending if key[0] in post_ids]:
+                del self._pending[key]
+
+    def take(self) -> dict[ReactionKey, PendingReaction]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending: dict[ReactionKey, PendingReaction]) -> None:
+        """Put back a batch that failed to flush, keeping any newer writes."""
+        with self._lock:
+            for key, value in pending.items():
+                self._pending.setdefault(key, value)
+
+
+buffer = ReactionBuffer()
+
+
+def _flush() -> None:
+    from app import crud
+    from app.database import SessionLocal
+
+    if not len(buffer):
+        return
+    db = SessionLocal()
+    try:
+        crud.flush_reaction_buffer(db, buffer)
+    finally:
+        db.close()
+
+
+_worker = PeriodicWorker("reaction-buffer", FLUSH_INTERVAL_SECONDS, _flush)
+
+
+def start() -> None:
+    if ENABLED:
+        _worker.start()
+
+
+def stop() -> None:
+    _worker.stop()
+    if ENABLED:
+        _flush()
@@ -0,0 +1,247 @@
+"""Routing of read-only requests to MySQL read replicas.
+
+``READ_REPLICA_URLS`` lists replica URLs, separated by commas. Routes that only
+read take their session from ``get_read_db``, which sends each request to the
+next healthy replica in round-robin order. A background task runs
+``SELECT 1`` against every replica every ``REPLICA_HEALTH_INTERVAL_SECONDS``.
+Replicas that fail the check, or fail a request with a connection error, are
+skipped until a later check passes. Without healthy replicas, reads go to
+the primary.
+
+Read-after-write: after any successful write, the response carries a
+``read_primary_until`` cookie and an ``X-Read-Primary-Until`` header holding
+a Unix time ``READ_AFTER_WRITE_SECONDS`` ahead. Reads that send either back
+go to the primary until then, on every worker and whatever the route is
+keyed by, so clients see their own changes despite replication lag. The
+writer's user ids are also pinned in this process, for clients that send
+neither.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Iterable, Mapping
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core import auth, metrics
+
+logger = logging.getLogger(__name__)
+
+PIN_SECONDS = float(os.getenv("READ_AFTER_WRITE_SECONDS", "5"))
+HEALTH_INTERVAL_SECONDS = float(os.getenv("REPLICA_HEALTH_INTERVAL_SECONDS", "10"))
+HEALTH_TIMEOUT_SECONDS = float(os.getenv("REPLICA_HEALTH_TIMEOUT_SECONDS", "2"))
+MAX_PINS = 100_000
+PRIMARY_COOKIE = "read_primary_until"
+PRIMARY_HEADER = "X-Read-Primary-Until"
+# marks further ahead than this process would issue (plus clock skew) are ignored
+CLOCK_SKEW_SECONDS = 1.0
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        engines: Mapping[str, AsyncEngine],
+        *,
+        pin_seconds: float = PIN_SECONDS,
+        name: str = "read_replicas",
+    ) -> None:
+        self.engines = dict(engines)
+        self.pin_seconds = pin_seconds
+        self._sessions = {
+            replica: async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+            for replica, engine in self.engines.items()
+        }
+        self._healthy = set(self.engines)
+        self._turn = itertools.count()
+        # user_id -> monotonic deadline of the primary-only window
+        self._pins: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+        self.primary_reads = metrics.counter(f"{name}.primary_reads")
+        self.pinned_reads = metrics.counter(f"{name}.pinned_reads")
+        self.replica_reads = metrics.counter(f"{name}.replica_reads")
+        self.failures = metrics.counter(f"{name}.failures")
+        metrics.gauge(f"{name}.healthy", lambda: sorted(self._healthy))
+
+    @property
+    def healthy(self) -> list[str]:
+        return [replica for replica in self.engines if replica in self._healthy]
+
+    # -- read-after-write --------------------------------------------------
+
+    def pin(self, *user_ids: int) -> None:
+        """Keep reads for ``user_ids`` on the primary for the next ``pin_seconds``."""
+        if not self.engines or self.pin_seconds <= 0:
+            return
+        now = time.monotonic()
+        deadline = now + self.pin_seconds
+        with self._lock:
+            for user_id in user_ids:
+                self._pins[user_id] = deadline
+            if len(self._pins) > MAX_PINS:
+                self._pins = {user_id: until for user_id, until in self._pins.items() if until > now}
+
+    def pinned(self, user_ids: Iterable[int]) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            return any(self._pins.get(user_id, 0.0) > now for user_id in user_ids)
+
+    def client_pinned(self, primary_until: float | None) -> bool:
+        """Whether a client's read-primary-until mark is still running."""
+        if primary_until is None:
+            return False
+        now = time.time()
+        return now < primary_until <= now + self.pin_seconds + CLOCK_SKEW_SECONDS
+
+    def mark_client(self, request, response) -> None:
+        """Send the client its read-primary-until mark, as a cookie and a header."""
+        if not self.engines or self.pin_seconds <= 0:
+            return
+        until = f"{time.time() + self.pin_seconds:.3f}"
+        # the frontend calls the API cross-site, which needs SameSite=None (HTTPS only)
+        secure = request.url.scheme == "https"
+        response.set_cookie(
+            PRIMARY_COOKIE,
+            until,
+            max_age=math.ceil(self.pin_seconds),
+            httponly=True,
+            secure=secure,
+            samesite="none" if secure else "lax",
+        )
+        response.headers[PRIMARY_HEADER] = until
+
+    # -- routing -------------------------------------------------------------
+
+    def pick(self, user_ids: Iterable[int] = (), *, primary_until: float | None = None) -> str | None:
+        """Replica for the next read, or ``None`` for the primary."""
+        if not self.engines:
+            self.primary_reads.inc()
+            return None
+        if self.pinned(user_ids) or self.client_pinned(primary_until):
+            self.pinned_reads.inc()
+            return None
+        healthy = self.healthy
+        if not healthy:
+            self.primary_reads.inc()
+            return None
+        self.replica_reads.inc()
+        return healthy[next(self._turn) % len(healthy)]
+
+    def session(self, replica: str) -> AsyncSession:
+        return self._sessions[replica]()
+
+    def mark_down(self, replica: str) -> None:
+        if replica in self._healthy:
+            logger.warning("Read replica %s marked unhealthy", replica)
+            self.failures.inc()
+        self._healthy.discard(replica)
+
+    def mark_up(self, replica: str) -> None:
+        if replica not in self._healthy:
+            logger.info("Read replica %s is healthy again", replica)
+        self._healthy.add(replica)
+
+    # -- health checks -----------------------------------------------------
+
+    async def check(self) -> dict[str, bool]:
+        """Ping every replica once and update the healthy set."""
+        results = await asyncio.gather(*(self._ping(replica) for replica in self.engines))
+        status = dict(zip(self.engines, results))
+        for replica, ok in status.items():
+            (self.mark_up if ok else self.mark_down)(replica)
+        return status
+
+    async def _ping(self, replica: str) -> bool:
+        async def select_one() -> None:
+            async with self.engines[replica].connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        try:
+            await asyncio.wait_for(select_one(), HEALTH_TIMEOUT_SECONDS)
+            return True
+        except Exception as exc:
+            logger.debug("Health check of %s failed: %s", replica, exc)
+            return False
+
+    async def _check_forever(self) -> None:
+        while True:
+            await asyncio.sleep(HEALTH_INTERVAL_SECONDS)
+            try:
+                await self.check()
+            except Exception:  # pragma: no cover - keep the loop alive
+                logger.exception("Replica health check failed")
+
+    def start(self) -> None:
+        """Start the health checks on the running event loop (no-op without replicas)."""
+        if self.engines and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._check_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for engine in self.engines.values():
+            await engine.dispose()
+
+
+def request_user_ids(request, payload: object = None, token_user_id: int | None = None) -> set[int]:
+    """Users a request is by or about: the token's user, plus any ``user_id``
+    in the path, the query string or a JSON object ``payload``."""
+    candidates = [
+        token_user_id,
+        request.path_params.get("user_id"),
+        request.query_params.get("user_id"),
+        payload.get("user_id") if isinstance(payload, dict) else None,
+    ]
+    user_ids: set[int] = set()
+    for candidate in candidates:
+        try:
+            user_ids.add(int(candidate))
+        except (TypeError, ValueError):
+            continue
+    return user_ids
+
+
+def primary_until(request) -> float | None:
+    """The read-primary-until mark the client sent back, if any."""
+    raw = request.cookies.get(PRIMARY_COOKIE) or request.headers.get(PRIMARY_HEADER)
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+async def pin_writes(request, call_next, replica_set: ReplicaSet):
+    """Middleware body: after a successful write, pin its users in this process
+    and hand the client its read-primary-until mark."""
+    if request.method not in WRITE_METHODS or not replica_set.engines:
+        return await call_next(request)
+
+    payload = None
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            payload = json.loads(await request.body() or b"null")
+        except ValueError:
+            pass
+    response = await call_next(request)
+    if response.status_code < 400:
+        token_user_id = None
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                token_user_id = auth.verify_token(token).user_id
+            except auth.InvalidToken:
+                pass
+        replica_set.pin(*request_user_ids(request, payload, token_user_id))
+        replica_set.mark_client(request, response)
+    return response
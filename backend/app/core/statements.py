@@ -0,0 +1,74 @@
+"""Catalog of named SQL statements with per-statement timing.
+
+Modules declare their SQL once at import time::
+
+    _POST_BY_ID = statements.define("posts.by_id", "SELECT ... WHERE post_id = :post_id")
+
+and pass the returned clause to ``db.execute`` on every call. Each clause
+carries its name as the ``statement_name`` execution option. After
+:func:`instrument` attaches cursor events to an engine, every execution is
+recorded in ``sql.<name>.seconds`` and ``sql.<name>.rows``, which appear in
+``GET /api/health/metrics``. SQL run without a catalog name is recorded
+under ``sql.uncatalogued``.
+
+:data:`CATALOG` maps every name to its clause, for tooling such as the
+EXPLAIN checks in the tests.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Iterable
+
+from sqlalchemy import bindparam, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import TextClause
+
+from app.core import metrics
+
+UNNAMED = "uncatalogued"
+ROW_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000)
+
+CATALOG: dict[str, TextClause] = {}
+
+
+def define(name: str, sql: str, *, expanding: Iterable[str] = ()) -> TextClause:
+    """Register ``sql`` under ``name``. ``expanding`` lists the parameters
+    that take a list, e.g. for ``IN :ids``."""
+    if name in CATALOG:
+        # a module imported twice (e.g. as ``app.crud`` and ``backend.app.crud``)
+        # redefines the same SQL; a different statement under the name is a bug
+        if CATALOG[name].text != sql:
+            raise ValueError(f"SQL statement {name!r} is already defined")
+        return CATALOG[name]
+    clause = text(sql)
+    params = [bindparam(param, expanding=True) for param in expanding]
+    if params:
+        clause = clause.bindparams(*params)
+    clause = clause.execution_options(statement_name=name)
+    CATALOG[name] = clause
+    return clause
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._statement_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_statement_started", None)
+    if started is None:
+        return
+    name = context.execution_options.get("statement_name", UNNAMED)
+    metrics.histogram(f"sql.{name}.seconds").observe(time.perf_counter() - started)
+    # DBAPI rowcount: rows changed, or rows returned by the buffered MySQL
+    # cursors; -1 where the driver cannot tell
+    if cursor.rowcount is not None and cursor.rowcount >= 0:
+        metrics.histogram(f"sql.{name}.rows", ROW_BUCKETS).observe(cursor.rowcount)
+
+
+def instrument(engine: Engine) -> None:
+    """Time every statement on ``engine`` (a sync engine, or ``async_engine.sync_engine``)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
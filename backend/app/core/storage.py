@@ -1,19 +1,23 @@
-"""Google Cloud Storage helpers for community uploads."""
+"""Object storage helpers for community uploads.
+
+The actual store is chosen by ``STORAGE_BACKEND``; see
+:mod:`app.core.storage_backends`.
+"""
 
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
-from typing import Iterable, Sequence
-from uuid import uuid4
+from typing import Awaitable, Callable, Iterable, Iterator, Sequence
+from urllib.parse import quote
 
 from fastapi import HTTPException, UploadFile
-from google.api_core import exceptions
-from google.cloud import storage
 
 from app import schemas
+from app.core.storage_backends import StorageBackend, get_backend
 
 logger = logging.getLogger(__name__)
 
@@ -28,91 +32,99 @@ ALLOWED_CONTENT_TYPES = {
 
 ALLOWED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".avif", ".gif"}
 
+CONTENT_TYPE_EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/webp": ".webp",
+    "image/avif": ".avif",
+    "image/gif": ".gif",
+}
+
 MAX_IMAGES_PER_POST = int(os.getenv("COMMUNITY_IMAGES_MAX", "4"))
 MAX_IMAGE_SIZE_MB = int(os.getenv("COMMUNITY_IMAGE_MAX_MB", "5"))
 MAX_IMAGE_SIZE_BYTES = MAX_IMAGE_SIZE_MB * 1024 * 1024
-AUTO_MAKE_PUBLIC = os.getenv("GCS_AUTO_MAKE_PUBLIC", "true").lower() in {"1", "true", "yes"}
+UPLOAD_CHUNK_SIZE = 256 * 1024
+HEX_DIGITS = frozenset("0123456789abcdef")
 
-SIGNED_URL_MODE = os.getenv("GCS_SIGNED_URL_MODE", "auto").strip().lower()
 SIGNED_URL_TTL_SECONDS = int(os.getenv("GCS_SIGNED_URL_TTL", "86400"))
 
-_cached_client: storage.Client | None = None
-_public_acl_failed = False
+MEDIA_PROXY_ENABLED = os.getenv("MEDIA_PROXY_ENABLED", "false").lower() in {"1", "true", "yes"}
+MEDIA_PROXY_BASE_URL = os.getenv("MEDIA_PROXY_BASE_URL", "http://localhost:8000").rstrip("/")
 
 
-def _get_bucket_name() -> str:
-    bucket_name = os.getenv("GCS_BUCKET_NAME")
-    if not bucket_name:
-        raise HTTPException(
-            status_code=500,
-            detail="GCS_BUCKET_NAME is not configured on the server.",
-        )
-    return bucket_name
-
+def backend() -> StorageBackend:
+    return get_backend()
 
-def _get_client() -> storage.Client:
-    global _cached_client
-    if _cached_client is None:
-        _cached_client = storage.Client()
-    return _cached_client
 
+def media_route_enabled() -> bool:
+    """Whether this process serves ``GET /media/...`` itself."""
+    return MEDIA_PROXY_ENABLED or os.getenv("STORAGE_BACKEND", "gcs").strip().lower() == "local"
 
-def _get_bucket() -> storage.bucket.Bucket:
-    client = _get_client()
-    return client.bucket(_get_bucket_name())
 
+def image_folder() -> str:
+    return os.getenv("GCS_IMAGE_FOLDER", "community-images").strip("/")
 
-def _build_object_name(filename: str | None) -> str:
-    folder = os.getenv("GCS_IMAGE_FOLDER", "community-images").strip("/")
-    stamp = datetime.utcnow().strftime("%Y/%m")
-    ext = (Path(filename or "").suffix or "").lower()
-    if ext not in ALLOWED_EXTENSIONS:
-        ext = ".jpg"
-    return f"{folder}/posts/{stamp}/{uuid4().hex}{ext}"
 
+def _build_object_name(content_hash: str, content_type: str) -> str:
+    """Content-addressed key: identical bytes always map to the same object."""
+    ext = CONTENT_TYPE_EXTENSIONS.get(content_type, ".jpg")
+    return f"{image_folder()}/sha256/{content_hash[:2]}/{content_hash}{ext}"
 
-def _build_public_url(object_name: str) -> str:
-    override = os.getenv("GCS_PUBLIC_BASE_URL")
-    if override:
-        return f"{override.rstrip('/')}/{object_name}"
-    bucket = _get_bucket_name()
-    return f"https://storage.googleapis.com/{bucket}/{object_name}"
 
-
-def _should_use_signed_urls() -> bool:
-    if SIGNED_URL_MODE in {"always", "true", "1"}:
-        return True
-    if SIGNED_URL_MODE in {"never", "false", "0"}:
-        return False
-    return (not AUTO_MAKE_PUBLIC) or _public_acl_failed
-
-
-def _generate_signed_url(object_name: str) -> str:
-    expiration = timedelta(seconds=max(60, SIGNED_URL_TTL_SECONDS))
-    blob = _get_bucket().blob(object_name)
-    return blob.generate_signed_url(
-        version="v4",
-        method="GET",
-        expiration=expiration,
-        response_disposition="inline",
-    )
+def content_hash_of(object_name: str) -> str | None:
+    """Return the SHA-256 embedded in a content-addressed object name, if any."""
+    digest = Path(object_name).name[:64]
+    if "/sha256/" in object_name and len(digest) == 64 and all(c in HEX_DIGITS for c in digest):
+        return digest
+    return None
 
 
 def get_media_url(object_name: str, *, fallback_url: str | None = None) -> str:
     if not object_name:
         return fallback_url or ""
 
-    if _should_use_signed_urls():
+    if MEDIA_PROXY_ENABLED:
+        # stable URLs that browsers and CDNs can cache, unlike signed ones
+        return f"{MEDIA_PROXY_BASE_URL}/media/{quote(object_name)}"
+
+    store = backend()
+    if store.should_sign():
         try:
-            return _generate_signed_url(object_name)
+            return store.sign(object_name, max(60, SIGNED_URL_TTL_SECONDS))
         except Exception as exc:  # pragma: no cover - network
             logger.warning("Failed to generate signed URL for %s: %s", object_name, exc)
 
-    return fallback_url or _build_public_url(object_name)
+    return fallback_url or store.url(object_name)
+
 
+async def _hash_upload(upload: UploadFile) -> tuple[str, int]:
+    """SHA-256 an upload chunk by chunk, enforcing the size limit as it streams."""
+    digest = hashlib.sha256()
+    size = 0
+    await upload.seek(0)
+    while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > MAX_IMAGE_SIZE_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Each image must be under {MAX_IMAGE_SIZE_MB}MB.",
+            )
+        digest.update(chunk)
+    return digest.hexdigest(), size
+
+
+async def upload_post_images(
+    files: Sequence[UploadFile],
+    *,
+    find_existing: Callable[[list[str]], Awaitable[dict[str, schemas.CommunityPostImageCreate]]] | None = None,
+) -> list[schemas.CommunityPostImageCreate]:
+    """Store uploads under content-addressed keys.
 
-async def upload_post_images(files: Sequence[UploadFile]) -> list[schemas.CommunityPostImageCreate]:
-    global _public_acl_failed
+    ``find_existing`` maps content hashes to images that are already stored;
+    those uploads are skipped entirely and reuse the stored object, its
+    dimensions and renditions.
+    """
     usable = [file for file in files if file and file.filename]
     if not usable:
         return []
@@ -123,20 +135,8 @@ async def upload_post_images(files: Sequence[UploadFile]) -> list[schemas.Commun
             detail=f"You can upload up to {MAX_IMAGES_PER_POST} images per post.",
         )
 
-    bucket = _get_bucket()
-    uploads: list[schemas.CommunityPostImageCreate] = []
-
+    hashed: list[tuple[UploadFile, str, str, int]] = []
     for upload in usable:
-        contents = await upload.read()
-        if not contents:
-            continue
-
-        if len(contents) > MAX_IMAGE_SIZE_BYTES:
-            raise HTTPException(
-                status_code=413,
-                detail=f"Each image must be under {MAX_IMAGE_SIZE_MB}MB.",
-            )
-
         content_type = upload.content_type or "image/jpeg"
         if content_type not in ALLOWED_CONTENT_TYPES:
             raise HTTPException(
@@ -144,51 +144,63 @@ async def upload_post_images(files: Sequence[UploadFile]) -> list[schemas.Commun
                 detail="Only PNG, JPG, WEBP, AVIF, or GIF images are supported.",
             )
 
-        object_name = _build_object_name(upload.filename)
-        blob = bucket.blob(object_name)
-        blob.cache_control = "public, max-age=31536000, immutable"
-        blob.upload_from_string(contents, content_type=content_type)
-
-        if AUTO_MAKE_PUBLIC and not _should_use_signed_urls():
-            global _public_acl_failed
-            try:
-                blob.make_public()
-            except exceptions.GoogleAPIError as exc:
-                _public_acl_failed = True
-                logger.info(
-                    "Unable to update ACL for %s. Falling back to signed URLs for new images. Error: %s",
-                    blob.name,
-                    exc,
-                )
-
-        public_url = get_media_url(object_name)
-
-        uploads.append(
-            schemas.CommunityPostImageCreate(
-                file_name=upload.filename or Path(object_name).name,
+        content_hash, size = await _hash_upload(upload)
+        if not size:
+            continue
+        hashed.append((upload, content_type, content_hash, size))
+
+    existing = await find_existing([item[2] for item in hashed]) if find_existing and hashed else {}
+    store = backend()
+    uploads: list[schemas.CommunityPostImageCreate] = []
+
+    for upload, content_type, content_hash, size in hashed:
+        file_name = upload.filename or f"{content_hash}{CONTENT_TYPE_EXTENSIONS[content_type]}"
+        stored = existing.get(content_hash)
+        if stored is None:
+            object_name = _build_object_name(content_hash, content_type)
+            await upload.seek(0)
+            store.put(object_name, upload.file, content_type)
+            stored = schemas.CommunityPostImageCreate(
+                file_name=file_name,
                 storage_path=object_name,
-                public_url=public_url,
+                public_url=get_media_url(object_name),
                 content_type=content_type,
-                size_bytes=len(contents),
+                size_bytes=size,
+                content_hash=content_hash,
             )
-        )
+            # a second copy of the same image in this request reuses the object
+            existing[content_hash] = stored
+
+        uploads.append(stored.model_copy(update={"file_name": file_name}))
 
     return uploads
 
 
-def delete_post_images(paths: Iterable[str]) -> None:
-    bucket = None
-    for path in paths:
-        if not path:
-            continue
-        if bucket is None:
-            try:
-                bucket = _get_bucket()
-            except HTTPException as exc:  # pragma: no cover - configuration error
-                logger.warning("Skipping image deletion: %s", exc.detail)
-                return
-        blob = bucket.blob(path)
-        try:
-            blob.delete()
-        except Exception as exc:  # pragma: no cover - deletion best-effort
-            logger.warning("Failed to delete blob %s: %s", path, exc)
+def variant_object_name(object_name: str, label: str) -> str:
+    """Return the object name for a derived WebP rendition of ``object_name``."""
+    stem = object_name.rsplit(".", 1)[0] if "." in Path(object_name).name else object_name
+    return f"{stem}_{label}.webp"
+
+
+def download_object(object_name: str) -> bytes:
+    return backend().read(object_name)
+
+
+def upload_object(object_name: str, data: bytes, content_type: str) -> None:
+    backend().put(object_name, data, content_type)
+
+
+def list_objects(prefix: str) -> Iterator[tuple[str, datetime | None]]:
+    """Yield ``(object_name, updated_at)`` for every object under ``prefix``."""
+    return backend().list(prefix)
+
+
+def delete_post_images(paths: Iterable[str]) -> dict[str, str]:
+    """Delete objects, returning ``{path: error}`` for the ones that failed.
+
+    Objects that are already gone count as deleted.
+    """
+    pending = [path for path in dict.fromkeys(paths) if path]
+    if not pending:
+        return {}
+    return backend().delete(pending)
@@ -0,0 +1,340 @@
+"""Object storage backends used by :mod:`app.core.storage`.
+
+``STORAGE_BACKEND`` selects the implementation:
+
+- ``gcs`` (default): Google Cloud Storage bucket ``GCS_BUCKET_NAME``.
+- ``local``: files under ``LOCAL_STORAGE_ROOT``, for load tests, benchmarks
+  and offline integration tests.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+import os
+import shutil
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+from urllib.parse import quote, unquote, urlencode
+
+from fastapi import HTTPException
+from google.api_core import exceptions
+from google.cloud import storage
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class StorageBackend(ABC):
+    """Minimal object store interface: put, delete, url, sign and stream."""
+
+    name: str
+
+    @abstractmethod
+    def put(self, object_name: str, data: bytes | BinaryIO, content_type: str) -> None:
+        """Store ``data`` under ``object_name``, replacing any existing object."""
+
+    @abstractmethod
+    def delete(self, object_names: Iterable[str]) -> dict[str, str]:
+        """Delete objects; returns ``{object_name: error}`` for failures.
+
+        Missing objects count as deleted.
+        """
+
+    @abstractmethod
+    def url(self, object_name: str) -> str:
+        """Unsigned URL clients can load the object from."""
+
+    @abstractmethod
+    def sign(self, object_name: str, ttl_seconds: int) -> str:
+        """Time-limited URL for objects that are not publicly readable."""
+
+    @abstractmethod
+    def stream(
+        self,
+        object_name: str,
+        start: int = 0,
+        end: int | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        """Yield the bytes ``start..end`` (inclusive) of an object in chunks.
+
+        Raises ``FileNotFoundError`` when the object does not exist.
+        """
+
+    @abstractmethod
+    def size(self, object_name: str) -> int:
+        """Size of an object in bytes; raises ``FileNotFoundError`` when it does not exist."""
+
+    @abstractmethod
+    def exists(self, object_name: str) -> bool:
+        ...
+
+    @abstractmethod
+    def list(self, prefix: str) -> Iterator[tuple[str, datetime | None]]:
+        """Yield ``(object_name, updated_at)`` for objects under ``prefix``."""
+
+    def should_sign(self) -> bool:
+        return False
+
+    def read(self, object_name: str) -> bytes:
+        return b"".join(self.stream(object_name))
+
+
+class GCSBackend(StorageBackend):
+    name = "gcs"
+
+    def __init__(self) -> None:
+        self.auto_make_public = os.getenv("GCS_AUTO_MAKE_PUBLIC", "true").lower() in {
+            "1",
+            "true",
+            "yes",
+        }
+        self.signed_url_mode = os.getenv("GCS_SIGNED_URL_MODE", "auto").strip().lower()
+        self._client: storage.Client | None = None
+        self._public_acl_failed = False
+
+    @property
+    def bucket_name(self) -> str:
+        bucket_name = os.getenv("GCS_BUCKET_NAME")
+        if not bucket_name:
+            raise HTTPException(
+                status_code=500,
+                detail="GCS_BUCKET_NAME is not configured on the server.",
+            )
+        return bucket_name
+
+    @property
+    def client(self) -> storage.Client:
+        if self._client is None:
+            self._client = storage.Client()
+        return self._client
+
+    def bucket(self) -> storage.bucket.Bucket:
+        return self.client.bucket(self.bucket_name)
+
+    def should_sign(self) -> bool:
+        if self.signed_url_mode in {"always", "true", "1"}:
+            return True
+        if self.signed_url_mode in {"never", "false", "0"}:
+            return False
+        return (not self.auto_make_public) or self._public_acl_failed
+
+    def put(self, object_name: str, data: bytes | BinaryIO, content_type: str) -> None:
+        blob = self.bucket().blob(object_name)
+        blob.cache_control = CACHE_CONTROL
+        if isinstance(data, (bytes, bytearray)):
+            blob.upload_from_string(data, content_type=content_type)
+        else:
+            blob.upload_from_file(data, content_type=content_type, rewind=True)
+
+        if self.auto_make_public and not self.should_sign():
+            try:
+                blob.make_public()
+            except exceptions.GoogleAPIError as exc:
+                self._public_acl_failed = True
+                logger.info(
+                    "Unable to update ACL for %s. Falling back to signed URLs for new images. Error: %s",
+                    blob.name,
+                    exc,
+                )
+
+    def delete(self, object_names: Iterable[str]) -> dict[str, str]:
+        # one request per object: the batch API only reports per-object
+        # results through private attributes
+        bucket = self.bucket()
+        failures: dict[str, str] = {}
+        for path in dict.fromkeys(object_names):
+            try:
+                bucket.delete_blob(path)
+            except exceptions.NotFound:
+                continue
+            except exceptions.GoogleAPIError as exc:
+                failures[path] = str(exc)[:200]
+        return failures
+
+    def url(self, object_name: str) -> str:
+        override = os.getenv("GCS_PUBLIC_BASE_URL")
+        if override:
+            return f"{override.rstrip('/')}/{object_name}"
+        return f"https://storage.googleapis.com/{self.bucket_name}/{object_name}"
+
+    def sign(self, object_name: str, ttl_seconds: int) -> str:
+        return self.bucket().blob(object_name).generate_signed_url(
+            version="v4",
+            method="GET",
+            expiration=timedelta(seconds=ttl_seconds),
+            response_disposition="inline",
+        )
+
+    def stream(
+        self,
+        object_name: str,
+        start: int = 0,
+        end: int | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        blob = self.bucket().blob(object_name)
+        try:
+            with blob.open("rb", chunk_size=chunk_size) as reader:
+                reader.seek(start)
+                remaining = None if end is None else end - start + 1
+                while remaining is None or remaining > 0:
+                    chunk = reader.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+        except exceptions.NotFound as exc:
+            raise FileNotFoundError(object_name) from exc
+
+    def read(self, object_name: str) -> bytes:
+        return self.bucket().blob(object_name).download_as_bytes()
+
+    def size(self, object_name: str) -> int:
+        blob = self.bucket().get_blob(object_name)
+        if blob is None:
+            raise FileNotFoundError(object_name)
+        return blob.size
+
+    def exists(self, object_name: str) -> bool:
+        return self.bucket().blob(object_name).exists()
+
+    def list(self, prefix: str) -> Iterator[tuple[str, datetime | None]]:
+        for blob in self.client.list_blobs(self.bucket_name, prefix=prefix):
+            yield blob.name, blob.updated
+
+
+class LocalBackend(StorageBackend):
+    """Objects stored as files under ``root``.
+
+    Files live in two levels of hash-sharded directories so no single directory
+    grows unbounded, and are written atomically (temp file, fsync, rename) so
+    readers never see a partial object.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str | Path, base_url: str, signing_key: str | None = None):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+        self.signing_key = (signing_key or "").encode("utf-8")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, object_name: str) -> Path:
+        digest = hashlib.sha1(object_name.encode("utf-8")).hexdigest()
+        return self.root / digest[:2] / digest[2:4] / quote(object_name, safe="")
+
+    def should_sign(self) -> bool:
+        return bool(self.signing_key)
+
+    def put(self, object_name: str, data: bytes | BinaryIO, content_type: str) -> None:
+        target = self.path_for(object_name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                if isinstance(data, (bytes, bytearray)):
+                    handle.write(data)
+                else:
+                    data.seek(0)
+                    shutil.copyfileobj(data, handle, STREAM_CHUNK_SIZE)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def delete(self, object_names: Iterable[str]) -> dict[str, str]:
+        failures: dict[str, str] = {}
+        for object_name in object_names:
+            try:
+                self.path_for(object_name).unlink(missing_ok=True)
+            except OSError as exc:
+                failures[object_name] = str(exc)
+        return failures
+
+    def url(self, object_name: str) -> str:
+        return f"{self.base_url}/{quote(object_name)}"
+
+    def signature(self, object_name: str, expires: int) -> str:
+        message = f"{object_name}:{expires}".encode("utf-8")
+        return hmac.new(self.signing_key, message, hashlib.sha256).hexdigest()
+
+    def verify(self, object_name: str, expires: int, signature: str) -> bool:
+        if not self.signing_key or expires < time.time():
+            return False
+        return hmac.compare_digest(self.signature(object_name, expires), signature)
+
+    def sign(self, object_name: str, ttl_seconds: int) -> str:
+        expires = int(time.time()) + ttl_seconds
+        query = urlencode({"expires": expires, "signature": self.signature(object_name, expires)})
+        return f"{self.url(object_name)}?{query}"
+
+    def stream(
+        self,
+        object_name: str,
+        start: int = 0,
+        end: int | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        with self.path_for(object_name).open("rb") as handle:
+            handle.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = handle.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def read(self, object_name: str) -> bytes:
+        return self.path_for(object_name).read_bytes()
+
+    def size(self, object_name: str) -> int:
+        return self.path_for(object_name).stat().st_size
+
+    def exists(self, object_name: str) -> bool:
+        return self.path_for(object_name).is_file()
+
+    def list(self, prefix: str) -> Iterator[tuple[str, datetime | None]]:
+        for shard in sorted(self.root.glob("*/*")):
+            if not shard.is_dir():
+                continue
+            for entry in shard.iterdir():
+                if entry.name.startswith(".tmp-"):
+                    continue
+                object_name = unquote(entry.name)
+                if object_name.startswith(prefix):
+                    updated = datetime.fromtimestamp(entry.stat().st_mtime, tz=timezone.utc)
+                    yield object_name, updated
+
+
+_backend: StorageBackend | None = None
+
+
+def get_backend() -> StorageBackend:
+    global _backend
+    if _backend is None:
+        kind = os.getenv("STORAGE_BACKEND", "gcs").strip().lower()
+        if kind == "local":
+            _backend = LocalBackend(
+                root=os.getenv("LOCAL_STORAGE_ROOT", "var/storage"),
+                base_url=os.getenv("LOCAL_STORAGE_BASE_URL", "http://localhost:8000/media"),
+                signing_key=os.getenv("LOCAL_STORAGE_SIGNING_KEY"),
+            )
+        elif kind == "gcs":
+            _backend = GCSBackend()
+        else:
+            raise RuntimeError(f"Unknown STORAGE_BACKEND {kind!r}; expected 'gcs' or 'local'.")
+    return _backend
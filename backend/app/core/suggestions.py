@@ -0,0 +1,251 @@
+"""Follow suggestions by nearest neighbours over per-user feature vectors.
+
+Every user with a profile is a row in an in-memory NumPy matrix of
+standardised features: age, height, weight, average steps, sleep and
+exercise minutes over the last ``SUGGESTIONS_ACTIVITY_DAYS`` days, plus a
+one-hot gender. Missing values sit at the population mean, so incomplete
+profiles still match.
+
+A background worker rebuilds the matrix periodically and, in between,
+refreshes only the rows of users whose profile or health logs changed
+(``mark_dirty``); users whose profile is gone lose their row. Rebuilds and
+refreshes take one build lock, so neither replaces the other's snapshot
+with a stale one. Queries compute the distance to every row in one
+vectorised pass and pick the top K with ``argpartition``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterable, Sequence
+
+import numpy as np
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicWorker
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL_SECONDS = float(os.getenv("SUGGESTIONS_REFRESH_SECONDS", "30"))
+REBUILD_INTERVAL_SECONDS = float(os.getenv("SUGGESTIONS_REBUILD_MINUTES", "60")) * 60
+ACTIVITY_DAYS = int(os.getenv("SUGGESTIONS_ACTIVITY_DAYS", "30"))
+WORKER_ENABLED = os.getenv("SUGGESTIONS_WORKER", "true").lower() in {"1", "true", "yes"}
+
+NUMERIC_FEATURES = ("age", "height_cm", "weight_kg", "avg_steps", "avg_sleep", "avg_exercise")
+GENDERS = ("M", "F", "Other")
+# relative importance of each column after standardisation
+FEATURE_WEIGHTS = np.array([2.0, 0.5, 0.5, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0], dtype=np.float32)
+
+_FEATURE_SQL = """
+    SELECT p.user_id, p.age, p.gender, p.height_cm, p.weight_kg,
+           AVG(h.steps) AS avg_steps,
+           AVG(h.sleep_hours) AS avg_sleep,
+           AVG(h.exercise_minutes) AS avg_exercise
+    FROM Profiles AS p
+    LEFT JOIN HealthLogs AS h
+      ON h.user_id = p.user_id AND h.date >= :since
+    {where}
+    GROUP BY p.user_id, p.age, p.gender, p.height_cm, p.weight_kg
+"""
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    user_ids: np.ndarray  # int64, one per row
+    matrix: np.ndarray  # float32, weighted standardised features
+    sq_norms: np.ndarray  # float32, squared row norms
+    row_of: dict[int, int]
+
+
+def _raw_features(rows: Sequence) -> tuple[np.ndarray, np.ndarray]:
+    ids = np.fromiter((row["user_id"] for row in rows), dtype=np.int64, count=len(rows))
+    numeric = np.array(
+        [[np.nan if row[name] is None else float(row[name]) for name in NUMERIC_FEATURES] for row in rows],
+        dtype=np.float64,
+    ).reshape(len(rows), len(NUMERIC_FEATURES))
+    gender = np.array(
+        [[1.0 if row["gender"] == value else 0.0 for value in GENDERS] for row in rows],
+        dtype=np.float64,
+    ).reshape(len(rows), len(GENDERS))
+    return ids, np.hstack([numeric, gender])
+
+
+class SuggestionIndex:
+    def __init__(self) -> None:
+        self._snapshot: _Snapshot | None = None
+        self._mean: np.ndarray | None = None
+        self._std: np.ndarray | None = None
+        self._dirty: set[int] = set()
+        self._lock = threading.Lock()
+        # held across a whole rebuild or refresh; queries never take it
+        self._build_lock = threading.Lock()
+        self.built_at = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    def __len__(self) -> int:
+        snapshot = self._snapshot
+        return 0 if snapshot is None else len(snapshot.user_ids)
+
+    def mark_dirty(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._dirty.update(user_ids)
+
+    def _fetch(self, db: Session, user_ids: Sequence[int] | None = None) -> Sequence:
+        since = date.today() - timedelta(days=ACTIVITY_DAYS)
+        if user_ids is None:
+            return db.execute(text(_FEATURE_SQL.format(where="")), {"since": since}).mappings().all()
+        statement = text(_FEATURE_SQL.format(where="WHERE p.user_id IN :ids")).bindparams(
+            bindparam("ids", expanding=True)
+        )
+        return db.execute(statement, {"since": since, "ids": list(user_ids)}).mappings().all()
+
+    def _transform(self, raw: np.ndarray) -> np.ndarray:
+        scaled = (raw - self._mean) / self._std
+        scaled = np.nan_to_num(scaled, nan=0.0)  # missing value -> population mean
+        return (scaled * FEATURE_WEIGHTS).astype(np.float32)
+
+    @staticmethod
+    def _snapshot_of(user_ids: np.ndarray, matrix: np.ndarray) -> _Snapshot:
+        return _Snapshot(
+            user_ids=user_ids,
+            matrix=matrix,
+            sq_norms=np.einsum("ij,ij->i", matrix, matrix),
+            row_of={int(user_id): row for row, user_id in enumerate(user_ids)},
+        )
+
+    def rebuild(self, db: Session) -> int:
+        """Recompute every vector and the standardisation statistics."""
+        with self._build_lock:
+            return self._rebuild(db)
+
+    def _rebuild(self, db: Session) -> int:
+        with self._lock:
+            self._dirty.clear()
+        ids, raw = _raw_features(self._fetch(db))
+        present = ~np.isnan(raw)
+        counts = np.maximum(present.sum(axis=0), 1)
+        mean = np.nansum(raw, axis=0) / counts
+        std = np.sqrt(np.nansum((raw - mean) ** 2, axis=0) / counts)
+        self._mean, self._std = mean, np.where(std < 1e-9, 1.0, std)
+        self._snapshot = self._snapshot_of(ids, self._transform(raw))
+        self.built_at = time.monotonic()
+        return len(ids)
+
+    def refresh(self, db: Session, user_ids: Iterable[int] | None = None) -> int:
+        """Re-read the given (or all dirty) users and patch their rows in.
+
+        Users without a profile any more are dropped. Returns the number of
+        rows updated, added or removed.
+        """
+        with self._build_lock:
+            if self._snapshot is None:
+                return self._rebuild(db)
+            return self._refresh(db, user_ids)
+
+    def _refresh(self, db: Session, user_ids: Iterable[int] | None) -> int:
+        with self._lock:
+            if user_ids is None:
+                pending, self._dirty = self._dirty, set()
+            else:
+                pending = set(user_ids)
+                self._dirty -= pending
+        if not pending:
+            return 0
+
+        ids, raw = _raw_features(self._fetch(db, sorted(pending)))
+        vectors = self._transform(raw)
+        snapshot = self._snapshot
+        user_ids_out = snapshot.user_ids
+        matrix = snapshot.matrix.copy()
+        appended_ids, appended_rows = [], []
+        for user_id, vector in zip(ids.tolist(), vectors):
+            row = snapshot.row_of.get(user_id)
+            if row is None:
+                appended_ids.append(user_id)
+                appended_rows.append(vector)
+            else:
+                matrix[row] = vector
+        # _fetch returns no row for a user whose profile was deleted
+        gone = [snapshot.row_of[user_id] for user_id in pending - set(ids.tolist()) if user_id in snapshot.row_of]
+        if gone:
+            user_ids_out = np.delete(user_ids_out, gone)
+            matrix = np.delete(matrix, gone, axis=0)
+        if appended_ids:
+            user_ids_out = np.concatenate([user_ids_out, np.array(appended_ids, dtype=np.int64)])
+            matrix = np.vstack([matrix, np.array(appended_rows, dtype=np.float32)])
+        self._snapshot = self._snapshot_of(user_ids_out, matrix)
+        return len(ids) + len(gone)
+
+    def nearest(self, user_id: int, k: int, exclude: Iterable[int] = ()) -> list[int] | None:
+        """User ids closest to ``user_id``, best first; ``None`` if it is not indexed."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        row = snapshot.row_of.get(user_id)
+        if row is None:
+            return None
+
+        query = snapshot.matrix[row]
+        distances = snapshot.sq_norms - 2.0 * (snapshot.matrix @ query) + snapshot.sq_norms[row]
+        distances[row] = np.inf
+        excluded = [snapshot.row_of[other] for other in exclude if other in snapshot.row_of]
+        if excluded:
+            distances[excluded] = np.inf
+
+        available = len(distances) - 1 - len(set(excluded) - {row})
+        k = min(k, available)
+        if k <= 0:
+            return []
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+        return snapshot.user_ids[top].tolist()
+
+
+index = SuggestionIndex()
+
+
+def mark_dirty(*user_ids: int) -> None:
+    index.mark_dirty(user_ids)
+
+
+def ensure_ready(db: Session) -> None:
+    """Build the index on first use, and apply pending changes when no worker runs.
+
+    Blocking (SQL plus NumPy), so request handlers call it from a worker thread."""
+    if not index.ready:
+        index.rebuild(db)
+    elif not _worker.running:
+        index.refresh(db)
+
+
+def _run() -> None:
+    db = SessionLocal()
+    try:
+        if not index.ready or time.monotonic() - index.built_at >= REBUILD_INTERVAL_SECONDS:
+            index.rebuild(db)
+        else:
+            index.refresh(db)
+    finally:
+        db.close()
+
+
+_worker = PeriodicWorker("suggestions", REFRESH_INTERVAL_SECONDS, _run)
+
+
+def start() -> None:
+    if WORKER_ENABLED:
+        _worker.start()
+
+
+def stop() -> None:
+    _worker.stop()
@@ -0,0 +1,119 @@
+"""Process-wide cache of user display data (``user_id -> username, email``).
+
+Feeds, comment threads and the leaderboard need a name for every author.
+Instead of joining ``Users`` on each query they ask the directory, which
+answers from an LRU cache and loads all misses with one ``IN`` query.
+Entries expire after ``USER_DIRECTORY_TTL_SECONDS``, and the user write
+paths (upsert, register) invalidate them explicitly.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+from app.core import metrics, statements
+
+MAX_ENTRIES = int(os.getenv("USER_DIRECTORY_MAX_ENTRIES", "50000"))
+TTL_SECONDS = float(os.getenv("USER_DIRECTORY_TTL_SECONDS", "300"))
+
+_LOOKUP = statements.define(
+    "users.directory_lookup",
+    """
+    SELECT user_id, username, email
+    FROM Users
+    WHERE user_id IN :user_ids
+    """,
+    expanding=["user_ids"],
+)
+
+
+@dataclass(frozen=True)
+class UserEntry:
+    user_id: int
+    username: str | None
+    email: str | None
+
+    @property
+    def display_name(self) -> str:
+        return self.username or self.email or f"User {self.user_id}"
+
+
+class UserDirectory:
+    def __init__(
+        self,
+        max_entries: int = MAX_ENTRIES,
+        ttl_seconds: float = TTL_SECONDS,
+        *,
+        name: str = "user_directory",
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # user_id -> (entry or None for unknown ids, expires_at)
+        self._entries: OrderedDict[int, tuple[UserEntry | None, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = metrics.counter(f"{name}.hits")
+        self.misses = metrics.counter(f"{name}.misses")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float | None:
+        total = self.hits.value + self.misses.value
+        return None if not total else round(self.hits.value / total, 4)
+
+    def get_many(self, db: Session, user_ids: Iterable[int]) -> dict[int, UserEntry]:
+        """Entries for the known ids among ``user_ids``; unknown ids are left out."""
+        wanted = {user_id for user_id in user_ids if user_id is not None}
+        found: dict[int, UserEntry] = {}
+        missing: list[int] = []
+        now = time.monotonic()
+        with self._lock:
+            for user_id in wanted:
+                cached = self._entries.get(user_id)
+                if cached is None or cached[1] <= now:
+                    missing.append(user_id)
+                    continue
+                self._entries.move_to_end(user_id)
+                if cached[0] is not None:
+                    found[user_id] = cached[0]
+        self.hits.inc(len(wanted) - len(missing))
+        if not missing:
+            return found
+
+        self.misses.inc(len(missing))
+        rows = db.execute(_LOOKUP, {"user_ids": sorted(missing)}).mappings().all()
+        loaded = {row["user_id"]: UserEntry(row["user_id"], row["username"], row["email"]) for row in rows}
+        found.update(loaded)
+        with self._lock:
+            expires_at = time.monotonic() + self.ttl_seconds
+            for user_id in missing:
+                self._entries[user_id] = (loaded.get(user_id), expires_at)
+                self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return found
+
+    def get(self, db: Session, user_id: int) -> UserEntry | None:
+        return self.get_many(db, [user_id]).get(user_id)
+
+    def invalidate(self, *user_ids: int) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+directory = UserDirectory()
+metrics.gauge("user_directory.size", lambda: len(directory))
+metrics.gauge("user_directory.hit_rate", lambda: directory.hit_rate)
@@ -1,16 +1,21 @@
 # app/crud.py
 """CRUD layer using raw SQL (no ORM models)."""
 
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from datetime import datetime
+import hashlib
 import logging
+import os
+import threading
+import time
 from typing import Any, Mapping, Sequence
 
-from sqlalchemy import bindparam, text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app.core import deletion_queue, events, reaction_buffer, statements, suggestions, user_directory
 from app.core import storage as storage_utils
+from app.core.pagination import decode_cursor, encode_cursor
 
 from . import schemas
 
@@ -18,6 +23,87 @@ from . import schemas
 logger = logging.getLogger(__name__)
 _IMAGE_TABLE_AVAILABLE = True
 
+# comment matches count for less than a match in the post itself
+SEARCH_COMMENT_WEIGHT = 0.5
+REACTION_FLUSH_CHUNK = 500
+UPSERT_CACHE_SIZE = int(os.getenv("USER_UPSERT_CACHE_SIZE", "10000"))
+# The cache is per process: a row changed through another worker is not
+# rewritten here for up to this long when a sign-in repeats the old values.
+UPSERT_CACHE_TTL_SECONDS = float(os.getenv("USER_UPSERT_CACHE_TTL_SECONDS", "60"))
+
+# email -> (fingerprint of username + password hash, user, monotonic expiry) from the last upsert
+_UPSERT_CACHE: "OrderedDict[str, tuple[str, schemas.User, float]]" = OrderedDict()
+_UPSERT_CACHE_LOCK = threading.Lock()
+BULK_DELETE_CHUNK = 500
+
+
+_POST_COLUMNS = """
+    cp.post_id,
+    cp.user_id,
+    cp.content,
+    cp.visibility,
+    cp.created_at
+"""
+_IMAGE_COLUMNS = """
+    file_name,
+    storage_path,
+    public_url,
+    content_type,
+    size_bytes,
+    width,
+    height,
+    thumbnail_path,
+    feed_path,
+    content_hash
+"""
+_COMMENT_COLUMNS = """
+    pc.comment_id,
+    pc.post_id,
+    pc.user_id,
+    pc.content,
+    pc.created_at
+"""
+
+_IMAGES_FOR_POSTS = statements.define(
+    "post_images.for_posts",
+    f"""
+    SELECT image_id, post_id, {_IMAGE_COLUMNS}, created_at
+    FROM CommunityPostImages
+    WHERE post_id IN :post_ids
+    ORDER BY created_at ASC, image_id ASC
+    """,
+    expanding=["post_ids"],
+)
+_IMAGES_FOR_POST = statements.define(
+    "post_images.for_post",
+    f"""
+    SELECT image_id, post_id, {_IMAGE_COLUMNS}, created_at
+    FROM CommunityPostImages
+    WHERE post_id = :post_id
+    ORDER BY created_at ASC, image_id ASC
+    """,
+)
+_IMAGES_BY_HASH = statements.define(
+    "post_images.by_hash",
+    f"""
+    SELECT {_IMAGE_COLUMNS}
+    FROM CommunityPostImages
+    WHERE content_hash IN :content_hashes
+    ORDER BY width IS NULL, image_id ASC
+    """,
+    expanding=["content_hashes"],
+)
+_INSERT_IMAGE = statements.define(
+    "post_images.insert",
+    f"""
+    INSERT INTO CommunityPostImages ({_IMAGE_COLUMNS}, post_id, created_at)
+    VALUES (
+        :file_name, :storage_path, :public_url, :content_type, :size_bytes, :width, :height,
+        :thumbnail_path, :feed_path, :content_hash, :post_id, :created_at
+    )
+    """,
+)
+
 
 def get_status():
     return {"status": "ok"}
@@ -31,28 +117,8 @@ def _fetch_image_map(db: Session, post_ids: Sequence[int]) -> dict[int, list[sch
     if not _IMAGE_TABLE_AVAILABLE:
         return {}
 
-    stmt = (
-        text(
-            """
-            SELECT image_id,
-                   post_id,
-                   file_name,
-                   storage_path,
-                   public_url,
-                   content_type,
-                   size_bytes,
-                   width,
-                   height,
-                   created_at
-            FROM CommunityPostImages
-            WHERE post_id IN :post_ids
-            ORDER BY created_at ASC, image_id ASC
-            """
-        ).bindparams(bindparam("post_ids", expanding=True))
-    )
-
     try:
-        rows = db.execute(stmt, {"post_ids": list(post_ids)}).mappings().all()
+        rows = db.execute(_IMAGES_FOR_POSTS, {"post_ids": list(post_ids)}).mappings().all()
     except SQLAlchemyError as exc:  # table might not exist yet in some environments
         message = str(exc)
         if "CommunityPostImages" in message:
@@ -66,22 +132,42 @@ def _fetch_image_map(db: Session, post_ids: Sequence[int]) -> dict[int, list[sch
 
     image_map: dict[int, list[schemas.CommunityPostImageOut]] = defaultdict(list)
     for row in rows:
-        payload = dict(row)
-        payload["public_url"] = storage_utils.get_media_url(
-            payload["storage_path"],
-            fallback_url=payload.get("public_url"),
-        )
-        image_map[payload["post_id"]].append(schemas.CommunityPostImageOut(**payload))
+        image_map[row["post_id"]].append(_image_out(row))
     return image_map
 
 
+def _image_out(row: Mapping[str, Any]) -> schemas.CommunityPostImageOut:
+    payload = dict(row)
+    payload["public_url"] = storage_utils.get_media_url(
+        payload["storage_path"],
+        fallback_url=payload.get("public_url"),
+    )
+    if payload.get("thumbnail_path"):
+        payload["thumbnail_url"] = storage_utils.get_media_url(payload["thumbnail_path"])
+    if payload.get("feed_path"):
+        payload["feed_url"] = storage_utils.get_media_url(payload["feed_path"])
+    return schemas.CommunityPostImageOut(**payload)
+
+
+def _with_usernames(db: Session, rows: Sequence[Mapping[str, Any]]) -> list[dict[str, Any]]:
+    """Add ``username`` to author rows from the user directory instead of joining Users."""
+    users = user_directory.directory.get_many(db, {row["user_id"] for row in rows})
+    enriched = []
+    for row in rows:
+        payload = dict(row)
+        user = users.get(payload["user_id"])
+        payload["username"] = user.username if user else None
+        enriched.append(payload)
+    return enriched
+
+
 def _attach_images(
-    rows: list[Mapping[str, Any]],
+    db: Session,
+    rows: Sequence[Mapping[str, Any]],
     image_map: dict[int, list[schemas.CommunityPostImageOut]],
 ) -> list[schemas.CommunityPostOut]:
     enriched: list[schemas.CommunityPostOut] = []
-    for row in rows:
-        payload = dict(row)
+    for payload in _with_usernames(db, rows):
         payload["images"] = image_map.get(payload["post_id"], [])
         enriched.append(schemas.CommunityPostOut(**payload))
     return enriched
@@ -89,12 +175,35 @@ def _attach_images(
 
 # ---------- USERS ----------
 
+def _upsert_fingerprint(username: str, password: str) -> str:
+    return hashlib.sha256(f"{username}\0{password}".encode("utf-8")).hexdigest()
+
+
+_UPSERT_USER = statements.define(
+    "users.upsert",
+    """
+    INSERT INTO Users (email, username, password_hash, created_at)
+    VALUES (:email, :username, :password_hash, :created_at)
+    ON DUPLICATE KEY UPDATE
+        user_id = LAST_INSERT_ID(user_id),
+        username = VALUES(username),
+        password_hash = IF(VALUES(password_hash) <> '', VALUES(password_hash), password_hash)
+    """,
+)
+
+
 def upsert_user(db: Session, user_in: schemas.UserCreate) -> schemas.User:
     """
-    Upsert a user by email.
-    - If exists: update username/password_hash if they changed.
-    - If not: insert.
-    Mirrors the old ORM behavior but in raw SQL.
+    Upsert a user by email in one statement.
+
+    Sign-ins that repeat the last seen username and password hash for an
+    email within ``UPSERT_CACHE_TTL_SECONDS`` are answered from a small
+    in-process cache without touching the database. Otherwise a single
+    ``INSERT ... ON DUPLICATE KEY UPDATE`` writes the row and yields its id
+    (``LAST_INSERT_ID``); nothing is re-selected. The statement cannot say
+    whether it inserted or updated, so the stored ``created_at`` is unknown
+    and the returned user has ``created_at=None``. An empty password never
+    overwrites a stored hash.
     """
     if not user_in.email:
         raise ValueError("email is required")
@@ -109,63 +218,16 @@ def upsert_user(db: Session, user_in: schemas.UserCreate) -> schemas.User:
         or getattr(user_in, "password", "")
         or ""
     )
+    fingerprint = _upsert_fingerprint(username, password)
+
+    with _UPSERT_CACHE_LOCK:
+        cached = _UPSERT_CACHE.get(user_in.email)
+        if cached is not None and cached[0] == fingerprint and cached[2] > time.monotonic():
+            _UPSERT_CACHE.move_to_end(user_in.email)
+            return cached[1].model_copy()
 
-    # 1) Fetch existing by email
-    row = db.execute(
-        text(
-            """
-            SELECT user_id, email, username, password_hash, created_at
-            FROM Users
-            WHERE email = :email
-            """
-        ),
-        {"email": user_in.email},
-    ).mappings().first()
-
-    # 2) Update path
-    if row:
-        updates = []
-        params = {"user_id": row["user_id"]}
-
-        if username and row["username"] != username:
-            updates.append("username = :username")
-            params["username"] = username
-
-        if password and row["password_hash"] != password:
-            updates.append("password_hash = :password_hash")
-            params["password_hash"] = password
-
-        if updates:
-            sql = f"""
-                UPDATE Users
-                SET {", ".join(updates)}
-                WHERE user_id = :user_id
-            """
-            db.execute(text(sql), params)
-            db.commit()
-
-        # Return fresh copy
-        updated = db.execute(
-            text(
-                """
-                SELECT user_id, email, username, created_at
-                FROM Users
-                WHERE user_id = :user_id
-                """
-            ),
-            {"user_id": row["user_id"]},
-        ).mappings().first()
-
-        return schemas.User(**updated)
-
-    # 3) Insert path
     result = db.execute(
-        text(
-            """
-            INSERT INTO Users (email, username, password_hash, created_at)
-            VALUES (:email, :username, :password_hash, :created_at)
-            """
-        ),
+        _UPSERT_USER,
         {
             "email": user_in.email,
             "username": username,
@@ -173,34 +235,96 @@ def upsert_user(db: Session, user_in: schemas.UserCreate) -> schemas.User:
             "created_at": datetime.utcnow(),
         },
     )
-    user_id = result.lastrowid
     db.commit()
 
-    new_row = db.execute(
-        text(
-            """
-            SELECT user_id, email, username, created_at
-            FROM Users
-            WHERE user_id = :user_id
-            """
-        ),
-        {"user_id": user_id},
-    ).mappings().first()
-
-    return schemas.User(**new_row)
+    user = schemas.User(user_id=result.lastrowid, email=user_in.email, username=username)
+    user_directory.directory.invalidate(user.user_id)
+    with _UPSERT_CACHE_LOCK:
+        _UPSERT_CACHE[user_in.email] = (fingerprint, user, time.monotonic() + UPSERT_CACHE_TTL_SECONDS)
+        _UPSERT_CACHE.move_to_end(user_in.email)
+        while len(_UPSERT_CACHE) > UPSERT_CACHE_SIZE:
+            _UPSERT_CACHE.popitem(last=False)
+    return user.model_copy()
 
 
 # ---------- COMMUNITY / POSTS ----------
 
+_INSERT_POST = statements.define(
+    "posts.insert",
+    """
+    INSERT INTO CommunityPosts (user_id, content, visibility, created_at)
+    VALUES (:user_id, :content, :visibility, :created_at)
+    """,
+)
+_POST_BY_ID = statements.define(
+    "posts.by_id",
+    f"""
+    SELECT {_POST_COLUMNS}
+    FROM CommunityPosts AS cp
+    WHERE cp.post_id = :post_id
+    """,
+)
+_POSTS_BY_IDS = statements.define(
+    "posts.by_ids",
+    f"""
+    SELECT {_POST_COLUMNS}
+    FROM CommunityPosts AS cp
+    WHERE cp.post_id IN :post_ids
+    """,
+    expanding=["post_ids"],
+)
+_ALL_POSTS = statements.define(
+    "posts.all",
+    f"""
+    SELECT {_POST_COLUMNS}
+    FROM CommunityPosts AS cp
+    ORDER BY cp.created_at DESC
+    """,
+)
+_HOT_FIRST_PAGE = statements.define(
+    "hot_feed.first_page",
+    """
+    SELECT post_id, score
+    FROM PostHotScores
+    ORDER BY score DESC, post_id DESC
+    LIMIT :limit
+    """,
+)
+_HOT_NEXT_PAGE = statements.define(
+    "hot_feed.next_page",
+    """
+    SELECT post_id, score
+    FROM PostHotScores
+    WHERE score < :score OR (score = :score AND post_id < :post_id)
+    ORDER BY score DESC, post_id DESC
+    LIMIT :limit
+    """,
+)
+_SEARCH_POSTS = statements.define(
+    "posts.search",
+    """
+    SELECT matches.post_id, SUM(matches.score) AS score
+    FROM (
+        SELECT post_id,
+               MATCH(content) AGAINST (:query IN NATURAL LANGUAGE MODE) AS score
+        FROM CommunityPosts
+        WHERE MATCH(content) AGAINST (:query IN NATURAL LANGUAGE MODE)
+        UNION ALL
+        SELECT post_id,
+               MATCH(content) AGAINST (:query IN NATURAL LANGUAGE MODE) * :comment_weight
+        FROM PostComments
+        WHERE MATCH(content) AGAINST (:query IN NATURAL LANGUAGE MODE)
+    ) AS matches
+    GROUP BY matches.post_id
+    ORDER BY score DESC, matches.post_id DESC
+    LIMIT :limit OFFSET :offset
+    """,
+)
+
 def create_post(db: Session, post_in: schemas.CommunityPostCreate) -> schemas.CommunityPostOut:
     now = datetime.utcnow()
     result = db.execute(
-        text(
-            """
-            INSERT INTO CommunityPosts (user_id, content, visibility, created_at)
-            VALUES (:user_id, :content, :visibility, :created_at)
-            """
-        ),
+        _INSERT_POST,
         {
             "user_id": post_in.user_id,
             "content": post_in.content,
@@ -211,36 +335,9 @@ def create_post(db: Session, post_in: schemas.CommunityPostCreate) -> schemas.Co
     post_id = result.lastrowid
 
     if post_in.images:
-        insert_image_stmt = text(
-            """
-            INSERT INTO CommunityPostImages (
-                post_id,
-                file_name,
-                storage_path,
-                public_url,
-                content_type,
-                size_bytes,
-                width,
-                height,
-                created_at
-            )
-            VALUES (
-                :post_id,
-                :file_name,
-                :storage_path,
-                :public_url,
-                :content_type,
-                :size_bytes,
-                :width,
-                :height,
-                :created_at
-            )
-            """
-        )
-
         for image in post_in.images:
             db.execute(
-                insert_image_stmt,
+                _INSERT_IMAGE,
                 {
                     "post_id": post_id,
                     "file_name": image.file_name,
@@ -250,124 +347,186 @@ def create_post(db: Session, post_in: schemas.CommunityPostCreate) -> schemas.Co
                     "size_bytes": image.size_bytes,
                     "width": image.width,
                     "height": image.height,
+                    "thumbnail_path": image.thumbnail_path,
+                    "feed_path": image.feed_path,
+                    "content_hash": image.content_hash,
                     "created_at": now,
                 },
             )
 
     db.commit()
 
-    row = db.execute(
-        text(
-            """
-            SELECT cp.post_id,
-                   cp.user_id,
-                   u.username,
-                   cp.content,
-                   cp.visibility,
-                   cp.created_at
-            FROM CommunityPosts AS cp
-            LEFT JOIN Users AS u ON u.user_id = cp.user_id
-            WHERE cp.post_id = :post_id
-            """
-        ),
-        {"post_id": post_id},
-    ).mappings().first()
+    row = db.execute(_POST_BY_ID, {"post_id": post_id}).mappings().first()
     if not row:
         raise ValueError("Post insert succeeded but fetching row failed")
 
     image_map = _fetch_image_map(db, [post_id])
-    return _attach_images([row], image_map)[0]
+    post = _attach_images(db, [row], image_map)[0]
+    events.publish("post_created", post.model_dump(mode="json"))
+    return post
 
 
 def list_posts(db: Session) -> list[schemas.CommunityPostOut]:
+    rows = db.execute(_ALL_POSTS).mappings().all()
+
+    image_map = _fetch_image_map(db, [row["post_id"] for row in rows])
+    return _attach_images(db, rows, image_map)
+
+
+def list_posts_by_ids(db: Session, post_ids: Sequence[int]) -> list[schemas.CommunityPostOut]:
+    """Fetch posts with their images, in the order of ``post_ids``."""
+    if not post_ids:
+        return []
+
+    rows = db.execute(_POSTS_BY_IDS, {"post_ids": list(post_ids)}).mappings().all()
+
+    by_id = {row["post_id"]: row for row in rows}
+    ordered = [by_id[post_id] for post_id in post_ids if post_id in by_id]
+    image_map = _fetch_image_map(db, list(by_id))
+    return _attach_images(db, ordered, image_map)
+
+
+def list_hot_posts(
+    db: Session,
+    *,
+    limit: int,
+    cursor: str | None = None,
+) -> tuple[list[schemas.CommunityPostOut], str | None]:
+    """
+    Posts by precomputed hot score, keyset-paginated on ``(score, post_id)``.
+
+    Raises ``ValueError`` for a malformed cursor.
+    """
+    params: dict[str, Any] = {"limit": limit + 1}
+    stmt = _HOT_FIRST_PAGE
+    if cursor:
+        params["score"], params["post_id"] = decode_cursor(cursor, float, int)
+        stmt = _HOT_NEXT_PAGE
+
+    rows = db.execute(stmt, params).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["score"], rows[-1]["post_id"])
+
+    return list_posts_by_ids(db, [row["post_id"] for row in rows]), next_cursor
+
+
+def search_posts(
+    db: Session,
+    query: str,
+    *,
+    limit: int,
+    offset: int = 0,
+) -> tuple[list[schemas.CommunitySearchHit], int | None]:
+    """
+    Rank posts by FULLTEXT relevance of their content and their comments.
+
+    A post's score is its own match score plus the (down-weighted) scores of
+    its matching comments. Returns ``(hits, next_offset)``.
+    """
     rows = db.execute(
-        text(
-            """
-            SELECT cp.post_id,
-                   cp.user_id,
-                   u.username,
-                   cp.content,
-                   cp.visibility,
-                   cp.created_at
-            FROM CommunityPosts AS cp
-            LEFT JOIN Users AS u ON u.user_id = cp.user_id
-            ORDER BY cp.created_at DESC
-            """
-        )
+        _SEARCH_POSTS,
+        {
+            "query": query,
+            "comment_weight": SEARCH_COMMENT_WEIGHT,
+            "limit": limit + 1,
+            "offset": offset,
+        },
     ).mappings().all()
 
-    image_map = _fetch_image_map(db, [row["post_id"] for row in rows])
-    return _attach_images(rows, image_map)
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
+
+    scores = {row["post_id"]: float(row["score"]) for row in rows}
+    posts = list_posts_by_ids(db, list(scores))
+    hits = [
+        schemas.CommunitySearchHit(**post.model_dump(), score=scores[post.post_id])
+        for post in posts
+    ]
+    return hits, next_offset
 
 
 def get_post(db: Session, post_id: int) -> schemas.CommunityPostOut | None:
-    row = db.execute(
-        text(
-            """
-            SELECT cp.post_id,
-                   cp.user_id,
-                   u.username,
-                   cp.content,
-                   cp.visibility,
-                   cp.created_at
-            FROM CommunityPosts AS cp
-            LEFT JOIN Users AS u ON u.user_id = cp.user_id
-            WHERE cp.post_id = :post_id
-            """
-        ),
-        {"post_id": post_id},
-    ).mappings().first()
+    row = db.execute(_POST_BY_ID, {"post_id": post_id}).mappings().first()
 
     if not row:
         return None
 
     image_map = _fetch_image_map(db, [post_id])
-    return _attach_images([row], image_map)[0]
+    return _attach_images(db, [row], image_map)[0]
 
 
 def list_post_images(db: Session, post_id: int) -> list[schemas.CommunityPostImageOut]:
+    rows = db.execute(_IMAGES_FOR_POST, {"post_id": post_id}).mappings().all()
+
+    return [_image_out(row) for row in rows]
+
+
+def find_images_by_hash(
+    db: Session, content_hashes: Sequence[str]
+) -> dict[str, schemas.CommunityPostImageCreate]:
+    """Return an already-stored image for each known content hash."""
+    if not content_hashes or not _IMAGE_TABLE_AVAILABLE:
+        return {}
+
     rows = db.execute(
-        text(
-            """
-            SELECT image_id,
-                   post_id,
-                   file_name,
-                   storage_path,
-                   public_url,
-                   content_type,
-                   size_bytes,
-                   width,
-                   height,
-                   created_at
-            FROM CommunityPostImages
-            WHERE post_id = :post_id
-            ORDER BY created_at ASC, image_id ASC
-            """
-        ),
-        {"post_id": post_id},
+        _IMAGES_BY_HASH, {"content_hashes": list(dict.fromkeys(content_hashes))}
     ).mappings().all()
 
-    results: list[schemas.CommunityPostImageOut] = []
+    found: dict[str, schemas.CommunityPostImageCreate] = {}
     for row in rows:
-        payload = dict(row)
-        payload["public_url"] = storage_utils.get_media_url(
-            payload["storage_path"],
-            fallback_url=payload.get("public_url"),
-        )
-        results.append(schemas.CommunityPostImageOut(**payload))
+        # prefer a row whose renditions have already been generated
+        found.setdefault(row["content_hash"], schemas.CommunityPostImageCreate(**row))
+    return found
+
 
-    return results
+_INSERT_COMMENT = statements.define(
+    "comments.insert",
+    """
+    INSERT INTO PostComments (post_id, user_id, content, created_at)
+    VALUES (:post_id, :user_id, :content, :created_at)
+    """,
+)
+_COMMENT_BY_ID = statements.define(
+    "comments.by_id",
+    f"""
+    SELECT {_COMMENT_COLUMNS}
+    FROM PostComments AS pc
+    WHERE pc.comment_id = :comment_id
+    """,
+)
+_KEYSET_AFTER_COMMENT = """
+    AND (pc.created_at > :after_created_at
+         OR (pc.created_at = :after_created_at AND pc.comment_id > :after_comment_id))
+"""
+# after a cursor -> keyset page
+_COMMENT_PAGES = {
+    after: statements.define(
+        "comments.thread" + (".after_cursor" if after else "") + ".page",
+        f"""
+        SELECT {_COMMENT_COLUMNS}
+        FROM PostComments AS pc
+        WHERE pc.post_id = :post_id {_KEYSET_AFTER_COMMENT if after else ""}
+        ORDER BY pc.created_at ASC, pc.comment_id ASC
+        LIMIT :limit
+        """,
+    )
+    for after in (False, True)
+}
+_COUNT_COMMENTS = statements.define(
+    "comments.count_for_post",
+    "SELECT COUNT(*) FROM PostComments WHERE post_id = :post_id",
+)
 
 
 def add_comment(db: Session, comment_in: schemas.PostCommentCreate) -> schemas.PostCommentOut:
     now = datetime.utcnow()
     result = db.execute(
-        text(
-            """
-            INSERT INTO PostComments (post_id, user_id, content, created_at)
-            VALUES (:post_id, :user_id, :content, :created_at)
-            """
-        ),
+        _INSERT_COMMENT,
         {
             "post_id": comment_in.post_id,
             "user_id": comment_in.user_id,
@@ -378,122 +537,197 @@ def add_comment(db: Session, comment_in: schemas.PostCommentCreate) -> schemas.P
     db.commit()
     comment_id = result.lastrowid
 
-    row = db.execute(
-        text(
-            """
-            SELECT pc.comment_id,
-                   pc.post_id,
-                   pc.user_id,
-                   u.username,
-                   pc.content,
-                   pc.created_at
-            FROM PostComments AS pc
-            LEFT JOIN Users AS u ON u.user_id = pc.user_id
-            WHERE pc.comment_id = :comment_id
-            """
-        ),
-        {"comment_id": comment_id},
-    ).mappings().first()
-
-    return schemas.PostCommentOut(**row)
-
-
-def list_comments(db: Session, post_id: int) -> list[schemas.PostCommentOut]:
-    rows = db.execute(
-        text(
-            """
-            SELECT pc.comment_id,
-                   pc.post_id,
-                   pc.user_id,
-                   u.username,
-                   pc.content,
-                   pc.created_at
-            FROM PostComments AS pc
-            LEFT JOIN Users AS u ON u.user_id = pc.user_id
-            WHERE pc.post_id = :post_id
-            ORDER BY pc.created_at ASC
-            """
-        ),
-        {"post_id": post_id},
-    ).mappings().all()
+    row = db.execute(_COMMENT_BY_ID, {"comment_id": comment_id}).mappings().first()
+
+    comment = schemas.PostCommentOut(**_with_usernames(db, [row])[0])
+    events.publish("comment_created", comment.model_dump(mode="json"))
+    return comment
 
-    return [schemas.PostCommentOut(**row) for row in rows]
+
+def list_comments(
+    db: Session,
+    post_id: int,
+    *,
+    limit: int,
+    after: str | None = None,
+) -> tuple[list[schemas.PostCommentOut], str | None]:
+    """
+    One page of comments oldest-first, keyset-paginated on ``(created_at, comment_id)``.
+
+    Returns ``(comments, next_cursor)``; ``next_cursor`` is ``None`` on the
+    last page. Raises ``ValueError`` for a malformed ``after`` cursor.
+    """
+    params: dict[str, Any] = {"post_id": post_id, "limit": limit + 1}
+    if after:
+        params["after_created_at"], params["after_comment_id"] = decode_cursor(after, datetime, int)
+
+    rows = db.execute(_COMMENT_PAGES[bool(after)], params).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["comment_id"])
+
+    return [schemas.PostCommentOut(**row) for row in _with_usernames(db, rows)], next_cursor
+
+
+def count_comments(db: Session, post_id: int) -> int:
+    return db.execute(_COUNT_COMMENTS, {"post_id": post_id}).scalar_one()
+
+
+_POST_OWNER = statements.define(
+    "posts.owner",
+    "SELECT user_id FROM CommunityPosts WHERE post_id = :post_id",
+)
+# children first, the post itself last
+_DELETE_POST_ROWS = [
+    statements.define(f"delete_post.{table}", f"DELETE FROM {table} WHERE post_id = :post_id")
+    for table in ("PostComments", "PostReactions", "CommunityPostImages", "PostHotScores", "CommunityPosts")
+]
+_COMMENT_OWNER = statements.define(
+    "comments.owner",
+    "SELECT post_id, user_id FROM PostComments WHERE comment_id = :comment_id",
+)
+_DELETE_COMMENT = statements.define(
+    "comments.delete",
+    "DELETE FROM PostComments WHERE comment_id = :comment_id",
+)
+# (table, column) -> chunked set-based delete
+_BULK_DELETES = {
+    (table, column): statements.define(
+        f"bulk_delete.{table}.{column}",
+        f"DELETE FROM {table} WHERE {column} IN :ids",
+        expanding=["ids"],
+    )
+    for table, column in [
+        ("PostComments", "post_id"),
+        ("PostReactions", "post_id"),
+        ("CommunityPostImages", "post_id"),
+        ("PostHotScores", "post_id"),
+        ("CommunityPosts", "post_id"),
+        ("PostComments", "comment_id"),
+    ]
+}
 
 
 def delete_post(db: Session, post_id: int, user_id: int) -> str:
-    owner = db.execute(
-        text(
-            """
-            SELECT user_id
-            FROM CommunityPosts
-            WHERE post_id = :post_id
-            """
-        ),
-        {"post_id": post_id},
-    ).mappings().first()
+    owner = db.execute(_POST_OWNER, {"post_id": post_id}).mappings().first()
 
     if not owner:
         return "not_found"
     if owner["user_id"] != user_id:
         return "forbidden"
 
-    db.execute(
-        text("DELETE FROM PostComments WHERE post_id = :post_id"),
-        {"post_id": post_id},
-    )
-    db.execute(
-        text("DELETE FROM PostReactions WHERE post_id = :post_id"),
-        {"post_id": post_id},
-    )
-    db.execute(
-        text("DELETE FROM CommunityPostImages WHERE post_id = :post_id"),
-        {"post_id": post_id},
-    )
-    db.execute(
-        text("DELETE FROM CommunityPosts WHERE post_id = :post_id"),
-        {"post_id": post_id},
-    )
+    deletion_queue.enqueue_post_images(db, [post_id])
+    for stmt in _DELETE_POST_ROWS:
+        db.execute(stmt, {"post_id": post_id})
     db.commit()
+    # a later flush would otherwise re-insert reactions for the deleted post
+    reaction_buffer.buffer.discard_posts({post_id})
     return "deleted"
 
 
 def delete_comment(db: Session, post_id: int, comment_id: int, user_id: int) -> str:
-    comment = db.execute(
-        text(
-            """
-            SELECT post_id, user_id
-            FROM PostComments
-            WHERE comment_id = :comment_id
-            """
-        ),
-        {"comment_id": comment_id},
-    ).mappings().first()
+    comment = db.execute(_COMMENT_OWNER, {"comment_id": comment_id}).mappings().first()
 
     if not comment or comment["post_id"] != post_id:
         return "not_found"
     if comment["user_id"] != user_id:
         return "forbidden"
 
-    db.execute(
-        text("DELETE FROM PostComments WHERE comment_id = :comment_id"),
-        {"comment_id": comment_id},
-    )
+    db.execute(_DELETE_COMMENT, {"comment_id": comment_id})
     db.commit()
     return "deleted"
 
 
+def bulk_delete(
+    db: Session,
+    post_ids: Sequence[int],
+    comment_ids: Sequence[int] = (),
+) -> dict[str, int]:
+    """
+    Delete many posts (with their comments, reactions and images) and
+    standalone comments in a single transaction, using chunked set-based
+    statements. Image objects are queued for the deletion worker.
+    Returns the number of rows deleted per table.
+    """
+    post_ids = sorted(set(post_ids))
+    comment_ids = sorted(set(comment_ids))
+    counts = dict.fromkeys(
+        ["CommunityPosts", "PostComments", "PostReactions", "CommunityPostImages", "PostHotScores"],
+        0,
+    )
+
+    def _delete(table: str, column: str, ids: list[int]) -> None:
+        result = db.execute(_BULK_DELETES[table, column], {"ids": ids})
+        counts[table] += max(result.rowcount or 0, 0)
+
+    try:
+        for start in range(0, len(post_ids), BULK_DELETE_CHUNK):
+            chunk = post_ids[start : start + BULK_DELETE_CHUNK]
+            # image rows of this chunk must still exist while it is queued
+            deletion_queue.enqueue_post_images(db, chunk)
+            for table in ("PostComments", "PostReactions", "CommunityPostImages", "PostHotScores", "CommunityPosts"):
+                _delete(table, "post_id", chunk)
+        for start in range(0, len(comment_ids), BULK_DELETE_CHUNK):
+            _delete("PostComments", "comment_id", comment_ids[start : start + BULK_DELETE_CHUNK])
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+
+    if post_ids:
+        reaction_buffer.buffer.discard_posts(set(post_ids))
+    return counts
+
+
+_DELETE_REACTION = statements.define(
+    "reactions.delete",
+    "DELETE FROM PostReactions WHERE post_id = :post_id AND user_id = :user_id",
+)
+_INSERT_REACTION = statements.define(
+    "reactions.insert",
+    """
+    INSERT INTO PostReactions (post_id, user_id, reaction_type, created_at)
+    VALUES (:post_id, :user_id, :reaction_type, :created_at)
+    """,
+)
+_REACTION_FOR_USER = statements.define(
+    "reactions.for_user",
+    """
+    SELECT post_id, user_id, reaction_type, created_at
+    FROM PostReactions
+    WHERE post_id = :post_id AND user_id = :user_id
+    """,
+)
+_DELETE_REACTION_PAIRS = statements.define(
+    "reactions.delete_pairs",
+    "DELETE FROM PostReactions WHERE (post_id, user_id) IN :keys",
+    expanding=["keys"],
+)
+_REACTION_SUMMARY = statements.define(
+    "reactions.summary",
+    """
+    SELECT post_id, reaction_type, COUNT(*) AS count
+    FROM PostReactions
+    WHERE post_id = :post_id
+    GROUP BY post_id, reaction_type
+    """,
+)
+
+
 def add_reaction(db: Session, reaction_in: schemas.PostReactionCreate):
     """
     Upsert-style behavior: remove existing reaction from this user, then insert the new one.
+    With the reaction buffer enabled the write is deferred to the next flush.
     """
+    if reaction_buffer.ENABLED:
+        reaction_buffer.buffer.set(reaction_in.post_id, reaction_in.user_id, reaction_in.reaction_type)
+        return
+
     now = datetime.utcnow()
     db.execute(
-        text(
-            """
-            DELETE FROM PostReactions
-            WHERE post_id = :post_id AND user_id = :user_id
-            """
-        ),
+        _DELETE_REACTION,
         {
             "post_id": reaction_in.post_id,
             "user_id": reaction_in.user_id,
@@ -501,12 +735,7 @@ def add_reaction(db: Session, reaction_in: schemas.PostReactionCreate):
     )
 
     db.execute(
-        text(
-            """
-            INSERT INTO PostReactions (post_id, user_id, reaction_type, created_at)
-            VALUES (:post_id, :user_id, :reaction_type, :created_at)
-            """
-        ),
+        _INSERT_REACTION,
         {
             "post_id": reaction_in.post_id,
             "user_id": reaction_in.user_id,
@@ -515,88 +744,144 @@ def add_reaction(db: Session, reaction_in: schemas.PostReactionCreate):
         },
     )
     db.commit()
+    _publish_reactions(db, reaction_in.post_id)
 
 
 def remove_reaction(db: Session, post_id: int, user_id: int):
-    db.execute(
-        text(
-            """
-            DELETE FROM PostReactions
-            WHERE post_id = :post_id AND user_id = :user_id
-            """
-        ),
-        {"post_id": post_id, "user_id": user_id},
-    )
+    if reaction_buffer.ENABLED:
+        reaction_buffer.buffer.set(post_id, user_id, None)
+        return
+
+    db.execute(_DELETE_REACTION, {"post_id": post_id, "user_id": user_id})
     db.commit()
+    _publish_reactions(db, post_id)
 
 
 def get_reaction_for_user(db: Session, post_id: int, user_id: int):
-    row = db.execute(
-        text(
-            """
-            SELECT post_id, user_id, reaction_type, created_at
-            FROM PostReactions
-            WHERE post_id = :post_id AND user_id = :user_id
-            """
-        ),
-        {"post_id": post_id, "user_id": user_id},
-    ).mappings().first()
+    pending = reaction_buffer.buffer.get(post_id, user_id)
+    if pending is not None:
+        # the viewer sees their own unflushed toggle
+        if pending.reaction_type is None:
+            return None
+        return schemas.PostReactionOut(
+            post_id=post_id,
+            user_id=user_id,
+            reaction_type=pending.reaction_type,
+            created_at=pending.created_at,
+        )
+
+    row = db.execute(_REACTION_FOR_USER, {"post_id": post_id, "user_id": user_id}).mappings().first()
 
     return schemas.PostReactionOut(**row) if row else None
 
 
+def flush_reaction_buffer(db: Session, buffer: reaction_buffer.ReactionBuffer) -> int:
+    """
+    Apply every pending reaction in one transaction: a set-based DELETE of
+    all touched ``(post_id, user_id)`` pairs followed by a multi-row INSERT
+    of the final states. Returns the number of pairs written.
+    """
+    pending = buffer.take()
+    if not pending:
+        return 0
+
+    keys = list(pending)
+    inserts = [
+        {
+            "post_id": post_id,
+            "user_id": user_id,
+            "reaction_type": state.reaction_type,
+            "created_at": state.created_at,
+        }
+        for (post_id, user_id), state in pending.items()
+        if state.reaction_type is not None
+    ]
+    try:
+        for start in range(0, len(keys), REACTION_FLUSH_CHUNK):
+            db.execute(_DELETE_REACTION_PAIRS, {"keys": keys[start : start + REACTION_FLUSH_CHUNK]})
+        for start in range(0, len(inserts), REACTION_FLUSH_CHUNK):
+            # executemany: the MySQL driver sends this as one multi-row INSERT
+            db.execute(_INSERT_REACTION, inserts[start : start + REACTION_FLUSH_CHUNK])
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        buffer.restore(pending)
+        logger.exception("Failed to flush %s buffered reactions; will retry", len(pending))
+        return 0
+
+    for post_id in sorted({post_id for post_id, _ in keys}):
+        _publish_reactions(db, post_id)
+    return len(keys)
+
+
+def _publish_reactions(db: Session, post_id: int) -> None:
+    if not events.broker.has_subscribers:
+        return
+    summary = reaction_summary(db, post_id)
+    events.publish(
+        "reactions_changed",
+        {"post_id": post_id, "reactions": [item.model_dump() for item in summary]},
+    )
+
+
 def reaction_summary(db: Session, post_id: int) -> list[schemas.ReactionSummary]:
-    rows = db.execute(
-        text(
-            """
-            SELECT
-                post_id,
-                reaction_type,
-                COUNT(*) AS count
-            FROM PostReactions
-            WHERE post_id = :post_id
-            GROUP BY post_id, reaction_type
-            """
-        ),
-        {"post_id": post_id},
-    ).mappings().all()
+    rows = db.execute(_REACTION_SUMMARY, {"post_id": post_id}).mappings().all()
 
     return [schemas.ReactionSummary(**row) for row in rows]
 
+_CREATE_PROFILE = statements.define(
+    "profiles.create",
+    """
+    INSERT INTO Profiles (user_id)
+    VALUES (:user_id)
+    ON DUPLICATE KEY UPDATE user_id = user_id
+    """,
+)
+_PROFILE = statements.define("profiles.by_user", "SELECT * FROM Profiles WHERE user_id = :user_id")
+_PROFILES = statements.define(
+    "profiles.by_users",
+    "SELECT * FROM Profiles WHERE user_id IN :user_ids",
+    expanding=["user_ids"],
+)
+_UPSERT_PROFILE = statements.define(
+    "profiles.upsert",
+    """
+    INSERT INTO Profiles (user_id, age, gender, height_cm, weight_kg, timezone, bio)
+    VALUES (:user_id, :age, :gender, :height_cm, :weight_kg, :timezone, :bio)
+    ON DUPLICATE KEY UPDATE
+        age = VALUES(age), gender = VALUES(gender), height_cm = VALUES(height_cm),
+        weight_kg = VALUES(weight_kg), timezone = VALUES(timezone), bio = VALUES(bio)
+    """,
+)
+
 def create_profile(db: Session, user_id: int):
-    db.execute(
-        text("""
-            INSERT INTO Profiles (user_id)
-            VALUES (:user_id)
-            ON DUPLICATE KEY UPDATE user_id = user_id
-        """),
-        {"user_id": user_id}
-    )
+    db.execute(_CREATE_PROFILE, {"user_id": user_id})
     db.commit()
+    suggestions.mark_dirty(user_id)
 
 def get_profile(db: Session, user_id: int):
-    row = db.execute(
-        text("SELECT * FROM Profiles WHERE user_id = :user_id"),
-        {"user_id": user_id}
-    ).mappings().first()
+    row = db.execute(_PROFILE, {"user_id": user_id}).mappings().first()
     return row
 
-def update_profile(db: Session, user_id: int, profile_in: schemas.ProfileUpdate):
-    db.execute(
-        text("""
-            UPDATE Profiles
-            SET age = :age, gender = :gender, height_cm = :height_cm,
-                weight_kg = :weight_kg, timezone = :timezone, bio = :bio
-            WHERE user_id = :user_id
-        """),
-        {
-            "user_id": user_id,
-            "age": profile_in.age,
-            "gender": profile_in.gender,
-            "height_cm": profile_in.height_cm,
-            "weight_kg": profile_in.weight_kg,
-            "timezone": profile_in.timezone,
-            "bio": profile_in.bio,
-        }
-    )
-    db.commit()
\ No newline at end of file
+def get_profiles(db: Session, user_ids: Sequence[int]) -> dict[int, Mapping[str, Any]]:
+    """Profile rows for ``user_ids`` in one query; users without a profile are absent."""
+    if not user_ids:
+        return {}
+    rows = db.execute(_PROFILES, {"user_ids": sorted(set(user_ids))}).mappings().all()
+    return {row["user_id"]: row for row in rows}
+
+def upsert_profile(db: Session, user_id: int, profile_in: schemas.ProfileUpdate) -> schemas.ProfileOut:
+    """Create or replace a profile in one statement; every column is written, so
+    the input is exactly what is stored."""
+    values = {
+        "age": profile_in.age,
+        "gender": profile_in.gender,
+        "height_cm": profile_in.height_cm,
+        "weight_kg": profile_in.weight_kg,
+        "timezone": profile_in.timezone,
+        "bio": profile_in.bio,
+    }
+    db.execute(_UPSERT_PROFILE, {"user_id": user_id, **values})
+    db.commit()
+    suggestions.mark_dirty(user_id)
+    return schemas.ProfileOut(user_id=user_id, **values)
@@ -1,8 +1,12 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from app.core import auth, db_pool, read_replicas, statements
+
 if os.getenv("ENV") != "production":
     load_dotenv()
 
@@ -21,9 +25,34 @@ else:
         f"mysql+pymysql://{DB_USER}:{DB_PASS}@/{DB_NAME}"
         f"?unix_socket={DB_HOST}"
     )
-engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+def _async_url(url: str) -> str:
+    return url.replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+
+# same database through an asyncio driver, used by the request handlers
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(SQLALCHEMY_DATABASE_URL))
+# optional read replicas for get_read_db, comma-separated
+READ_REPLICA_URLS = [url.strip() for url in os.getenv("READ_REPLICA_URLS", "").split(",") if url.strip()]
+
+# sync engine: background workers, process pools and scripts
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **db_pool.engine_options())
+db_pool.instrument(engine, "sync")
+statements.instrument(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **db_pool.engine_options(asyncio=True))
+db_pool.instrument(async_engine.sync_engine, "async")
+statements.instrument(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+replica_engines = {
+    f"replica{index}": create_async_engine(_async_url(url), **db_pool.engine_options(asyncio=True))
+    for index, url in enumerate(READ_REPLICA_URLS)
+}
+for replica_name, replica_engine in replica_engines.items():
+    db_pool.instrument(replica_engine.sync_engine, replica_name)
+    statements.instrument(replica_engine.sync_engine)
+replicas = read_replicas.ReplicaSet(replica_engines)
+
 # You no longer need to use Base/models anywhere; DB is pre-created in MySQL.
 Base = declarative_base()
 
@@ -33,3 +62,26 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db(
+    request: Request,
+    identity: auth.Identity | None = Depends(auth.optional_user),
+):
+    """Session for read-only routes: a healthy replica in turn, or the primary
+    when there is none or the caller wrote moments ago."""
+    user_ids = read_replicas.request_user_ids(request, token_user_id=identity.user_id if identity else None)
+    replica = replicas.pick(user_ids, primary_until=read_replicas.primary_until(request))
+    if replica is None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    async with replicas.session(replica) as db:
+        try:
+            yield db
+        except (exc.OperationalError, exc.InterfaceError):
+            replicas.mark_down(replica)
+            raise
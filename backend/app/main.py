@@ -1,20 +1,54 @@
 import os
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 from datetime import date, datetime
 from typing import List, Optional
 
-from app.database import get_db
+from app.database import async_engine, get_async_db, get_read_db, replicas
+from app.core import (
+    deletion_queue,
+    follow_graph,
+    hot_feed,
+    images,
+    passwords,
+    reaction_buffer,
+    read_replicas,
+    statements,
+    storage,
+    suggestions,
+)
 from app.schemas import HealthLogCreate, HealthLogOut
 
 # Routers
-from .api import health, users, community, dashboard, leaderboard, profiles, followers
-
-app = FastAPI(title="WahooWell API")
+from .api import health, users, community, dashboard, leaderboard, profiles, followers, media
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    deletion_queue.start()
+    hot_feed.start()
+    reaction_buffer.start()
+    follow_graph.start()
+    suggestions.start()
+    replicas.start()
+    yield
+    await replicas.stop()
+    suggestions.stop()
+    follow_graph.stop()
+    reaction_buffer.stop()
+    hot_feed.stop()
+    deletion_queue.stop()
+    images.shutdown()
+    passwords.shutdown()
+    await async_engine.dispose()
+
+
+app = FastAPI(title="WahooWell API", lifespan=lifespan)
 
 # Include routers
 app.include_router(health.router)
@@ -24,6 +58,8 @@ app.include_router(dashboard.router)
 app.include_router(leaderboard.router)
 app.include_router(profiles.router)
 app.include_router(followers.router)  
+if storage.media_route_enabled():
+    app.include_router(media.router)
 
 raw_allowed_origins = os.getenv("ALLOWED_ORIGINS")
 if raw_allowed_origins:
@@ -49,141 +85,76 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", read_replicas.PRIMARY_HEADER],
 )
 
 
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    """After a successful write, keep the writer's reads on the primary for a moment
+    so replication lag never hides their own change (see app/core/read_replicas.py)."""
+    return await read_replicas.pin_writes(request, call_next, replicas)
+
+
 @app.get("/")
 def root():
     return {"ok": True, "message": "WahooWell API is running"}
 
 
-# ---------------------------------------------------------------------
-# POST /api/healthlogs  (create or update a daily log)
-# ---------------------------------------------------------------------
-@app.post("/api/healthlogs", response_model=HealthLogOut)
-def upsert_healthlog(entry: HealthLogCreate, db: Session = Depends(get_db)):
-    """
-    Upsert HealthLogs row by (user_id, date).
-    If exists, update; otherwise insert.
-    Raw SQL only (no ORM models).
+_HEALTHLOG_COLUMNS = """
+    log_id, user_id, date, steps, heart_rate_avg, sleep_hours,
+    calories_burned, exercise_minutes, stress_level,
+    goal, created_at, main_exercise
+"""
+_HEALTHLOG_FOR_DAY = statements.define(
+    "healthlogs.for_day",
+    f"""
+    SELECT {_HEALTHLOG_COLUMNS}
+    FROM HealthLogs
+    WHERE user_id = :user_id AND date = :date
+    ORDER BY created_at DESC
+    LIMIT 1
+    """,
+)
+_HEALTHLOG_BY_ID = statements.define(
+    "healthlogs.by_id",
+    f"SELECT {_HEALTHLOG_COLUMNS} FROM HealthLogs WHERE log_id = :log_id",
+)
+_ALL_HEALTHLOGS = statements.define(
+    "healthlogs.all",
+    f"SELECT {_HEALTHLOG_COLUMNS} FROM HealthLogs ORDER BY date DESC, log_id DESC",
+)
+# relies on uq_healthlogs_user_date (migrations/009); LAST_INSERT_ID(log_id)
+# hands back the id of the updated row as well as of an inserted one
+_UPSERT_HEALTHLOG = statements.define(
+    "healthlogs.upsert",
     """
+    INSERT INTO HealthLogs (
+        user_id, date, steps, heart_rate_avg, sleep_hours,
+        calories_burned, exercise_minutes, stress_level,
+        goal, created_at, main_exercise
+    )
+    VALUES (
+        :user_id, :date, :steps, :heart_rate_avg, :sleep_hours,
+        :calories_burned, :exercise_minutes, :stress_level,
+        :goal, :created_at, :main_exercise
+    )
+    ON DUPLICATE KEY UPDATE
+        log_id = LAST_INSERT_ID(log_id),
+        steps = VALUES(steps),
+        heart_rate_avg = VALUES(heart_rate_avg),
+        sleep_hours = VALUES(sleep_hours),
+        calories_burned = VALUES(calories_burned),
+        exercise_minutes = VALUES(exercise_minutes),
+        stress_level = VALUES(stress_level),
+        goal = VALUES(goal),
+        main_exercise = VALUES(main_exercise)
+    """,
+)
 
-    # entry may or may not have .goal depending on your current schema version
-    goal_text: Optional[str] = getattr(entry, "goal", None)
-    main_exercise: Optional[str] = getattr(entry, "main_exercise", None)
 
-    # 1) Check if a log already exists for this user + date
-    existing = db.execute(
-        text(
-            """
-            SELECT
-                log_id, user_id, date, steps, heart_rate_avg, sleep_hours,
-                calories_burned, exercise_minutes, stress_level,
-                goal, created_at, main_exercise
-            FROM HealthLogs
-            WHERE user_id = :user_id AND date = :date
-            """
-        ),
-        {"user_id": entry.user_id, "date": entry.date},
-    ).mappings().first()
-
-    if existing:
-        # ------------------ UPDATE ------------------
-        db.execute(
-            text(
-                """
-                UPDATE HealthLogs
-                SET
-                    steps = :steps,
-                    heart_rate_avg = :heart_rate_avg,
-                    sleep_hours = :sleep_hours,
-                    calories_burned = :calories_burned,
-                    exercise_minutes = :exercise_minutes,
-                    stress_level = :stress_level,
-                    goal = :goal,
-                    main_exercise = :main_exercise
-                WHERE log_id = :log_id
-                """
-            ),
-            {
-                "log_id": existing["log_id"],
-                "steps": entry.steps or 0,
-                "heart_rate_avg": entry.heart_rate_avg,
-                "sleep_hours": entry.sleep_hours,
-                "calories_burned": entry.calories_burned,
-                "exercise_minutes": entry.exercise_minutes or 0,
-                "stress_level": entry.stress_level,
-                "goal": goal_text,
-                "main_exercise": main_exercise,
-            },
-        )
-        db.commit()
-
-        row = db.execute(
-            text(
-                """
-                SELECT
-                    log_id, user_id, date, steps, heart_rate_avg, sleep_hours,
-                    calories_burned, exercise_minutes, stress_level,
-                    goal, created_at, main_exercise
-                FROM HealthLogs
-                WHERE log_id = :log_id
-                """
-            ),
-            {"log_id": existing["log_id"]},
-        ).mappings().first()
-
-    else:
-        # ------------------ INSERT ------------------
-        now = datetime.utcnow()
-        result = db.execute(
-            text(
-                """
-                INSERT INTO HealthLogs (
-                    user_id, date, steps, heart_rate_avg, sleep_hours,
-                    calories_burned, exercise_minutes, stress_level,
-                    goal, created_at, main_exercise
-                )
-                VALUES (
-                    :user_id, :date, :steps, :heart_rate_avg, :sleep_hours,
-                    :calories_burned, :exercise_minutes, :stress_level,
-                    :goal, :created_at, :main_exercise
-                )
-                """
-            ),
-            {
-                "user_id": entry.user_id,
-                "date": entry.date,
-                "steps": entry.steps or 0,
-                "heart_rate_avg": entry.heart_rate_avg,
-                "sleep_hours": entry.sleep_hours,
-                "calories_burned": entry.calories_burned,
-                "exercise_minutes": entry.exercise_minutes or 0,
-                "stress_level": entry.stress_level,
-                "goal": goal_text,
-                "created_at": now,
-                "main_exercise": main_exercise,
-            },
-        )
-        db.commit()
-
-        log_id = result.lastrowid
-
-        row = db.execute(
-            text(
-                """
-                SELECT
-                    log_id, user_id, date, steps, heart_rate_avg, sleep_hours,
-                    calories_burned, exercise_minutes, stress_level,
-                    goal, created_at, main_exercise
-                FROM HealthLogs
-                WHERE log_id = :log_id
-                """
-            ),
-            {"log_id": log_id},
-        ).mappings().first()
-
-    # Map DB row → HealthLogOut
+def _healthlog_out(row) -> HealthLogOut:
+    """Map a HealthLogs row to HealthLogOut."""
     return HealthLogOut(
         log_id=row["log_id"],
         user_id=row["user_id"],
@@ -202,14 +173,53 @@ def upsert_healthlog(entry: HealthLogCreate, db: Session = Depends(get_db)):
     )
 
 
+# ---------------------------------------------------------------------
+# POST /api/healthlogs  (create or update a daily log)
+# ---------------------------------------------------------------------
+@app.post("/api/healthlogs", response_model=HealthLogOut)
+async def upsert_healthlog(entry: HealthLogCreate, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(_upsert_healthlog, entry)
+
+
+def _upsert_healthlog(db: Session, entry: HealthLogCreate) -> HealthLogOut:
+    """
+    Upsert HealthLogs row by (user_id, date) in one statement.
+    Raw SQL only (no ORM models).
+    """
+
+    # entry may or may not have .goal depending on your current schema version
+    goal_text: Optional[str] = getattr(entry, "goal", None)
+    main_exercise: Optional[str] = getattr(entry, "main_exercise", None)
+    values = {
+        "user_id": entry.user_id,
+        "date": entry.date,
+        "created_at": datetime.utcnow(),
+        "steps": entry.steps or 0,
+        "heart_rate_avg": entry.heart_rate_avg,
+        "sleep_hours": entry.sleep_hours,
+        "calories_burned": entry.calories_burned,
+        "exercise_minutes": entry.exercise_minutes or 0,
+        "stress_level": entry.stress_level,
+        "goal": goal_text,
+        "main_exercise": main_exercise,
+    }
+
+    log_id = db.execute(_UPSERT_HEALTHLOG, values).lastrowid
+    db.commit()
+
+    row = db.execute(_HEALTHLOG_BY_ID, {"log_id": log_id}).mappings().first()
+    suggestions.mark_dirty(entry.user_id)
+    return _healthlog_out(row)
+
+
 # ---------------------------------------------------------------------
 # GET /api/healthlogs  (single day, used to pre-fill form)
 # ---------------------------------------------------------------------
 @app.get("/api/healthlogs")
-def get_healthlog_by_day(
+async def get_healthlog_by_day(
     user_id: int,
     date: date,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Called like:
@@ -218,83 +228,24 @@ def get_healthlog_by_day(
     If there is no log for that day, returns `null` with HTTP 200.
     """
 
-    row = db.execute(
-        text(
-            """
-            SELECT
-                log_id, user_id, date, steps, heart_rate_avg, sleep_hours,
-                calories_burned, exercise_minutes, stress_level,
-                goal, created_at, main_exercise
-            FROM HealthLogs
-            WHERE user_id = :user_id AND date = :date
-            ORDER BY created_at DESC
-            LIMIT 1
-            """
-        ),
-        {"user_id": user_id, "date": date},
-    ).mappings().first()
-
-    if not row:
-        return None
-
-    return HealthLogOut(
-        log_id=row["log_id"],
-        user_id=row["user_id"],
-        date=row["date"],
-        steps=row["steps"],
-        heart_rate_avg=row["heart_rate_avg"],
-        sleep_hours=row["sleep_hours"],
-        calories_burned=int(row["calories_burned"])
-        if row["calories_burned"] is not None
-        else None,
-        exercise_minutes=row["exercise_minutes"],
-        stress_level=row["stress_level"],
-        goal=row["goal"],
-        created_at=row["created_at"],
-        main_exercise=row["main_exercise"],
-    )
+    result = await db.execute(_HEALTHLOG_FOR_DAY, {"user_id": user_id, "date": date})
+    row = result.mappings().first()
+    return _healthlog_out(row) if row else None
 
 
 # ---------------------------------------------------------------------
 # GET /api/healthlogs/all  (debug helper)
 # ---------------------------------------------------------------------
 @app.get("/api/healthlogs/all", response_model=List[HealthLogOut])
-def list_healthlogs(db: Session = Depends(get_db)):
-    rows = db.execute(
-        text(
-            """
-            SELECT
-                log_id, user_id, date, steps, heart_rate_avg, sleep_hours,
-                calories_burned, exercise_minutes, stress_level,
-                goal, created_at, main_exercise
-            FROM HealthLogs
-            ORDER BY date DESC, log_id DESC
-            """
-        )
-    ).mappings().all()
-
-    return [
-        HealthLogOut(
-            log_id=row["log_id"],
-            user_id=row["user_id"],
-            date=row["date"],
-            steps=row["steps"],
-            heart_rate_avg=row["heart_rate_avg"],
-            sleep_hours=row["sleep_hours"],
-            calories_burned=int(row["calories_burned"])
-            if row["calories_burned"] is not None
-            else None,
-            exercise_minutes=row["exercise_minutes"],
-            stress_level=row["stress_level"],
-            goal=row["goal"],
-            created_at=row["created_at"],
-            main_exercise=row["main_exercise"],
-        )
-        for row in rows
-    ]
+async def list_healthlogs(db: AsyncSession = Depends(get_read_db)):
+    result = await db.execute(_ALL_HEALTHLOGS)
+    return [_healthlog_out(row) for row in result.mappings().all()]
+
+
+_SHOW_TABLES = statements.define("meta.show_tables", "SHOW TABLES")
 
 
 @app.get("/db-tables")
-def db_tables(db: Session = Depends(get_db)):
-    rows = db.execute(text("SHOW TABLES")).all()
+async def db_tables(db: AsyncSession = Depends(get_async_db)):
+    rows = (await db.execute(_SHOW_TABLES)).all()
     return {"tables": [r[0] for r in rows]}
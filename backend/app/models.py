@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, SmallInteger, Enum, Text, Float, Date, ForeignKey, DateTime, func, String  # type: ignore
+from sqlalchemy import Column, Integer, SmallInteger, Enum, Text, Float, Date, ForeignKey, DateTime, func, String, Index, UniqueConstraint  # type: ignore
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -20,7 +20,9 @@ class HealthLog(Base):
     created_at = Column(DateTime, server_default=func.now())
     main_exercise = Column(String(255))
 
+    # migrations/009_healthlogs_unique_day.sql
     __table_args__ = (
+        UniqueConstraint("user_id", "date", name="uq_healthlogs_user_date"),
         {'mysql_engine': 'InnoDB'},
     )
 
@@ -48,6 +50,11 @@ class Goal(Base):
     end_date = Column(Date)
     recurrence = Column(String(20))     # maps enum('none','daily','weekly','monthly')
 
+    # migrations/012_goals_user_index.sql
+    __table_args__ = (
+        Index("ix_goals_user", "user_id"),
+    )
+
 
 
 class ExerciseType(Base):
@@ -64,6 +71,13 @@ class Follower(Base):
     follower_user_id = Column(Integer, ForeignKey("Users.user_id"), nullable=False)
     since = Column(DateTime, server_default=func.now())
 
+    # migrations/007_follow_counts.sql and 008_followers_unique_edge.sql
+    __table_args__ = (
+        UniqueConstraint("user_id", "follower_user_id", name="uq_followers_edge"),
+        Index("ix_followers_following_since", "user_id", "since"),
+        Index("ix_followers_followers_since", "follower_user_id", "since"),
+    )
+
 class Profile(Base):
     __tablename__ = "Profiles"
     user_id = Column(Integer, ForeignKey("Users.user_id"), primary_key=True)
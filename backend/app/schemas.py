@@ -58,6 +58,17 @@ class User(UserBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AuthenticatedUser(User):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+
+class Identity(BaseModel):
+    user_id: int
+    username: Optional[str] = None
+
+
 class PingResponse(BaseModel):
     message: str
 
@@ -166,6 +177,9 @@ class CommunityPostImageBase(BaseModel):
     size_bytes: Optional[int] = None
     width: Optional[int] = None
     height: Optional[int] = None
+    thumbnail_path: Optional[str] = None
+    feed_path: Optional[str] = None
+    content_hash: Optional[str] = None
 
 
 class CommunityPostImageCreate(CommunityPostImageBase):
@@ -175,6 +189,8 @@ class CommunityPostImageCreate(CommunityPostImageBase):
 class CommunityPostImageOut(CommunityPostImageBase):
     image_id: int
     created_at: datetime
+    thumbnail_url: Optional[str] = None
+    feed_url: Optional[str] = None
 
 
 class CommunityPostCreate(BaseModel):
@@ -195,6 +211,20 @@ class CommunityPostOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CommunityFeedPage(BaseModel):
+    items: list[CommunityPostOut] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+class CommunitySearchHit(CommunityPostOut):
+    score: float
+
+
+class CommunitySearchPage(BaseModel):
+    items: list[CommunitySearchHit] = Field(default_factory=list)
+    next_offset: Optional[int] = None
+
+
 class PostCommentCreate(BaseModel):
     post_id: int
     user_id: int
@@ -210,6 +240,14 @@ class PostCommentOut(BaseModel):
     created_at: datetime
     model_config = ConfigDict(from_attributes=True)
 
+class ModerationBulkDelete(BaseModel):
+    post_ids: list[int] = Field(default_factory=list, max_length=10000)
+    comment_ids: list[int] = Field(default_factory=list, max_length=10000)
+
+
+class ModerationBulkDeleteOut(BaseModel):
+    deleted: dict[str, int]
+
 class PostReactionCreate(BaseModel):
     post_id: int
     user_id: int
@@ -242,6 +280,23 @@ class ProfileUpdate(ProfileBase):
 class ProfileOut(ProfileBase):
     user_id: int
 
+class FollowCountsOut(BaseModel):
+    user_id: int
+    followers: int
+    following: int
+
+
+class FollowListEntry(BaseModel):
+    user_id: int
+    username: str | None = None
+    since: datetime
+
+
+class FollowListPage(BaseModel):
+    items: list[FollowListEntry] = Field(default_factory=list)
+    next_cursor: str | None = None
+
+
 class ProfileWithFollowStatus(BaseModel):
     user_id: int
     username: str | None = None
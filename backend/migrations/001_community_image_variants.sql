@@ -0,0 +1,4 @@
+-- WebP renditions written by the background image pipeline (app/core/images.py).
+ALTER TABLE CommunityPostImages
+    ADD COLUMN thumbnail_path VARCHAR(512) NULL AFTER height,
+    ADD COLUMN feed_path VARCHAR(512) NULL AFTER thumbnail_path;
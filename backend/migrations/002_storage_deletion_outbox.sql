@@ -0,0 +1,10 @@
+-- Objects waiting to be removed from storage (app/core/deletion_queue.py).
+CREATE TABLE IF NOT EXISTS StorageDeletionOutbox (
+    outbox_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    storage_path VARCHAR(512) NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error VARCHAR(512) NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    KEY ix_outbox_due (next_attempt_at, attempts)
+);
@@ -0,0 +1,7 @@
+-- Content-addressed image storage: the SHA-256 of the original upload.
+-- Rows sharing a hash share the stored object; the object is deleted only
+-- once no row references it any more.
+ALTER TABLE CommunityPostImages
+    ADD COLUMN content_hash CHAR(64) NULL AFTER feed_path,
+    ADD INDEX ix_community_post_images_content_hash (content_hash),
+    ADD INDEX ix_community_post_images_storage_path (storage_path);
@@ -0,0 +1,3 @@
+-- Keyset pagination of a thread: WHERE post_id = ? ORDER BY created_at, comment_id.
+-- Also covers COUNT(*) per post.
+CREATE INDEX ix_post_comments_thread ON PostComments (post_id, created_at, comment_id);
@@ -0,0 +1,3 @@
+-- Full-text search over posts and comments (GET /api/community/search).
+ALTER TABLE CommunityPosts ADD FULLTEXT INDEX ft_community_posts_content (content);
+ALTER TABLE PostComments ADD FULLTEXT INDEX ft_post_comments_content (content);
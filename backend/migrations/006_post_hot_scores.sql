@@ -0,0 +1,9 @@
+-- Precomputed "hot" ranking (app/core/hot_feed.py), served by keyset on (score, post_id).
+CREATE TABLE IF NOT EXISTS PostHotScores (
+    post_id BIGINT PRIMARY KEY,
+    score DOUBLE NOT NULL,
+    reaction_count INT NOT NULL DEFAULT 0,
+    comment_count INT NOT NULL DEFAULT 0,
+    computed_at DATETIME NOT NULL,
+    KEY ix_post_hot_scores_rank (score, post_id)
+);
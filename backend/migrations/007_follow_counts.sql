@@ -0,0 +1,19 @@
+-- Follower/following counters maintained by the follow endpoints, read by primary key.
+CREATE TABLE IF NOT EXISTS FollowCounts (
+    user_id INT PRIMARY KEY,
+    followers_count INT NOT NULL DEFAULT 0,
+    following_count INT NOT NULL DEFAULT 0
+);
+
+INSERT INTO FollowCounts (user_id, following_count)
+SELECT user_id, COUNT(*) FROM Followers GROUP BY user_id
+ON DUPLICATE KEY UPDATE following_count = VALUES(following_count);
+
+INSERT INTO FollowCounts (user_id, followers_count)
+SELECT follower_user_id, COUNT(*) FROM Followers GROUP BY follower_user_id
+ON DUPLICATE KEY UPDATE followers_count = VALUES(followers_count);
+
+-- Keyset pagination of both lists: WHERE <side> = ? ORDER BY since DESC, follower_id DESC.
+-- InnoDB appends the primary key (follower_id) to secondary indexes.
+CREATE INDEX ix_followers_following_since ON Followers (user_id, since);
+CREATE INDEX ix_followers_followers_since ON Followers (follower_user_id, since);
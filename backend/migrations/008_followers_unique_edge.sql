@@ -0,0 +1,20 @@
+-- One row per (user_id, follower_user_id) so follows can use INSERT IGNORE.
+DELETE newer
+FROM Followers AS newer
+JOIN Followers AS older
+  ON older.user_id = newer.user_id
+ AND older.follower_user_id = newer.follower_user_id
+ AND older.follower_id < newer.follower_id;
+
+ALTER TABLE Followers ADD UNIQUE KEY uq_followers_edge (user_id, follower_user_id);
+
+-- counters backfilled by 007 may have counted duplicates
+UPDATE FollowCounts SET followers_count = 0, following_count = 0;
+
+INSERT INTO FollowCounts (user_id, following_count)
+SELECT user_id, COUNT(*) FROM Followers GROUP BY user_id
+ON DUPLICATE KEY UPDATE following_count = VALUES(following_count);
+
+INSERT INTO FollowCounts (user_id, followers_count)
+SELECT follower_user_id, COUNT(*) FROM Followers GROUP BY follower_user_id
+ON DUPLICATE KEY UPDATE followers_count = VALUES(followers_count);
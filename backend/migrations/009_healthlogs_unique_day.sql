@@ -0,0 +1,12 @@
+-- One log per user and day: the upsert in POST /api/healthlogs relies on it,
+-- and the dashboard, leaderboard and per-day reads seek on (user_id, date).
+-- Keep the latest inserted row (highest log_id) of any existing duplicates;
+-- log_id is unique, so this leaves exactly one row whatever created_at holds.
+DELETE older
+FROM HealthLogs AS older
+JOIN HealthLogs AS newer
+  ON newer.user_id = older.user_id
+ AND newer.date = older.date
+ AND newer.log_id > older.log_id;
+
+ALTER TABLE HealthLogs ADD UNIQUE KEY uq_healthlogs_user_date (user_id, date);
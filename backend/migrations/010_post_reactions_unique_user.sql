@@ -0,0 +1,35 @@
+-- One reaction per user and post: add_reaction and the reaction buffer flush
+-- replace a user's reaction by (post_id, user_id), and the per-post summary
+-- and per-user lookup seek on it. PostReactions has no row id to break ties
+-- on, so duplicated pairs are collapsed through a temporary table: the newest
+-- created_at wins (NULL only when every copy is NULL), and copies that share
+-- it keep one reaction_type. Safe to re-run if a previous attempt stopped
+-- after the DELETE.
+DROP TEMPORARY TABLE IF EXISTS PostReactionsKeep;
+
+CREATE TEMPORARY TABLE PostReactionsKeep AS
+SELECT r.post_id, r.user_id, MAX(r.reaction_type) AS reaction_type, latest.created_at
+FROM PostReactions AS r
+JOIN (
+    SELECT post_id, user_id, MAX(created_at) AS created_at
+    FROM PostReactions
+    GROUP BY post_id, user_id
+    HAVING COUNT(*) > 1
+) AS latest
+  ON latest.post_id = r.post_id
+ AND latest.user_id = r.user_id
+ AND latest.created_at <=> r.created_at
+GROUP BY r.post_id, r.user_id, latest.created_at;
+
+DELETE r
+FROM PostReactions AS r
+JOIN PostReactionsKeep AS keep_row
+  ON keep_row.post_id = r.post_id
+ AND keep_row.user_id = r.user_id;
+
+INSERT INTO PostReactions (post_id, user_id, reaction_type, created_at)
+SELECT post_id, user_id, reaction_type, created_at FROM PostReactionsKeep;
+
+DROP TEMPORARY TABLE PostReactionsKeep;
+
+ALTER TABLE PostReactions ADD UNIQUE KEY uq_post_reactions_post_user (post_id, user_id);
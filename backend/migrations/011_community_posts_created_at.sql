@@ -0,0 +1,3 @@
+-- Newest-first post listing and the hot feed's recompute window
+-- (WHERE created_at >= ?) read CommunityPosts in created_at order.
+CREATE INDEX ix_community_posts_created_at ON CommunityPosts (created_at);
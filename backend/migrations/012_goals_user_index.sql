@@ -0,0 +1,2 @@
+-- The dashboard reads a user's latest goal on every load (WHERE user_id = ?).
+CREATE INDEX ix_goals_user ON Goals (user_id);
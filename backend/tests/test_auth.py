@@ -0,0 +1,82 @@
+from pathlib import Path
+import sys
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+try:
+    from backend.app import async_crud, schemas
+    from backend.app.api import users
+    from backend.app.core import auth
+    from backend.app.database import get_async_db
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app import async_crud, schemas
+    from app.api import users
+    from app.core import auth
+    from app.database import get_async_db
+
+
+def test_tokens_round_trip_and_reject_tampering():
+    token = auth.issue_token(19, "ana")
+    assert auth.verify_token(token) == auth.Identity(user_id=19, username="ana")
+
+    with pytest.raises(auth.InvalidToken):
+        auth.verify_token(token[:-2] + ("A" if token[-2] != "A" else "B") + token[-1])
+    with pytest.raises(auth.InvalidToken):
+        auth.verify_token("garbage")
+
+
+def test_rotation_accepts_old_keys_and_expiry_is_enforced(monkeypatch):
+    old = auth._serializer_for(["old"])
+    token = old.dumps({"u": 7, "n": None})
+
+    monkeypatch.setattr(auth, "_serializer", auth._serializer_for(["new", "old"]))
+    assert auth.verify_token(token).user_id == 7
+    assert auth._serializer_for(["new"]).loads(auth.issue_token(7, None), max_age=60)["u"] == 7
+
+    monkeypatch.setattr(auth, "_serializer", auth._serializer_for(["new"]))
+    with pytest.raises(auth.InvalidToken):
+        auth.verify_token(token)
+
+    monkeypatch.setattr(auth, "TOKEN_TTL_SECONDS", -1)
+    with pytest.raises(auth.InvalidToken, match="expired"):
+        auth.verify_token(auth.issue_token(7, None))
+
+
+def test_service_routes_require_the_shared_secret(monkeypatch):
+    app = FastAPI()
+
+    @app.post("/internal", dependencies=[Depends(auth.service_caller)])
+    def internal():
+        return {"ok": True}
+
+    client = TestClient(app)
+    monkeypatch.setattr(auth, "SERVICE_SECRET", "")
+    assert client.post("/internal", headers={"X-Service-Secret": ""}).status_code == 403
+
+    monkeypatch.setattr(auth, "SERVICE_SECRET", "s3cret")
+    assert client.post("/internal").status_code == 403
+    assert client.post("/internal", headers={"X-Service-Secret": "wrong"}).status_code == 403
+    assert client.post("/internal", headers={"X-Service-Secret": "s3cret"}).json() == {"ok": True}
+
+
+def test_upsert_from_the_frontend_server_returns_a_session_token(monkeypatch):
+    async def fake_upsert(db, payload):
+        return schemas.User(user_id=5, email=payload.email, username=payload.username)
+
+    monkeypatch.setattr(async_crud, "upsert_user", fake_upsert)
+    monkeypatch.setattr(auth, "SERVICE_SECRET", "s3cret")
+    app = FastAPI()
+    app.include_router(users.router)
+    app.dependency_overrides[get_async_db] = lambda: None
+    client = TestClient(app)
+    body = {"email": "ana@example.com", "username": "ana", "password": "oauth-google"}
+
+    assert client.post("/api/users/upsert", json=body).status_code == 403
+    response = client.post("/api/users/upsert", json=body, headers={"X-Service-Secret": "s3cret"})
+    assert response.status_code == 200
+    assert auth.verify_token(response.json()["access_token"]) == auth.Identity(user_id=5, username="ana")
@@ -0,0 +1,132 @@
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+import pytest
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+try:
+    from backend.app.api import community
+    from backend.app.core import user_directory
+    from backend.app.database import get_read_db
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.api import community
+    from app.core import user_directory
+    from app.database import get_read_db
+
+
+def _thread(tmp_path) -> str:
+    url = f"sqlite:///{tmp_path / 'comments.db'}"
+    start = datetime(2025, 1, 1)
+    with create_engine(url).begin() as conn:
+        conn.execute(text("CREATE TABLE Users (user_id INTEGER PRIMARY KEY, username TEXT, email TEXT)"))
+        conn.execute(
+            text(
+                """
+                CREATE TABLE PostComments (
+                    comment_id INTEGER PRIMARY KEY, post_id INTEGER, user_id INTEGER,
+                    content TEXT, created_at TIMESTAMP
+                )
+                """
+            )
+        )
+        conn.execute(text("INSERT INTO Users (user_id, username) VALUES (1, 'ana'), (2, 'ben')"))
+        # ids 2 and 3 share a timestamp; id 4 is older than both; id 6 is another post
+        conn.execute(
+            text(
+                "INSERT INTO PostComments (comment_id, post_id, user_id, content, created_at) "
+                "VALUES (:id, :post, :user, :content, :at)"
+            ),
+            [
+                {"id": 1, "post": 1, "user": 1, "content": "first", "at": start},
+                {"id": 2, "post": 1, "user": 2, "content": "tie a", "at": start + timedelta(minutes=5)},
+                {"id": 3, "post": 1, "user": 1, "content": "tie b", "at": start + timedelta(minutes=5)},
+                {"id": 4, "post": 1, "user": 2, "content": "early", "at": start - timedelta(minutes=1)},
+                {"id": 5, "post": 1, "user": 1, "content": "last", "at": start + timedelta(hours=1)},
+                {"id": 6, "post": 2, "user": 1, "content": "elsewhere", "at": start},
+            ],
+        )
+    return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+
+def _read(url, calls):
+    async def run():
+        engine = create_async_engine(url)
+        results = []
+        async with AsyncSession(engine) as db:
+            for kwargs in calls:
+                response = Response()
+                try:
+                    comments = await community.get_comments(1, response=response, db=db, **kwargs)
+                except HTTPException as exc:
+                    results.append(exc)
+                    continue
+                results.append(([c.comment_id for c in comments], dict(response.headers), comments))
+        await engine.dispose()
+        return results
+
+    return asyncio.run(run())
+
+
+@pytest.fixture(autouse=True)
+def _own_directory(monkeypatch):
+    # usernames here must not leak into other tests through the shared cache
+    monkeypatch.setattr(user_directory, "directory", user_directory.UserDirectory(name="test_comment_pages"))
+
+
+def test_comments_are_paged_oldest_first_with_ties_broken_by_id(tmp_path):
+    url = _thread(tmp_path)
+
+    ids, cursor = [], None
+    while True:
+        ((page, headers, comments),) = _read(url, [{"limit": 2, "after": cursor}])
+        ids.extend(page)
+        if cursor is None:
+            assert headers["x-total-count"] == "5"
+            assert [c.username for c in comments] == ["ben", "ana"]
+        else:
+            assert "x-total-count" not in headers
+        cursor = headers.get("x-next-cursor")
+        if cursor is None:
+            break
+
+    assert ids == [4, 1, 2, 3, 5]
+
+
+def test_default_page_is_bounded_and_bad_cursors_are_rejected(tmp_path):
+    url = _thread(tmp_path)
+    with create_engine(url.replace("+aiosqlite", "")).begin() as conn:
+        conn.execute(
+            text("INSERT INTO PostComments (post_id, user_id, content, created_at) VALUES (2, 1, 'more', :at)"),
+            [{"at": datetime(2025, 2, 1) + timedelta(minutes=n)} for n in range(community.COMMENTS_PAGE_SIZE)],
+        )
+    engine = create_async_engine(url)
+
+    async def read_db():
+        async with AsyncSession(engine) as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(community.router)
+    app.dependency_overrides[get_read_db] = read_db
+
+    with TestClient(app) as client:
+        default = client.get("/api/community/posts/2/comments")
+        whole = client.get("/api/community/posts/1/comments")
+        bad = client.get("/api/community/posts/1/comments", params={"after": "not-a-cursor"})
+
+    assert len(default.json()) == community.COMMENTS_PAGE_SIZE
+    assert "x-next-cursor" in default.headers
+    assert default.headers["x-total-count"] == str(community.COMMENTS_PAGE_SIZE + 1)
+    # a thread that fits in one page is counted without a COUNT query
+    assert [c["comment_id"] for c in whole.json()] == [4, 1, 2, 3, 5]
+    assert whole.headers["x-total-count"] == "5" and "x-next-cursor" not in whole.headers
+    assert bad.status_code == 400
+    asyncio.run(engine.dispose())
@@ -0,0 +1,45 @@
+from pathlib import Path
+import sys
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+try:
+    from backend.app.core import db_pool, metrics
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.core import db_pool, metrics
+
+
+def test_pool_events_are_counted_and_exposed(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_pool, "POOL_SIZE", 1)
+    monkeypatch.setattr(db_pool, "MAX_OVERFLOW", 1)
+    monkeypatch.setattr(db_pool, "POOL_TIMEOUT", 0.05)
+    monkeypatch.setattr(db_pool, "POOL_PRE_PING", False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", **db_pool.engine_options())
+    db_pool.instrument(engine, "test")
+
+    first = engine.connect()
+    second = engine.connect()  # beyond pool_size: an overflow connection
+    assert first.execute(text("SELECT 1")).scalar_one() == 1
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    second.invalidate()
+    second.close()
+    first.close()
+    engine.dispose()
+    with engine.connect() as third:  # the recreated pool is still instrumented
+        third.execute(text("SELECT 1"))
+
+    snap = metrics.snapshot()
+    assert snap["counters"]["db_pool.test.checkouts"] == 3
+    assert snap["counters"]["db_pool.test.overflow_checkouts"] == 1
+    assert snap["counters"]["db_pool.test.timeouts"] == 1
+    assert snap["counters"]["db_pool.test.invalidations"] == 1
+    assert snap["histograms"]["db_pool.test.checkout_seconds"]["count"] == 4
+    assert snap["gauges"]["db_pool.test.checked_out"] == 0
+    status = db_pool.status()["test"]
+    assert (status["pool_class"], status["pool_size"], status["max_overflow"]) == ("TimedQueuePool", 1, 1)
+    assert (status["timeout"], status["pre_ping"], status["checked_out"]) == (0.05, False, 0)
@@ -0,0 +1,134 @@
+from pathlib import Path
+import sys
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+try:
+    from backend.app.core import deletion_queue
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.core import deletion_queue
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE StorageDeletionOutbox (
+                    outbox_id INTEGER PRIMARY KEY,
+                    storage_path TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at TIMESTAMP NOT NULL,
+                    last_error TEXT,
+                    created_at TIMESTAMP
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                """
+                CREATE TABLE CommunityPostImages (
+                    image_id INTEGER PRIMARY KEY,
+                    post_id INTEGER NOT NULL,
+                    storage_path TEXT NOT NULL,
+                    thumbnail_path TEXT,
+                    feed_path TEXT,
+                    content_hash TEXT
+                )
+                """
+            )
+        )
+    return Session(engine)
+
+
+def test_drain_deletes_successes_and_backs_off_failures(monkeypatch):
+    deleted = []
+
+    def fake_delete(paths):
+        paths = list(paths)
+        deleted.extend(paths)
+        return {"bad.jpg": "HTTP 503"}
+
+    monkeypatch.setattr(deletion_queue.storage, "delete_post_images", fake_delete)
+    monkeypatch.setattr(deletion_queue, "DELETE_DELAY_SECONDS", 0)
+
+    with _session() as db:
+        deletion_queue.enqueue_paths(db, ["ok.jpg", "bad.jpg", "ok.jpg", None])
+        db.commit()
+
+        assert deletion_queue.drain_once(db) == 2
+        assert sorted(deleted) == ["bad.jpg", "ok.jpg"]
+
+        rows = db.execute(
+            text("SELECT storage_path, attempts, last_error FROM StorageDeletionOutbox")
+        ).all()
+        assert rows == [("bad.jpg", 1, "HTTP 503")]
+
+        # the failed row is not due again until its backoff expires
+        assert deletion_queue.drain_once(db) == 0
+
+
+def test_shared_objects_are_deleted_only_with_their_last_reference(monkeypatch):
+    deleted = []
+    monkeypatch.setattr(
+        deletion_queue.storage,
+        "delete_post_images",
+        lambda paths: deleted.extend(paths) or {},
+    )
+    monkeypatch.setattr(deletion_queue, "DELETE_DELAY_SECONDS", 0)
+
+    digest = "ab" * 32
+    shared = f"community-images/sha256/ab/{digest}.jpg"
+    thumb = f"community-images/sha256/ab/{digest}_thumb.webp"
+
+    with _session() as db:
+        db.execute(
+            text(
+                """
+                INSERT INTO CommunityPostImages (post_id, storage_path, thumbnail_path, content_hash)
+                VALUES (1, :path, :thumb, :digest), (2, :path, :thumb, :digest)
+                """
+            ),
+            {"path": shared, "thumb": thumb, "digest": digest},
+        )
+
+        deletion_queue.enqueue_post_images(db, [1])
+        db.execute(text("DELETE FROM CommunityPostImages WHERE post_id = 1"))
+        assert db.execute(text("SELECT COUNT(*) FROM StorageDeletionOutbox")).scalar() == 0
+
+        # a row queued while the object was still shared is resolved, not deleted
+        deletion_queue.enqueue_paths(db, [shared])
+        assert deletion_queue.drain_once(db) == 1
+        assert deleted == []
+
+        deletion_queue.enqueue_post_images(db, [2])
+        db.execute(text("DELETE FROM CommunityPostImages WHERE post_id = 2"))
+        assert deletion_queue.drain_once(db) == 2
+        assert sorted(deleted) == sorted([shared, thumb])
+
+
+def test_a_claimed_batch_is_skipped_by_other_drainers(monkeypatch):
+    seen_by_other_worker = []
+
+    def fake_delete(paths):
+        paths = list(paths)
+        # another worker polling while this batch is being deleted
+        seen_by_other_worker.append(deletion_queue.drain_once(db))
+        return {}
+
+    monkeypatch.setattr(deletion_queue.storage, "delete_post_images", fake_delete)
+    monkeypatch.setattr(deletion_queue, "DELETE_DELAY_SECONDS", 0)
+
+    with _session() as db:
+        deletion_queue.enqueue_paths(db, ["a.jpg", "b.jpg"])
+        db.commit()
+
+        assert deletion_queue.drain_once(db) == 2
+        assert seen_by_other_worker == [0]
+        assert db.execute(text("SELECT COUNT(*) FROM StorageDeletionOutbox")).scalar() == 0
@@ -0,0 +1,38 @@
+import asyncio
+from pathlib import Path
+import sys
+import threading
+
+try:
+    from backend.app.core.events import EventBroker
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.core.events import EventBroker
+
+
+def test_publish_from_threads_with_drop_oldest_backpressure():
+    async def scenario():
+        broker = EventBroker(queue_size=3)
+        subscription = broker.subscribe()
+
+        def publish_many():
+            for n in range(5):
+                broker.publish("post_created", {"n": n})
+
+        thread = threading.Thread(target=publish_many)
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0)
+
+        batch = await subscription.next_batch(timeout=1)
+        assert [event.data["n"] for event in batch] == [2, 3, 4]
+        assert subscription.dropped == 2
+        assert batch[0].to_sse().startswith("id: 3\nevent: post_created\ndata: {")
+
+        assert await subscription.next_batch(timeout=0.01) == []
+        broker.unsubscribe(subscription)
+        assert not broker.has_subscribers
+
+    asyncio.run(scenario())
@@ -0,0 +1,149 @@
+import asyncio
+from datetime import datetime
+from pathlib import Path
+import sys
+
+from pymysql.cursors import RE_INSERT_VALUES
+from sqlalchemy.dialects.mysql import pymysql as mysql_pymysql
+
+try:
+    from backend.app.api import followers
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.api import followers
+
+
+class _Result:
+    def __init__(self, rows=(), rowcount=0):
+        self.rows, self.rowcount = list(rows), rowcount
+
+    def scalars(self):
+        return iter(self.rows)
+
+
+class _FollowSession:
+    """Followers and FollowCounts as MySQL would keep them, keyed by statement name.
+
+    ``racing`` holds targets another request follows between this request's
+    SELECT and its INSERT. ``statements`` records every statement name sent.
+    """
+
+    def __init__(self, edges=(), racing=()):
+        self.since = dict.fromkeys(edges, datetime(2020, 1, 1))
+        self.racing = set(racing)
+        self.counts = {}
+        self.commits = 0
+        self.statements = []
+
+    @property
+    def edges(self):
+        return set(self.since)
+
+    async def execute(self, statement, params):
+        name = statement.get_execution_options()["statement_name"]
+        self.statements.append(name)
+        if name == "followers.existing_edges":
+            user_id = params["user_id"]
+            return _Result(target for target in params["targets"] if (user_id, target) in self.since)
+        if name == "followers.insert_edges":
+            inserted = 0
+            for row in params:
+                assert row["since"].microsecond == 0
+                edge = (row["user_id"], row["follower_user_id"])
+                if edge[1] in self.racing:
+                    self.since[edge] = datetime(2020, 1, 1)
+                if edge not in self.since:
+                    self.since[edge] = row["since"]
+                    inserted += 1
+            return _Result(rowcount=inserted)
+        if name == "followers.edges_since":
+            user_id = params["user_id"]
+            return _Result(
+                target
+                for target in params["targets"]
+                if self.since.get((user_id, target)) == params["since"]
+            )
+        if name == "followers.delete_edges":
+            gone = {(params["user_id"], target) for target in params["targets"]} & self.edges
+            for edge in gone:
+                del self.since[edge]
+            return _Result(rowcount=len(gone))
+        if name == "follow_counts.bump":
+            self._bump(params["user_id"], params["followers"], params["following"])
+            return _Result()
+        if name == "follow_counts.add_followers":
+            for row in params:
+                self._bump(row["user_id"], row["followers"], 0)
+            return _Result()
+        if name == "follow_counts.drop_followers":
+            for target_id in params["targets"]:
+                if target_id in self.counts:
+                    self._bump(target_id, -1, 0)
+            return _Result()
+        raise AssertionError(f"unexpected statement {name}")
+
+    def _bump(self, user_id, followers_delta, following_delta):
+        followers_count, following_count = self.counts.get(user_id, (0, 0))
+        self.counts[user_id] = (max(followers_count + followers_delta, 0), max(following_count + following_delta, 0))
+
+    async def commit(self):
+        self.commits += 1
+
+
+def _batch(db, **kwargs):
+    out = asyncio.run(followers.follow_batch(followers.FollowBatch(user_id=1, **kwargs), db=db))
+    return {result.target_id: result.status for result in out.results}
+
+
+def test_batch_mixes_follows_and_unfollows_and_moves_counters():
+    db = _FollowSession(edges={(1, 3), (1, 4)})
+    db.counts = {1: (0, 2), 3: (1, 0), 4: (1, 0)}
+
+    statuses = _batch(db, follow=[2, 3, 2], unfollow=[4, 5])
+
+    assert statuses == {2: "followed", 3: "already following", 4: "unfollowed", 5: "not following"}
+    assert db.edges == {(1, 2), (1, 3)}
+    assert db.counts == {1: (0, 2), 2: (1, 0), 3: (1, 0), 4: (0, 0)}
+    assert db.commits == 1
+    # no re-read: every new edge was inserted
+    assert "followers.edges_since" not in db.statements
+
+
+def test_a_large_batch_takes_a_fixed_number_of_statements():
+    db = _FollowSession()
+
+    statuses = _batch(db, follow=list(range(2, 502)))
+
+    assert set(statuses.values()) == {"followed"} and len(db.edges) == 500
+    assert db.counts[1] == (0, 500) and db.counts[501] == (1, 0)
+    assert db.statements == [
+        "followers.existing_edges",
+        "followers.insert_edges",
+        "follow_counts.bump",
+        "follow_counts.add_followers",
+    ]
+
+
+def test_executemany_statements_fold_into_one_multi_row_insert():
+    dialect = mysql_pymysql.dialect()
+    for statement in (followers._INSERT_EDGES, followers._ADD_FOLLOWERS):
+        sql = str(statement.compile(dialect=dialect))
+        assert RE_INSERT_VALUES.match(sql), sql
+
+
+def test_self_and_conflicting_targets_are_skipped_without_writes():
+    db = _FollowSession()
+
+    assert _batch(db, follow=[1, 2], unfollow=[2]) == {1: "skipped", 2: "skipped"}
+    assert db.edges == set() and db.counts == {} and db.commits == 0
+
+
+def test_edges_won_by_a_concurrent_request_are_not_counted_twice():
+    db = _FollowSession(racing={3})
+
+    assert _batch(db, follow=[2, 3]) == {2: "followed", 3: "already following"}
+    assert db.edges == {(1, 2), (1, 3)}
+    assert db.counts == {1: (0, 1), 2: (1, 0)}
+    assert "followers.edges_since" in db.statements
@@ -0,0 +1,108 @@
+from pathlib import Path
+import sys
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+try:
+    from backend.app.core import follow_graph
+    from backend.app.core.follow_graph import FollowGraph
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.core import follow_graph
+    from app.core.follow_graph import FollowGraph
+
+
+def _graph():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE Followers (user_id INTEGER, follower_user_id INTEGER)"))
+        # 1 follows 2, 3; 2 follows 1, 4; 3 follows 4, 5; duplicate row for 1 -> 2
+        conn.execute(
+            text("INSERT INTO Followers VALUES (1, 2), (1, 3), (2, 1), (2, 4), (3, 4), (3, 5), (1, 2)")
+        )
+    graph = FollowGraph()
+    with Session(engine) as db:
+        assert graph.load(db) == 6
+    return graph
+
+
+def test_neighbours_mutuals_and_two_hop():
+    graph = _graph()
+
+    assert graph.following(1).tolist() == [2, 3]
+    assert graph.followers(4).tolist() == [2, 3]
+    assert graph.following(99).tolist() == []
+    assert graph.is_following(1, 3) and not graph.is_following(3, 1)
+    assert graph.mutuals(1).tolist() == [2]
+    # 4 is followed by both 2 and 3; 1 itself is never suggested
+    assert graph.two_hop(1, 10) == [(4, 2), (5, 1)]
+    assert graph._following.indices.dtype == np.int32
+
+
+def test_incremental_writes_and_compaction(monkeypatch):
+    graph = _graph()
+
+    graph.add(5, 1)
+    graph.remove(1, 3)
+    graph.add(1, 3)
+    graph.remove(2, 4)
+    assert graph.following(5).tolist() == [1]
+    assert graph.followers(1).tolist() == [2, 5]
+    assert graph.followers(4).tolist() == [3]
+    assert graph.edge_count == 6
+
+    monkeypatch.setattr(follow_graph, "COMPACT_EDGES", 1)
+    graph.add(4, 1)
+    assert graph._overlay_size == 0
+    assert graph.followers(1).tolist() == [2, 4, 5]
+    assert graph.following(1).tolist() == [2, 3]
+    assert graph.following(2).tolist() == [1]
+
+
+def test_offsets_are_sized_by_present_ids_not_the_largest():
+    graph = FollowGraph()
+    big = 2_000_000_000
+    graph.build(np.array([big, 7, big], dtype=np.int64), np.array([7, big, 3], dtype=np.int64))
+
+    # two sources and three targets, not one slot per id up to 2e9
+    assert len(graph._following.indptr) == 3 and len(graph._followers.indptr) == 4
+    assert graph.following(big).tolist() == [3, 7]
+    assert graph.followers(7).tolist() == [big]
+    assert graph.following(8).tolist() == [] and graph.following(big + 1).tolist() == []
+
+    graph.remove(big, 3)
+    graph._compact()
+    assert graph.following(big).tolist() == [7] and graph.edge_count == 2
+
+
+def test_concurrent_first_reads_share_one_load(monkeypatch):
+    graph = FollowGraph()
+    monkeypatch.setattr(follow_graph, "graph", graph)
+    loads = []
+
+    def slow_reload():
+        loads.append(1)
+        time.sleep(0.05)
+        graph.build(np.array([1], dtype=np.int64), np.array([2], dtype=np.int64))
+
+    monkeypatch.setattr(follow_graph, "_reload", slow_reload)
+    start = threading.Barrier(8)
+
+    def read():
+        start.wait()
+        follow_graph.ensure_loaded()
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert graph.following(1).tolist() == [2]
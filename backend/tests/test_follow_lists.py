@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+try:
+    from backend.app.api import followers
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.api import followers
+
+
+def test_followers_are_paged_newest_first_with_ties_broken_by_id(tmp_path):
+    url = f"sqlite:///{tmp_path / 'follows.db'}"
+    engine = create_engine(url)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE Users (user_id INTEGER PRIMARY KEY, username TEXT, email TEXT)"))
+        conn.execute(
+            text(
+                """
+                CREATE TABLE Followers (
+                    follower_id INTEGER PRIMARY KEY, user_id INTEGER,
+                    follower_user_id INTEGER, since TIMESTAMP
+                )
+                """
+            )
+        )
+        conn.execute(text("INSERT INTO Users (user_id, username) VALUES (1, 'me'), (2, 'b'), (3, 'c'), (4, 'd'), (5, 'e')"))
+        conn.execute(
+            text("INSERT INTO Followers (user_id, follower_user_id, since) VALUES (:u, 1, :since)"),
+            [
+                {"u": 2, "since": start},
+                {"u": 3, "since": start + timedelta(days=1)},
+                {"u": 4, "since": start + timedelta(days=1)},
+                {"u": 5, "since": start + timedelta(days=2)},
+            ],
+        )
+        conn.execute(text("INSERT INTO Followers (user_id, follower_user_id, since) VALUES (1, 5, :s)"), {"s": start})
+
+    async def read_pages():
+        async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+        seen = []
+        cursor = None
+        async with AsyncSession(async_engine) as db:
+            while True:
+                page = await followers.list_followers(1, limit=2, cursor=cursor, db=db)
+                seen.extend(entry.username for entry in page.items)
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+            following = await followers.list_following(1, limit=10, cursor=None, db=db)
+        await async_engine.dispose()
+        return seen, following
+
+    seen, following = asyncio.run(read_pages())
+
+    assert seen == ["e", "d", "c", "b"]
+    assert [entry.user_id for entry in following.items] == [5]
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+from sqlalchemy import create_engine, text
+
+try:
+    from backend.app.core import hot_feed
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.core import hot_feed
+
+
+def _datetime_0(value: datetime) -> datetime:
+    """How MySQL stores a value in a DATETIME column without fractional digits."""
+    return value.replace(microsecond=0) + timedelta(seconds=round(value.microsecond / 1_000_000))
+
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class _HotScoresSession:
+    """PostHotScores as MySQL keeps it: computed_at rounded to whole seconds."""
+
+    def __init__(self, posts):
+        self.posts = posts
+        self.scores = {}
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if sql.lstrip().startswith("SELECT"):
+            rows = [post for post in self.posts if post["created_at"] >= params["since"]]
+            return _Rows(rows)
+        if "INSERT INTO PostHotScores" in sql:
+            for row in params:
+                self.scores[row["post_id"]] = {**row, "computed_at": _datetime_0(row["computed_at"])}
+        elif "DELETE FROM PostHotScores" in sql:
+            # the bound value keeps its fraction in the comparison
+            self.scores = {key: row for key, row in self.scores.items() if not row["computed_at"] < params["now"]}
+
+    def commit(self):
+        pass
+
+
+def test_recompute_keeps_the_scores_it_writes(monkeypatch):
+    clock = [datetime(2025, 3, 1, 12, 0, 0, 300_000)]
+
+    class _Clock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return clock[0]
+
+    monkeypatch.setattr(hot_feed, "datetime", _Clock)
+    posts = [
+        {"post_id": 1, "created_at": datetime(2025, 3, 1, 11), "reaction_count": 3, "comment_count": 1},
+        {"post_id": 2, "created_at": datetime(2025, 2, 28), "reaction_count": 0, "comment_count": 0},
+    ]
+    db = _HotScoresSession(posts)
+
+    assert hot_feed.recompute(db) == 2
+    assert set(db.scores) == {1, 2}
+
+    clock[0] += timedelta(seconds=60, microseconds=100_000)
+    posts.pop()  # deleted between runs
+    assert hot_feed.recompute(db) == 1
+    assert set(db.scores) == {1}
+    assert db.scores[1]["score"] > 0
+
+
+class _SQLiteReads(_HotScoresSession):
+    """Runs the scoring SELECT on SQLite; PostHotScores writes stay in memory."""
+
+    def __init__(self, conn):
+        super().__init__(posts=[])
+        self.conn = conn
+
+    def execute(self, statement, params=None):
+        if str(statement).lstrip().startswith("SELECT"):
+            rows = self.conn.execute(statement, params).mappings().all()
+            # SQLite hands DATETIME back as text
+            return _Rows([{**row, "created_at": datetime.fromisoformat(row["created_at"])} for row in rows])
+        return super().execute(statement, params)
+
+
+def test_counts_cover_only_posts_inside_the_window():
+    engine = create_engine("sqlite://")
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE CommunityPosts (post_id INTEGER PRIMARY KEY, created_at DATETIME)"))
+        conn.execute(text("CREATE TABLE PostReactions (post_id INTEGER, user_id INTEGER)"))
+        conn.execute(text("CREATE TABLE PostComments (comment_id INTEGER PRIMARY KEY, post_id INTEGER)"))
+        conn.execute(
+            text("INSERT INTO CommunityPosts VALUES (1, :fresh), (2, :old)"),
+            {"fresh": now - timedelta(hours=1), "old": now - timedelta(days=hot_feed.WINDOW_DAYS + 1)},
+        )
+        conn.execute(text("INSERT INTO PostReactions VALUES (1, 7), (1, 8), (2, 7)"))
+        conn.execute(text("INSERT INTO PostComments (post_id) VALUES (1), (2), (2)"))
+
+    with engine.connect() as conn:
+        db = _SQLiteReads(conn)
+        assert hot_feed.recompute(db) == 1
+
+    assert (db.scores[1]["reaction_count"], db.scores[1]["comment_count"]) == (2, 1)
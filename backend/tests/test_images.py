@@ -0,0 +1,35 @@
+from io import BytesIO
+from pathlib import Path
+import sys
+
+from PIL import Image
+
+try:
+    from backend.app.core.images import render_variants
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.core.images import render_variants
+
+
+def _png(width, height, mode="RGB"):
+    buffer = BytesIO()
+    Image.new(mode, (width, height)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_render_variants_downscales_and_keeps_dimensions():
+    width, height, variants = render_variants(_png(2000, 1000), {"thumb": 320, "feed": 1080})
+    assert (width, height) == (2000, 1000)
+    with Image.open(BytesIO(variants["thumb"])) as thumb:
+        assert thumb.format == "WEBP"
+        assert thumb.size == (320, 160)
+    with Image.open(BytesIO(variants["feed"])) as feed:
+        assert feed.size == (1080, 540)
+
+
+def test_render_variants_never_upscales():
+    _, _, variants = render_variants(_png(200, 100, "P"), {"thumb": 320})
+    with Image.open(BytesIO(variants["thumb"])) as thumb:
+        assert thumb.size == (200, 100)
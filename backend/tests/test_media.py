@@ -0,0 +1,132 @@
+from pathlib import Path
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+try:
+    from backend.app.api import media
+    from backend.app.core import media_cache, storage_backends
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.api import media
+    from app.core import media_cache, storage_backends
+
+
+def _client(tmp_path, monkeypatch, max_bytes=1024):
+    store = storage_backends.LocalBackend(tmp_path / "store", "http://testserver/media")
+    cache = media_cache.DiskLRUCache(tmp_path / "cache", max_bytes=max_bytes, max_entry_bytes=512)
+    monkeypatch.setattr(storage_backends, "_backend", store)
+    monkeypatch.setattr(media_cache, "_cache", cache)
+    app = FastAPI()
+    app.include_router(media.router)
+    return TestClient(app), store, cache
+
+
+def test_media_range_etag_and_cache(tmp_path, monkeypatch):
+    client, store, cache = _client(tmp_path, monkeypatch)
+    name = "community-images/sha256/ab/" + "ab" * 32 + ".png"
+    store.put(name, b"0123456789", "image/png")
+
+    r = client.get(f"/media/{name}")
+    assert r.status_code == 200
+    assert r.content == b"0123456789"
+    assert r.headers["content-type"] == "image/png"
+    assert r.headers["etag"] == f'"{"ab" * 32}.png"'
+    assert "immutable" in r.headers["cache-control"]
+    assert cache.get(name) is not None
+
+    # served from the cache even once the origin object is gone
+    store.delete([name])
+    r = client.get(f"/media/{name}", headers={"Range": "bytes=2-4"})
+    assert r.status_code == 206
+    assert r.content == b"234"
+
+    r = client.get(f"/media/{name}", headers={"If-None-Match": f'"{"ab" * 32}.png"'})
+    assert r.status_code == 304
+
+    assert client.get("/media/community-images/missing.png").status_code == 404
+    assert client.get("/media/elsewhere/secret.png").status_code == 404
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = media_cache.DiskLRUCache(tmp_path, max_bytes=10, max_entry_bytes=8)
+    cache.put("a", [b"aaaa"])
+    cache.put("b", [b"bbbb"])
+    assert cache.get("a") is not None
+    cache.put("c", [b"cccc"])
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.size == 8
+    assert cache.put("big", [b"x" * 5, b"x" * 5]) is None
+
+    # the index is rebuilt from disk
+    assert media_cache.DiskLRUCache(tmp_path, max_bytes=10, max_entry_bytes=8).size == 8
+
+
+def test_oversize_objects_serve_ranges_from_storage(tmp_path, monkeypatch):
+    client, store, cache = _client(tmp_path, monkeypatch)
+    name = "community-images/videos/clip.mp4"
+    body = bytes(range(256)) * 4  # 1024 bytes, over the 512-byte entry limit
+    store.put(name, body, "video/mp4")
+    fetched = []
+    stream = store.stream
+    monkeypatch.setattr(store, "stream", lambda *args, **kwargs: fetched.append(args) or stream(*args, **kwargs))
+
+    r = client.get(f"/media/{name}", headers={"Range": "bytes=100-199"})
+    assert r.status_code == 206
+    assert r.content == body[100:200]
+    assert r.headers["content-range"] == "bytes 100-199/1024"
+    assert fetched == [(name, 100, 199)]
+
+    r = client.get(f"/media/{name}", headers={"Range": "bytes=-24"})
+    assert (r.status_code, r.content) == (206, body[-24:])
+    assert client.get(f"/media/{name}", headers={"Range": "bytes=2000-"}).status_code == 416
+
+    r = client.get(f"/media/{name}")
+    assert (r.status_code, r.content) == (200, body)
+    assert r.headers["accept-ranges"] == "bytes"
+    assert cache.get(name) is None
+
+
+def test_cached_file_evicted_before_the_response_is_fetched_again(tmp_path, monkeypatch):
+    client, store, cache = _client(tmp_path, monkeypatch)
+    name = "community-images/sha256/cd/" + "cd" * 32 + ".png"
+    store.put(name, b"abcdef", "image/png")
+    cache.put(name, [b"abcdef"])
+    get = cache.get
+
+    def evicted_after_lookup(object_name):
+        path = get(object_name)
+        if path is not None and not getattr(cache, "_raced", False):
+            cache._raced = True
+            path.unlink()
+        return path
+
+    monkeypatch.setattr(cache, "get", evicted_after_lookup)
+    r = client.get(f"/media/{name}")
+    assert (r.status_code, r.content) == (200, b"abcdef")
+
+
+def test_variants_have_their_own_etag_and_deleted_objects_are_not_revalidated(tmp_path, monkeypatch):
+    client, store, cache = _client(tmp_path, monkeypatch)
+    digest = "cd" * 32
+    original = f"community-images/sha256/cd/{digest}.jpg"
+    thumb = f"community-images/sha256/cd/{digest}_thumb.webp"
+    store.put(original, b"original", "image/jpeg")
+    store.put(thumb, b"thumb", "image/webp")
+
+    original_etag = client.get(f"/media/{original}").headers["etag"]
+    # a cached original does not answer for its thumbnail
+    r = client.get(f"/media/{thumb}", headers={"If-None-Match": original_etag})
+    assert (r.status_code, r.content) == (200, b"thumb")
+    assert r.headers["etag"] != original_etag
+
+    # never served, so not cached: revalidation asks storage whether it still exists
+    feed = f"community-images/sha256/cd/{digest}_feed.webp"
+    assert client.get(f"/media/{feed}", headers={"If-None-Match": media._etag(feed)}).status_code == 404
+    store.put(feed, b"feed", "image/webp")
+    assert client.get(f"/media/{feed}", headers={"If-None-Match": media._etag(feed)}).status_code == 304
@@ -0,0 +1,41 @@
+from pathlib import Path
+import sys
+
+from sqlalchemy import create_engine, inspect, text
+
+try:
+    from backend.app.core import migrations
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.core import migrations
+
+
+def test_migrations_apply_in_order_once_and_can_be_baselined(tmp_path):
+    (tmp_path / "001_create_things.sql").write_text(
+        "-- a table; with a comment\nCREATE TABLE Things (thing_id INTEGER PRIMARY KEY, name TEXT);\n"
+        "INSERT INTO Things (name) VALUES ('a');\n"
+    )
+    (tmp_path / "002_index_things.sql").write_text("CREATE INDEX ix_things_name ON Things (name);\n")
+    (tmp_path / "003_more_things.sql").write_text("INSERT INTO Things (name) VALUES ('b');\n")
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+
+    assert [m.version for m in migrations.migrate(engine, tmp_path, target=2)] == [1, 2]
+    assert [m.version for m in migrations.migrate(engine, tmp_path)] == [3]
+    assert migrations.migrate(engine, tmp_path) == []
+    assert [ix["name"] for ix in inspect(engine).get_indexes("Things")] == ["ix_things_name"]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM Things")).scalar_one() == 2
+
+    fresh = create_engine(f"sqlite:///{tmp_path / 'existing.db'}")
+    with fresh.begin() as conn:
+        conn.execute(text("CREATE TABLE Things (thing_id INTEGER PRIMARY KEY, name TEXT)"))
+    assert [m.version for m in migrations.baseline(fresh, 2, tmp_path)] == [1, 2]
+    assert [m.version for m in migrations.migrate(fresh, tmp_path)] == [3]
+
+
+def test_repository_migrations_are_numbered_uniquely():
+    found = migrations.discover()
+    assert [m.version for m in found] == sorted({m.version for m in found})
+    assert all(m.statements() for m in found)
@@ -0,0 +1,63 @@
+from pathlib import Path
+import sys
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+try:
+    from backend.app import crud
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app import crud
+
+TABLES = {
+    "CommunityPosts": "post_id INTEGER PRIMARY KEY, user_id INTEGER",
+    "PostComments": "comment_id INTEGER PRIMARY KEY, post_id INTEGER",
+    "PostReactions": "post_id INTEGER, user_id INTEGER",
+    "PostHotScores": "post_id INTEGER PRIMARY KEY",
+    "CommunityPostImages": (
+        "image_id INTEGER PRIMARY KEY, post_id INTEGER, storage_path TEXT, "
+        "thumbnail_path TEXT, feed_path TEXT, content_hash TEXT"
+    ),
+    "StorageDeletionOutbox": (
+        "outbox_id INTEGER PRIMARY KEY, storage_path TEXT, attempts INTEGER DEFAULT 0, "
+        "next_attempt_at TIMESTAMP, last_error TEXT, created_at TIMESTAMP"
+    ),
+}
+
+
+def test_bulk_delete_removes_posts_comments_and_queues_unshared_images(monkeypatch):
+    monkeypatch.setattr(crud, "BULK_DELETE_CHUNK", 2)
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for table, columns in TABLES.items():
+            conn.execute(text(f"CREATE TABLE {table} ({columns})"))
+        conn.execute(text("INSERT INTO CommunityPosts VALUES (1, 9), (2, 9), (3, 9), (4, 7)"))
+        conn.execute(text("INSERT INTO PostComments VALUES (10, 1), (11, 2), (12, 4), (13, 4)"))
+        conn.execute(text("INSERT INTO PostReactions VALUES (1, 7), (3, 7), (4, 9)"))
+        conn.execute(text("INSERT INTO PostHotScores VALUES (1), (4)"))
+        # 1 and 3 share an object across chunks; 4 shares one with a surviving post
+        conn.execute(
+            text(
+                """
+                INSERT INTO CommunityPostImages (post_id, storage_path) VALUES
+                    (1, 'a.jpg'), (3, 'a.jpg'), (2, 'b.jpg'), (3, 'c.jpg'), (4, 'c.jpg')
+                """
+            )
+        )
+
+    with Session(engine) as db:
+        deleted = crud.bulk_delete(db, [3, 1, 2, 2, 99], [12])
+        assert deleted == {
+            "CommunityPosts": 3,
+            "PostComments": 3,
+            "PostReactions": 2,
+            "CommunityPostImages": 4,
+            "PostHotScores": 1,
+        }
+        assert db.execute(text("SELECT post_id FROM CommunityPosts")).scalars().all() == [4]
+        assert db.execute(text("SELECT comment_id FROM PostComments")).scalars().all() == [13]
+        queued = db.execute(text("SELECT storage_path FROM StorageDeletionOutbox")).scalars().all()
+        assert sorted(queued) == ["a.jpg", "b.jpg"]
@@ -0,0 +1,43 @@
+import asyncio
+from pathlib import Path
+import sys
+
+import pytest
+
+try:
+    from backend.app.core import metrics, passwords
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.core import metrics, passwords
+
+
+def test_hash_verify_and_rehash_on_cost_change(monkeypatch):
+    monkeypatch.setattr(passwords, "BCRYPT_ROUNDS", 4)
+
+    async def scenario():
+        hashed = await passwords.hash_password("hunter2")
+        assert passwords.rounds_of(hashed) == 4
+        assert await passwords.verify_password("hunter2", hashed) == (True, None)
+        assert await passwords.verify_password("wrong", hashed) == (False, None)
+
+        monkeypatch.setattr(passwords, "BCRYPT_ROUNDS", 5)
+        ok, upgraded = await passwords.verify_password("hunter2", hashed)
+        assert ok and passwords.rounds_of(upgraded) == 5
+        assert await passwords.verify_password("hunter2", "not-a-hash") == (False, None)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        passwords.shutdown()
+    assert metrics.snapshot()["histograms"]["password_hash.seconds"]["count"] >= 5
+
+
+def test_full_queue_fails_fast(monkeypatch):
+    import threading
+
+    monkeypatch.setattr(passwords, "_slots", threading.BoundedSemaphore(1))
+    passwords._slots.acquire()
+    with pytest.raises(passwords.HasherBusy):
+        asyncio.run(passwords.hash_password("hunter2"))
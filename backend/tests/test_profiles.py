@@ -0,0 +1,47 @@
+import asyncio
+from pathlib import Path
+import sys
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+try:
+    from backend.app.api import profiles
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.api import profiles
+
+
+def test_batch_profiles_keep_order_and_default_missing_without_writing(tmp_path):
+    url = f"sqlite:///{tmp_path / 'profiles.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE Profiles (
+                    user_id INTEGER PRIMARY KEY, age INTEGER, gender TEXT, height_cm INTEGER,
+                    weight_kg INTEGER, timezone TEXT, bio TEXT
+                )
+                """
+            )
+        )
+        conn.execute(text("INSERT INTO Profiles (user_id, age, bio) VALUES (1, 30, 'hi'), (3, 41, NULL)"))
+
+    async def scenario():
+        async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+        async with AsyncSession(async_engine) as db:
+            result = await profiles.get_profiles(ids="3, 2,1,3", db=db)
+            assert [(p.user_id, p.age) for p in result] == [(3, 41), (2, None), (1, 30)]
+            assert (await profiles.get_profile(5, db=db)).user_id == 5
+            assert (await db.execute(text("SELECT COUNT(*) FROM Profiles"))).scalar_one() == 2
+
+            with pytest.raises(HTTPException):
+                await profiles.get_profiles(ids="1,x", db=db)
+        await async_engine.dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,188 @@
+"""EXPLAIN checks for the hot catalogued statements.
+
+By default the plans come from SQLite: the tables below carry only their
+primary keys, and every secondary index is read from ``backend/migrations``,
+so a hot predicate without a migration index shows up as a full scan. Set
+``EXPLAIN_DATABASE_URL`` to a migrated MySQL database (sync driver, e.g.
+``mysql+pymysql://...``) to check MySQL's own plans instead.
+"""
+
+from pathlib import Path
+import os
+import re
+import sys
+
+import pytest
+from sqlalchemy import bindparam, create_engine, text
+
+try:
+    from backend.app.core import migrations
+    from backend.app.core.statements import CATALOG
+    import backend.app.main  # noqa: F401  registers every statement
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.core import migrations
+    from app.core.statements import CATALOG
+    import app.main  # noqa: F401
+
+# Primary keys and unique columns from app/models.py; the FK index on
+# CommunityPostImages.post_id is the one InnoDB creates for the constraint.
+BASE_SCHEMA = """
+CREATE TABLE Users (user_id INTEGER PRIMARY KEY, email TEXT UNIQUE, username TEXT,
+    password_hash TEXT, created_at TEXT);
+CREATE TABLE Profiles (user_id INTEGER PRIMARY KEY, age INTEGER, gender TEXT, height_cm REAL,
+    weight_kg REAL, timezone TEXT, bio TEXT);
+CREATE TABLE HealthLogs (log_id INTEGER PRIMARY KEY, user_id INTEGER, date TEXT, steps INTEGER,
+    heart_rate_avg INTEGER, sleep_hours REAL, calories_burned INTEGER, exercise_minutes INTEGER,
+    stress_level INTEGER, goal TEXT, created_at TEXT, main_exercise TEXT);
+CREATE TABLE Goals (goal_id INTEGER PRIMARY KEY, user_id INTEGER, metric TEXT, target_value REAL,
+    description TEXT, start_date TEXT, end_date TEXT, recurrence TEXT);
+CREATE TABLE Followers (follower_id INTEGER PRIMARY KEY, user_id INTEGER, follower_user_id INTEGER,
+    since TEXT);
+CREATE TABLE FollowCounts (user_id INTEGER PRIMARY KEY, followers_count INTEGER,
+    following_count INTEGER);
+CREATE TABLE CommunityPosts (post_id INTEGER PRIMARY KEY, user_id INTEGER, content TEXT,
+    visibility TEXT, created_at TEXT);
+CREATE TABLE PostComments (comment_id INTEGER PRIMARY KEY, post_id INTEGER, user_id INTEGER,
+    content TEXT, created_at TEXT);
+CREATE TABLE PostReactions (post_id INTEGER, user_id INTEGER, reaction_type TEXT, created_at TEXT);
+CREATE TABLE PostHotScores (post_id INTEGER PRIMARY KEY, score REAL, computed_at TEXT);
+CREATE TABLE CommunityPostImages (image_id INTEGER PRIMARY KEY, post_id INTEGER, file_name TEXT,
+    storage_path TEXT, public_url TEXT, content_type TEXT, size_bytes INTEGER, width INTEGER,
+    height INTEGER, thumbnail_path TEXT, feed_path TEXT, content_hash TEXT, created_at TEXT);
+CREATE INDEX fk_community_post_images_post ON CommunityPostImages (post_id);
+"""
+
+# Statements run on every page load or write; params are sample values.
+# Unbounded listings (posts.all, healthlogs.all) and the FULLTEXT search are
+# left out on purpose.
+HOT_QUERIES = {
+    "healthlogs.for_day": {"user_id": 1, "date": "2025-01-01"},
+    "healthlogs.by_id": {"log_id": 1},
+    "dashboard.today": {"user_id": 1, "today": "2025-01-01"},
+    "dashboard.weekly_steps": {"user_id": 1, "start_date": "2024-12-26", "end_date": "2025-01-01"},
+    "dashboard.latest_goal": {"user_id": 1},
+    "leaderboard.steps_today": {"user_ids": [1, 2, 3], "today": "2025-01-01"},
+    "followers.existing_edges": {"user_id": 1, "targets": [2, 3]},
+    "followers.delete_edges": {"user_id": 1, "targets": [2, 3]},
+    "followers.page.user_id": {"user_id": 1, "limit": 20},
+    "followers.page.user_id.after_cursor": {
+        "user_id": 1, "since": "2025-01-01", "follower_id": 10, "limit": 20,
+    },
+    "followers.page.follower_user_id": {"user_id": 1, "limit": 20},
+    "followers.page.follower_user_id.after_cursor": {
+        "user_id": 1, "since": "2025-01-01", "follower_id": 10, "limit": 20,
+    },
+    "followers.profile_cards": {"ids": [1, 2]},
+    "follow_counts.for_user": {"user_id": 1},
+    "posts.by_id": {"post_id": 1},
+    "posts.by_ids": {"post_ids": [1, 2]},
+    "posts.owner": {"post_id": 1},
+    "hot_feed.first_page": {"limit": 20},
+    "hot_feed.next_page": {"score": 1.5, "post_id": 10, "limit": 20},
+    "comments.thread.page": {"post_id": 1, "limit": 20},
+    "comments.thread.after_cursor.page": {
+        "post_id": 1, "after_created_at": "2025-01-01", "after_comment_id": 10, "limit": 20,
+    },
+    "comments.count_for_post": {"post_id": 1},
+    "comments.owner": {"comment_id": 1},
+    "reactions.for_user": {"post_id": 1, "user_id": 1},
+    "reactions.summary": {"post_id": 1},
+    "reactions.delete": {"post_id": 1, "user_id": 1},
+    "post_images.for_post": {"post_id": 1},
+    "post_images.for_posts": {"post_ids": [1, 2]},
+    "post_images.by_hash": {"content_hashes": ["abc"]},
+    "profiles.by_user": {"user_id": 1},
+    "profiles.by_users": {"user_ids": [1, 2]},
+    "users.by_id": {"user_id": 1},
+    "users.by_email": {"email": "a@example.com"},
+    "users.directory_lookup": {"user_ids": [1, 2]},
+}
+
+_CREATE_INDEX = re.compile(r"^CREATE\s+(UNIQUE\s+)?INDEX\s+(\w+)\s+ON\s+(\w+)\s*\(([^)]*)\)", re.I)
+_ALTER_TABLE = re.compile(r"^ALTER\s+TABLE\s+(\w+)", re.I)
+_ADD_INDEX = re.compile(r"ADD\s+(UNIQUE\s+)?(?:KEY|INDEX)\s+(\w+)\s*\(([^)]*)\)", re.I)
+_CREATE_TABLE = re.compile(r"^CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.I)
+_INLINE_KEY = re.compile(r"^\s*(UNIQUE\s+)?KEY\s+(\w+)\s*\(([^)]*)\)", re.I | re.M)
+
+
+def migration_indexes() -> list[tuple[str, str, str, bool]]:
+    """(name, table, columns, unique) of every secondary index the migrations
+    create; FULLTEXT indexes have no SQLite equivalent and are skipped."""
+    found = []
+    for migration in migrations.discover():
+        for statement in migration.statements():
+            if match := _CREATE_INDEX.match(statement):
+                unique, name, table, columns = match.groups()
+                found.append((name, table, columns, bool(unique)))
+            elif match := _ALTER_TABLE.match(statement):
+                for unique, name, columns in _ADD_INDEX.findall(statement):
+                    found.append((name, match.group(1), columns, bool(unique)))
+            elif match := _CREATE_TABLE.match(statement):
+                for unique, name, columns in _INLINE_KEY.findall(statement):
+                    found.append((name, match.group(1), columns, bool(unique)))
+    return found
+
+
+@pytest.fixture(scope="module")
+def engine():
+    url = os.getenv("EXPLAIN_DATABASE_URL")
+    if url:
+        engine = create_engine(url)
+    else:
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            for statement in BASE_SCHEMA.split(";"):
+                if statement.strip():
+                    conn.exec_driver_sql(statement)
+            tables = set(engine.dialect.get_table_names(conn))
+            for name, table, columns, unique in migration_indexes():
+                if table in tables:
+                    kind = "UNIQUE INDEX" if unique else "INDEX"
+                    conn.exec_driver_sql(f"CREATE {kind} {name} ON {table} ({columns})")
+    yield engine
+    engine.dispose()
+
+
+def explain(engine, name: str, params: dict):
+    prefix = "EXPLAIN " if engine.dialect.name == "mysql" else "EXPLAIN QUERY PLAN "
+    expanding = [bindparam(key, expanding=True) for key, value in params.items() if isinstance(value, list)]
+    clause = text(prefix + CATALOG[name].text)
+    if expanding:
+        clause = clause.bindparams(*expanding)
+    with engine.connect() as conn:
+        return conn.execute(clause, params).mappings().all()
+
+
+def full_scans(engine, name: str, params: dict) -> list[str]:
+    rows = explain(engine, name, params)
+    if engine.dialect.name == "mysql":
+        return [f"{row['table']}: type=ALL" for row in rows if row["type"] == "ALL"]
+    # "SCAN t" reads the whole table; "SCAN t USING [COVERING] INDEX i"
+    # walks an index in order and stops at the LIMIT
+    return [row["detail"] for row in rows if re.fullmatch(r"SCAN \w+( AS \w+)?", row["detail"])]
+
+
+def test_hot_statements_are_catalogued():
+    assert sorted(set(HOT_QUERIES) - set(CATALOG)) == []
+
+
+def test_migrations_define_the_hot_predicate_indexes():
+    names = {name for name, *_ in migration_indexes()}
+    assert {
+        "uq_healthlogs_user_date",
+        "uq_followers_edge",
+        "ix_followers_following_since",
+        "ix_followers_followers_since",
+        "ix_post_comments_thread",
+        "uq_post_reactions_post_user",
+        "ix_community_posts_created_at",
+        "ix_goals_user",
+    } <= names
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_statement_avoids_full_table_scans(engine, name):
+    assert full_scans(engine, name, HOT_QUERIES[name]) == []
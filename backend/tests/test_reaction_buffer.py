@@ -0,0 +1,93 @@
+from pathlib import Path
+import sys
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+try:
+    from backend.app import crud
+    from backend.app.core.reaction_buffer import ReactionBuffer
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app import crud
+    from app.core.reaction_buffer import ReactionBuffer
+
+
+def test_flush_coalesces_toggles_to_final_state():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE PostReactions (
+                    post_id INTEGER, user_id INTEGER, reaction_type TEXT, created_at TIMESTAMP
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                """
+                INSERT INTO PostReactions VALUES
+                    (1, 1, 'like', '2025-01-01'), (1, 2, 'like', '2025-01-01'), (2, 1, 'like', '2025-01-01')
+                """
+            )
+        )
+
+    buffer = ReactionBuffer()
+    for reaction in ["love", None, "like", "fire"]:
+        buffer.set(1, 1, reaction)
+    buffer.set(1, 2, None)
+    buffer.set(3, 5, "like")
+    assert len(buffer) == 3
+    assert buffer.get(1, 1).reaction_type == "fire"
+
+    with Session(engine) as db:
+        assert crud.flush_reaction_buffer(db, buffer) == 3
+        rows = db.execute(
+            text("SELECT post_id, user_id, reaction_type FROM PostReactions ORDER BY post_id, user_id")
+        ).all()
+
+    assert rows == [(1, 1, "fire"), (2, 1, "like"), (3, 5, "like")]
+    assert len(buffer) == 0 and buffer.get(1, 1) is None
+
+
+class _OwnerResult:
+    def __init__(self, owner_id):
+        self.owner_id = owner_id
+
+    def mappings(self):
+        return self
+
+    def first(self):
+        return {"user_id": self.owner_id}
+
+
+class _OwnedPostSession:
+    """Answers the owner lookup with ``owner_id`` and accepts the deletes."""
+
+    def __init__(self, owner_id):
+        self.owner_id = owner_id
+        self.commits = 0
+
+    def execute(self, statement, params=None):
+        return _OwnerResult(self.owner_id)
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_deleting_a_post_drops_its_buffered_reactions(monkeypatch):
+    buffer = ReactionBuffer()
+    buffer.set(1, 5, "like")
+    buffer.set(2, 5, "fire")
+    monkeypatch.setattr(crud.reaction_buffer, "buffer", buffer)
+    monkeypatch.setattr(crud.deletion_queue, "enqueue_post_images", lambda db, post_ids: None)
+    db = _OwnedPostSession(owner_id=9)
+
+    assert crud.delete_post(db, 1, 9) == "deleted"
+
+    assert db.commits == 1
+    assert buffer.get(1, 5) is None and buffer.get(2, 5).reaction_type == "fire"
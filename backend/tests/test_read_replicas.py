@@ -0,0 +1,117 @@
+import asyncio
+from pathlib import Path
+import sys
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+try:
+    from backend.app import database
+    from backend.app.core import read_replicas
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app import database
+    from app.core import read_replicas
+
+
+def _database(path: Path, label: str) -> str:
+    url = f"sqlite:///{path}"
+    with create_engine(url).begin() as conn:
+        conn.execute(text("CREATE TABLE Source (label TEXT)"))
+        conn.execute(text("INSERT INTO Source (label) VALUES (:label)"), {"label": label})
+    return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+
+def test_round_robin_skips_unhealthy_replicas_and_honours_pins(tmp_path):
+    replica_set = read_replicas.ReplicaSet(
+        {
+            "first": create_async_engine(_database(tmp_path / "first.db", "first")),
+            "broken": create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'x.db'}"),
+            "second": create_async_engine(_database(tmp_path / "second.db", "second")),
+        },
+        pin_seconds=60,
+        name="test_replicas",
+    )
+
+    async def scenario():
+        status = await replica_set.check()
+        picks = [replica_set.pick([1]) for _ in range(4)]
+        replica_set.pin(1)
+        pinned = replica_set.pick([1, 2])
+        other = replica_set.pick([2])
+        async with replica_set.session(other) as db:
+            label = (await db.execute(text("SELECT label FROM Source"))).scalar_one()
+        await replica_set.stop()
+        return status, picks, pinned, other, label
+
+    status, picks, pinned, other, label = asyncio.run(scenario())
+
+    assert status == {"first": True, "broken": False, "second": True}
+    assert picks == ["first", "second", "first", "second"]
+    assert pinned is None
+    assert label == other
+
+
+def test_get_read_db_routes_to_primary_for_pinned_users(tmp_path, monkeypatch):
+    replica_set = read_replicas.ReplicaSet(
+        {"replica": create_async_engine(_database(tmp_path / "replica.db", "replica"))},
+        pin_seconds=60,
+        name="test_read_db",
+    )
+    primary = create_async_engine(_database(tmp_path / "primary.db", "primary"))
+    monkeypatch.setattr(database, "replicas", replica_set)
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(primary))
+
+    app = FastAPI()
+
+    @app.get("/source/{user_id}")
+    async def source(user_id: int, db=Depends(database.get_read_db)):
+        return (await db.execute(text("SELECT label FROM Source"))).scalar_one()
+
+    with TestClient(app) as client:
+        assert client.get("/source/7").json() == "replica"
+        replica_set.pin(7)
+        assert client.get("/source/7").json() == "primary"
+        assert client.get("/source/8").json() == "replica"
+
+
+def test_a_write_sends_the_clients_next_reads_to_the_primary(tmp_path, monkeypatch):
+    replica_set = read_replicas.ReplicaSet(
+        {"replica": create_async_engine(_database(tmp_path / "replica.db", "replica"))},
+        pin_seconds=60,
+        name="test_pin_writes",
+    )
+    primary = create_async_engine(_database(tmp_path / "primary.db", "primary"))
+    monkeypatch.setattr(database, "replicas", replica_set)
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(primary))
+
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def pin(request, call_next):
+        return await read_replicas.pin_writes(request, call_next, replica_set)
+
+    @app.post("/posts/{post_id}/comments")
+    async def comment(post_id: int):
+        return {"ok": True}
+
+    @app.get("/posts/{post_id}/comments")
+    async def comments(post_id: int, db=Depends(database.get_read_db)):
+        return (await db.execute(text("SELECT label FROM Source"))).scalar_one()
+
+    with TestClient(app) as writer, TestClient(app) as stranger:
+        assert writer.get("/posts/3/comments").json() == "replica"
+        response = writer.post("/posts/3/comments", data={"content": "hi"})
+        mark = response.headers[read_replicas.PRIMARY_HEADER]
+        # the mark is on the client, not in this process, so other workers honour it
+        replica_set._pins.clear()
+        assert writer.get("/posts/3/comments").json() == "primary"
+        assert stranger.get("/posts/3/comments").json() == "replica"
+        headers = {read_replicas.PRIMARY_HEADER: mark}
+        assert stranger.get("/posts/3/comments", headers=headers).json() == "primary"
+        forged = {read_replicas.PRIMARY_HEADER: str(float(mark) + 3600)}
+        assert stranger.get("/posts/3/comments", headers=forged).json() == "replica"
@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime
+from pathlib import Path
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+try:
+    from backend.app import crud
+    from backend.app.api import community
+    from backend.app.core import user_directory
+    from backend.app.database import get_read_db
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app import crud
+    from app.api import community
+    from app.core import user_directory
+    from app.database import get_read_db
+
+# Stand-in for the FULLTEXT query: score = occurrences of the search text.
+_FAKE_SEARCH = text(
+    """
+    SELECT post_id,
+           (LENGTH(content) - LENGTH(REPLACE(content, :query, ''))) / LENGTH(:query) AS score
+    FROM CommunityPosts
+    WHERE content LIKE '%' || :query || '%'
+    ORDER BY score DESC, post_id DESC
+    LIMIT :limit OFFSET :offset
+    """
+)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'search.db'}"
+    with create_engine(url).begin() as conn:
+        conn.execute(text("CREATE TABLE Users (user_id INTEGER PRIMARY KEY, username TEXT, email TEXT)"))
+        conn.execute(
+            text(
+                "CREATE TABLE CommunityPosts (post_id INTEGER PRIMARY KEY, user_id INTEGER, "
+                "content TEXT, visibility TEXT, created_at TIMESTAMP)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE CommunityPostImages (image_id INTEGER PRIMARY KEY, post_id INTEGER, "
+                "file_name TEXT, storage_path TEXT, public_url TEXT, content_type TEXT, size_bytes INTEGER, "
+                "width INTEGER, height INTEGER, thumbnail_path TEXT, feed_path TEXT, content_hash TEXT, "
+                "created_at TIMESTAMP)"
+            )
+        )
+        conn.execute(text("INSERT INTO Users (user_id, username) VALUES (1, 'ana')"))
+        conn.execute(
+            text(
+                "INSERT INTO CommunityPosts (post_id, user_id, content, visibility, created_at) "
+                "VALUES (:id, 1, :content, 'public', :at)"
+            ),
+            [
+                {"id": 1, "content": "run", "at": datetime(2025, 1, 1)},
+                {"id": 2, "content": "run run run", "at": datetime(2025, 1, 2)},
+                {"id": 3, "content": "walk", "at": datetime(2025, 1, 3)},
+                {"id": 4, "content": "run run", "at": datetime(2025, 1, 4)},
+            ],
+        )
+    monkeypatch.setattr(crud, "_SEARCH_POSTS", _FAKE_SEARCH)
+    monkeypatch.setattr(user_directory, "directory", user_directory.UserDirectory(name="test_search"))
+    engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+
+    async def read_db():
+        async with AsyncSession(engine) as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(community.router)
+    app.dependency_overrides[get_read_db] = read_db
+    with TestClient(app) as client:
+        yield client
+    asyncio.run(engine.dispose())
+
+
+def test_hits_keep_rank_order_and_page_by_offset(client):
+    first = client.get("/api/community/search", params={"q": "  run ", "limit": 2}).json()
+    assert [(hit["post_id"], hit["score"]) for hit in first["items"]] == [(2, 3.0), (4, 2.0)]
+    assert first["items"][0]["username"] == "ana"
+    assert first["next_offset"] == 2
+
+    last = client.get("/api/community/search", params={"q": "run", "limit": 2, "offset": 2}).json()
+    assert [hit["post_id"] for hit in last["items"]] == [1]
+    assert last["next_offset"] is None
+
+
+def test_search_text_is_checked_after_stripping(client):
+    assert client.get("/api/community/search", params={"q": "  a "}).status_code == 400
+    assert client.get("/api/community/search", params={"q": "a"}).status_code == 422
+    assert client.get("/api/community/search", params={"q": "wa"}).json()["items"][0]["post_id"] == 3
+
+
+def test_posts_by_ids_follow_the_requested_order(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'posts.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE Users (user_id INTEGER PRIMARY KEY, username TEXT, email TEXT)"))
+        conn.execute(
+            text(
+                "CREATE TABLE CommunityPosts (post_id INTEGER PRIMARY KEY, user_id INTEGER, "
+                "content TEXT, visibility TEXT, created_at TIMESTAMP)"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO CommunityPosts VALUES (:id, 1, 'x', 'public', :at)"),
+            [{"id": post_id, "at": datetime(2025, 1, post_id)} for post_id in (1, 2, 3)],
+        )
+    monkeypatch.setattr(crud, "_IMAGE_TABLE_AVAILABLE", False)
+    monkeypatch.setattr(user_directory, "directory", user_directory.UserDirectory(name="test_search_ids"))
+
+    with engine.connect() as conn:
+        posts = crud.list_posts_by_ids(conn, [3, 9, 1, 2])
+
+    assert [post.post_id for post in posts] == [3, 1, 2]
@@ -0,0 +1,40 @@
+from pathlib import Path
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+try:
+    from backend.app import crud
+    from backend.app.core import metrics, statements
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app import crud
+    from app.core import metrics, statements
+
+
+def test_catalogued_statements_are_timed_by_name():
+    engine = create_engine("sqlite://")
+    statements.instrument(engine)
+    statements.instrument(engine)  # idempotent
+    with Session(engine) as db:
+        db.execute(text("CREATE TABLE PostComments (comment_id INTEGER PRIMARY KEY, post_id INTEGER)"))
+        db.execute(text("INSERT INTO PostComments (post_id) VALUES (1), (1), (2)"))
+        assert crud.count_comments(db, 1) == 2
+        assert crud.count_comments(db, 2) == 1
+        db.execute(crud._DELETE_COMMENT, {"comment_id": 1})
+
+    snap = metrics.snapshot()["histograms"]
+    assert snap["sql.comments.count_for_post.seconds"]["count"] == 2
+    assert snap["sql.comments.delete.rows"]["count"] == 1
+    assert snap["sql.comments.delete.rows"]["max"] == 1
+    assert snap["sql.uncatalogued.seconds"]["count"] >= 2
+    assert "comments.thread.after_cursor.page" in statements.CATALOG
+
+
+def test_statement_names_are_unique():
+    with pytest.raises(ValueError):
+        statements.define("comments.delete", "DELETE FROM PostComments")
@@ -0,0 +1,67 @@
+from io import BytesIO
+from pathlib import Path
+import sys
+
+from google.api_core import exceptions
+
+try:
+    from backend.app.core.storage_backends import GCSBackend, LocalBackend
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.core.storage_backends import GCSBackend, LocalBackend
+
+
+def test_local_backend_roundtrip(tmp_path):
+    store = LocalBackend(tmp_path, "http://testserver/media")
+    name = "community-images/posts/2025/01/abc.jpg"
+
+    store.put(name, b"0123456789", "image/jpeg")
+    store.put("other/x.png", BytesIO(b"png"), "image/png")
+
+    path = store.path_for(name)
+    assert path.is_file() and path.parent.parent.parent == tmp_path
+    assert not list(path.parent.glob(".tmp-*"))
+    assert store.exists(name)
+    assert store.read(name) == b"0123456789"
+    assert b"".join(store.stream(name, start=2, end=5, chunk_size=3)) == b"2345"
+    assert [obj for obj, _ in store.list("community-images/")] == [name]
+    assert store.url(name) == f"http://testserver/media/{name}"
+
+    assert store.delete([name, "missing.jpg"]) == {}
+    assert not store.exists(name)
+
+
+def test_local_backend_signed_urls(tmp_path):
+    store = LocalBackend(tmp_path, "http://testserver/media", signing_key="secret")
+    assert store.should_sign()
+
+    url = store.sign("a/b.jpg", 60)
+    query = dict(part.split("=") for part in url.split("?", 1)[1].split("&"))
+    expires = int(query["expires"])
+    assert store.verify("a/b.jpg", expires, query["signature"])
+    assert not store.verify("a/c.jpg", expires, query["signature"])
+    assert not store.verify("a/b.jpg", expires - 3600, store.signature("a/b.jpg", expires - 3600))
+
+
+class _Bucket:
+    def __init__(self, errors):
+        self.errors = errors
+        self.deleted = []
+
+    def delete_blob(self, name):
+        if name in self.errors:
+            raise self.errors[name]
+        self.deleted.append(name)
+
+
+def test_gcs_delete_reports_each_failed_object(monkeypatch):
+    bucket = _Bucket({"gone.jpg": exceptions.NotFound("gone"), "busy.jpg": exceptions.ServiceUnavailable("busy")})
+    store = GCSBackend()
+    monkeypatch.setattr(store, "bucket", lambda: bucket)
+
+    failures = store.delete(["a.jpg", "gone.jpg", "busy.jpg", "a.jpg", "b.jpg"])
+
+    assert bucket.deleted == ["a.jpg", "b.jpg"]
+    assert list(failures) == ["busy.jpg"] and "busy" in failures["busy.jpg"]
@@ -0,0 +1,129 @@
+from datetime import date
+from pathlib import Path
+import sys
+import threading
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+try:
+    from backend.app.core.suggestions import SuggestionIndex
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.core.suggestions import SuggestionIndex
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE Profiles (
+                    user_id INTEGER PRIMARY KEY, age INTEGER, gender TEXT,
+                    height_cm INTEGER, weight_kg INTEGER
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                """
+                CREATE TABLE HealthLogs (
+                    user_id INTEGER, date DATE, steps INTEGER,
+                    sleep_hours FLOAT, exercise_minutes INTEGER
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                """
+                INSERT INTO Profiles VALUES
+                    (1, 30, 'F', 165, 60),
+                    (2, 31, 'F', 168, 62),
+                    (3, 29, 'F', 160, 58),
+                    (4, 70, 'M', 185, 95),
+                    (5, NULL, NULL, NULL, NULL)
+                """
+            )
+        )
+        conn.execute(
+            text("INSERT INTO HealthLogs VALUES (1, :d, 10000, 8, 45), (2, :d, 9000, 7.5, 40), (4, :d, 500, 5, 0)"),
+            {"d": date.today()},
+        )
+    return Session(engine)
+
+
+def test_nearest_ranks_similar_users_and_skips_excluded():
+    with _session() as db:
+        index = SuggestionIndex()
+        assert index.rebuild(db) == 5
+
+        assert index.nearest(1, 2) == [2, 3]
+        assert index.nearest(1, 2, exclude=[2]) == [3, 5]
+        # a profile with no data at all still gets suggestions
+        assert len(index.nearest(5, 10)) == 4
+        assert index.nearest(42, 3) is None
+
+
+def test_refresh_patches_changed_rows_and_appends_new_users():
+    with _session() as db:
+        index = SuggestionIndex()
+        index.rebuild(db)
+
+        db.execute(text("INSERT INTO Profiles VALUES (6, 69, 'M', 183, 92)"))
+        db.execute(text("UPDATE Profiles SET age = 72, gender = 'M', height_cm = 186 WHERE user_id = 3"))
+        index.mark_dirty([3, 6])
+        assert index.refresh(db) == 2
+
+        assert len(index) == 6
+        assert index.nearest(4, 2) == [6, 3]
+
+
+def test_refresh_drops_deleted_profiles():
+    with _session() as db:
+        index = SuggestionIndex()
+        index.rebuild(db)
+
+        db.execute(text("DELETE FROM Profiles WHERE user_id = 2"))
+        index.mark_dirty([2, 3])
+        assert index.refresh(db) == 2
+
+        assert len(index) == 4
+        assert index.nearest(2, 3) is None
+        assert 2 not in index.nearest(1, 10)
+
+
+def test_refresh_waits_for_a_running_rebuild():
+    with _session() as db:
+        index = SuggestionIndex()
+        index.rebuild(db)
+        fetching, release = threading.Event(), threading.Event()
+        # SQLite connections stay on this thread, so read the rows up front
+        every_row, user_1_row = index._fetch(db), index._fetch(db, [1])
+
+        def slow_fetch(session, user_ids=None):
+            if user_ids is not None:
+                return user_1_row
+            fetching.set()
+            release.wait(1)
+            return every_row
+
+        index._fetch = slow_fetch
+        rebuild = threading.Thread(target=index.rebuild, args=(db,))
+        rebuild.start()
+        fetching.wait(1)
+        snapshot_during_rebuild = index._snapshot
+
+        refresh = threading.Thread(target=index.refresh, args=(db, [1]))
+        refresh.start()
+        refresh.join(0.1)
+        # the refresh is blocked rather than patching the snapshot being replaced
+        assert refresh.is_alive() and index._snapshot is snapshot_during_rebuild
+        release.set()
+        rebuild.join()
+        refresh.join()
+        assert len(index) == 5
@@ -0,0 +1,62 @@
+from pathlib import Path
+import sys
+
+try:
+    from backend.app import crud, schemas
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app import crud, schemas
+
+
+class _Result:
+    lastrowid = 42
+
+
+class _RecordingSession:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def execute(self, statement, params):
+        self.statements.append((str(statement), params))
+        return _Result()
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_upsert_is_one_statement_and_skipped_when_unchanged(monkeypatch):
+    monkeypatch.setattr(crud, "_UPSERT_CACHE", type(crud._UPSERT_CACHE)())
+    db = _RecordingSession()
+    payload = schemas.UserCreate(email="ana@example.com", username="ana", password="h1")
+
+    user = crud.upsert_user(db, payload)
+    assert (user.user_id, user.username, user.created_at) == (42, "ana", None)
+    assert len(db.statements) == 1 and db.commits == 1
+    assert "ON DUPLICATE KEY UPDATE" in db.statements[0][0]
+
+    crud.upsert_user(db, payload)
+    assert len(db.statements) == 1
+
+    crud.upsert_user(db, payload.model_copy(update={"username": "ana b"}))
+    assert len(db.statements) == 2
+
+
+def test_unchanged_upsert_is_rewritten_after_the_cache_ttl(monkeypatch):
+    monkeypatch.setattr(crud, "_UPSERT_CACHE", type(crud._UPSERT_CACHE)())
+    clock = [1000.0]
+    monkeypatch.setattr(crud.time, "monotonic", lambda: clock[0])
+    db = _RecordingSession()
+    payload = schemas.UserCreate(email="ana@example.com", username="ana", password="h1")
+
+    crud.upsert_user(db, payload)
+    clock[0] += crud.UPSERT_CACHE_TTL_SECONDS - 1
+    crud.upsert_user(db, payload)
+    assert len(db.statements) == 1
+
+    # another worker may have changed the row; the write is repeated once the entry expires
+    clock[0] += 2
+    crud.upsert_user(db, payload)
+    assert len(db.statements) == 2
@@ -0,0 +1,57 @@
+from pathlib import Path
+import sys
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+try:
+    from backend.app.core.user_directory import UserDirectory
+except ModuleNotFoundError:  # running from inside backend package
+    backend_root = Path(__file__).resolve().parents[1]
+    if str(backend_root) not in sys.path:
+        sys.path.append(str(backend_root))
+    from app.core.user_directory import UserDirectory
+
+
+def _engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE Users (user_id INTEGER PRIMARY KEY, username TEXT, email TEXT)"))
+        conn.execute(text("INSERT INTO Users VALUES (1, 'ana', 'a@x'), (2, NULL, 'b@x'), (3, 'cy', 'c@x')"))
+    return engine
+
+
+def test_get_many_batches_misses_and_caches_hits_and_unknown_ids():
+    engine = _engine()
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+    directory = UserDirectory(max_entries=10, ttl_seconds=60, name="test_directory.batch")
+
+    with Session(engine) as db:
+        first = directory.get_many(db, [1, 2, 99])
+        assert {uid: entry.display_name for uid, entry in first.items()} == {1: "ana", 2: "b@x"}
+        assert len(queries) == 1
+
+        again = directory.get_many(db, [2, 1, 99])
+        assert again == first and len(queries) == 1
+
+        db.execute(text("UPDATE Users SET username = 'bee' WHERE user_id = 2"))
+        directory.invalidate(2)
+        assert directory.get(db, 2).username == "bee"
+        assert len(queries) == 3
+        assert directory.hit_rate == round(3 / 7, 4)
+
+
+def test_lru_eviction_and_ttl():
+    engine = _engine()
+    with Session(engine) as db:
+        directory = UserDirectory(max_entries=2, ttl_seconds=60, name="test_directory.lru")
+        directory.get_many(db, [1, 2])
+        directory.get(db, 1)  # 2 is now least recently used
+        directory.get(db, 3)
+        assert sorted(directory._entries) == [1, 3]
+
+        expired = UserDirectory(max_entries=10, ttl_seconds=0, name="test_directory.ttl")
+        expired.get(db, 1)
+        expired.get(db, 1)
+        assert (expired.hits.value, expired.misses.value) == (0, 2)
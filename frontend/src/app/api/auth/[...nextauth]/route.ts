@@ -9,16 +9,21 @@ const API_BASE =
   process.env.NEXT_PUBLIC_API_BASE ??
   "http://127.0.0.1:8000";
 
-async function fetchBackendUserId(payload: {
+type BackendUser = { user_id: number; access_token: string };
+
+async function upsertBackendUser(payload: {
   email?: string | null;
   name?: string | null;
-}): Promise<number | undefined> {
+}): Promise<BackendUser | undefined> {
   if (!payload.email) return undefined;
 
   try {
     const res = await fetch(`${API_BASE}/api/users/upsert`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: {
+        "Content-Type": "application/json",
+        "X-Service-Secret": process.env.BACKEND_SERVICE_SECRET ?? "",
+      },
       body: JSON.stringify({
         email: payload.email,
         username: payload.name ?? payload.email.split("@")[0],
@@ -31,8 +36,7 @@ async function fetchBackendUserId(payload: {
       return undefined;
     }
 
-    const data = (await res.json()) as { user_id?: number };
-    return data.user_id;
+    return (await res.json()) as BackendUser;
   } catch (error) {
     console.error("Error talking to backend user upsert", error);
     return undefined;
@@ -62,7 +66,13 @@ const authOptions: NextAuthOptions = {
         });
         if (!res.ok) return null;
         const user = await res.json();
-        return { id: user.user_id, name: user.username, email: credentials?.email };
+        const signedIn = {
+          id: user.user_id,
+          name: user.username,
+          email: credentials?.email,
+          accessToken: user.access_token as string,
+        };
+        return signedIn;
       },
     }),
   ],
@@ -80,13 +90,14 @@ const authOptions: NextAuthOptions = {
       profile?: Profile | null;
     }) {
       if (account?.provider === "google" && (user || profile)) {
-        const backendId = await fetchBackendUserId({
+        const backendUser = await upsertBackendUser({
           email: profile?.email ?? user?.email,
           name: profile?.name ?? user?.name ?? null,
         });
-        if (backendId) {
-          token.id = backendId;
+        if (backendUser) {
+          token.id = backendUser.user_id;
           token.name = profile?.name ?? user?.name ?? null;
+          token.accessToken = backendUser.access_token;
           return token;
         }
       }
@@ -94,6 +105,7 @@ const authOptions: NextAuthOptions = {
       if (user) {
         token.id = (user as { id?: string | number }).id;
         token.name = user.name;
+        token.accessToken = (user as { accessToken?: string }).accessToken;
       }
       return token;
     },
@@ -103,6 +115,8 @@ const authOptions: NextAuthOptions = {
       }
       (session.user as { id?: string | number; name?: string | null }).id = (token as { id?: string | number }).id;
       (session.user as { id?: string | number; name?: string | null }).name = (token as { name?: string | null }).name;
+      // backend bearer token for /api/users/me and the moderation routes
+      (session as { accessToken?: string }).accessToken = (token as { accessToken?: string }).accessToken;
       return session;
     },
   },
@@ -8,8 +8,11 @@ import api from "@/libs/api";
 import {
   FeedPost,
   REACTION_OPTIONS,
+  formatCommentCount,
   formatFullDate,
+  fetchCommentPage,
   fetchPostWithDetails,
+  mergeComments,
   PostComment,
 } from "@/src/components/community/helpers";
 import PostImageGallery from "@/src/components/community/PostImageGallery";
@@ -62,6 +65,7 @@ export default function PostDetailPage({ params }: PostDetailPageProps) {
   const [pendingReaction, setPendingReaction] = useState<string | null>(null);
   const [deletingPost, setDeletingPost] = useState(false);
   const [deletingComments, setDeletingComments] = useState<Record<number, boolean>>({});
+  const [loadingComments, setLoadingComments] = useState(false);
 
   const loadPost = useCallback(async () => {
     if (!Number.isFinite(postId)) {
@@ -194,11 +198,13 @@ export default function PostDetailPage({ params }: PostDetailPageProps) {
 
     setDeletingComments((prev) => ({ ...prev, [commentId]: true }));
     const previousComments = post.comments;
+    const previousCount = post.commentCount;
     setPost((prev) =>
       prev
         ? {
             ...prev,
             comments: prev.comments.filter((comment) => comment.comment_id !== commentId),
+            commentCount: Math.max(prev.commentCount - 1, 0),
           }
         : prev
     );
@@ -210,12 +216,36 @@ export default function PostDetailPage({ params }: PostDetailPageProps) {
     } catch (err) {
       console.error("Failed to delete comment", err);
       setError("We couldn't delete that comment. Try again.");
-      setPost((prev) => (prev ? { ...prev, comments: previousComments } : prev));
+      setPost((prev) =>
+        prev ? { ...prev, comments: previousComments, commentCount: previousCount } : prev
+      );
     } finally {
       setDeletingComments((prev) => ({ ...prev, [commentId]: false }));
     }
   };
 
+   const handleLoadMoreComments = async () => {
+     if (!post?.commentsCursor) return;
+     setLoadingComments(true);
+     try {
+       const page = await fetchCommentPage(post.post_id, post.commentsCursor);
+       setPost((prev) =>
+         prev
+           ? {
+               ...prev,
+               comments: mergeComments(prev.comments, page.comments),
+               commentsCursor: page.nextCursor,
+             }
+           : prev
+       );
+     } catch (err) {
+       console.error("Failed to load comments", err);
+       setError("We couldn't load more comments. Try again.");
+     } finally {
+       setLoadingComments(false);
+     }
+   };
+
    const handleCommentSubmit = async () => {
      const draft = commentDraft.trim();
      if (!draft || !post) return;
@@ -236,7 +266,9 @@ export default function PostDetailPage({ params }: PostDetailPageProps) {
        );
  
        setPost((prev) =>
-         prev ? { ...prev, comments: [...prev.comments, comment] } : prev
+         prev
+           ? { ...prev, comments: [...prev.comments, comment], commentCount: prev.commentCount + 1 }
+           : prev
        );
        setCommentDraft("");
      } catch (err) {
@@ -367,9 +399,7 @@ export default function PostDetailPage({ params }: PostDetailPageProps) {
              }}
            >
              <div style={{ fontSize: 13, color: "var(--muted)" }}>
-               {post.comments.length === 0
-                 ? "No comments yet"
-                 : `${post.comments.length} comment${post.comments.length > 1 ? "s" : ""}`}
+               {formatCommentCount(post.commentCount)}
              </div>
  
              <div style={{ display: "flex", flexDirection: "column", gap: 10 }}>
@@ -406,6 +436,24 @@ export default function PostDetailPage({ params }: PostDetailPageProps) {
                    </div>
                  );
                })}
+               {post.commentsCursor && (
+                 <button
+                   type="button"
+                   onClick={handleLoadMoreComments}
+                   disabled={loadingComments}
+                   style={{
+                     alignSelf: "flex-start",
+                     fontSize: 13,
+                     color: "#93c5fd",
+                     background: "transparent",
+                     border: "none",
+                     padding: 0,
+                     cursor: loadingComments ? "progress" : "pointer",
+                   }}
+                 >
+                   {loadingComments ? "Loading..." : "Load more comments"}
+                 </button>
+               )}
              </div>
  
              <div style={{ display: "flex", gap: 8 }}>
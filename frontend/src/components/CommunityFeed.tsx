@@ -22,9 +22,12 @@ import {
   PostComment,
   REACTION_OPTIONS,
   VISIBILITY_OPTIONS,
+  formatCommentCount,
   formatFullDate,
   hydratePosts,
+  fetchCommentPage,
   fetchPostWithDetails,
+  mergeComments,
 } from "@/src/components/community/helpers";
 import PostImageGallery from "@/src/components/community/PostImageGallery";
 
@@ -134,6 +137,7 @@ export default function CommunityFeed() {
   const [pendingReaction, setPendingReaction] = useState<Record<number, string | null>>({});
   const [deletingPosts, setDeletingPosts] = useState<Record<number, boolean>>({});
   const [deletingComments, setDeletingComments] = useState<Record<number, boolean>>({});
+  const [loadingComments, setLoadingComments] = useState<Record<number, boolean>>({});
   const [newPostContent, setNewPostContent] = useState("");
   const [newPostVisibility, setNewPostVisibility] = useState(
     VISIBILITY_OPTIONS[0]?.value ?? "public"
@@ -384,6 +388,7 @@ export default function CommunityFeed() {
               comments: post.comments.filter(
                 (comment) => comment.comment_id !== commentId
               ),
+              commentCount: Math.max(post.commentCount - 1, 0),
             }
           : post
       )
@@ -402,6 +407,29 @@ export default function CommunityFeed() {
     }
   };
 
+  const handleLoadMoreComments = async (postId: number, after: string) => {
+    setLoadingComments((prev) => ({ ...prev, [postId]: true }));
+    try {
+      const page = await fetchCommentPage(postId, after);
+      setPosts((prev) =>
+        prev.map((post) =>
+          post.post_id === postId
+            ? {
+                ...post,
+                comments: mergeComments(post.comments, page.comments),
+                commentsCursor: page.nextCursor,
+              }
+            : post
+        )
+      );
+    } catch (err) {
+      console.error("Failed to load comments", err);
+      setError("We couldn't load more comments. Try again.");
+    } finally {
+      setLoadingComments((prev) => ({ ...prev, [postId]: false }));
+    }
+  };
+
   const handleCommentChange = (postId: number, value: string) => {
     setCommentDrafts((prev) => ({ ...prev, [postId]: value }));
   };
@@ -428,7 +456,11 @@ export default function CommunityFeed() {
       setPosts((prev) =>
         prev.map((post) =>
           post.post_id === postId
-            ? { ...post, comments: [...post.comments, comment] }
+            ? {
+                ...post,
+                comments: [...post.comments, comment],
+                commentCount: post.commentCount + 1,
+              }
             : post
         )
       );
@@ -898,9 +930,7 @@ export default function CommunityFeed() {
             }}
           >
             <div style={{ fontSize: 13, color: "var(--muted)" }}>
-              {post.comments.length === 0
-                ? "No comments yet"
-                : `${post.comments.length} comment${post.comments.length > 1 ? "s" : ""}`}
+              {formatCommentCount(post.commentCount)}
             </div>
 
             <div style={{ display: "flex", flexDirection: "column", gap: 10 }}>
@@ -940,6 +970,24 @@ export default function CommunityFeed() {
                 </div>
                 );
               })}
+              {post.commentsCursor && (
+                <button
+                  type="button"
+                  onClick={() => handleLoadMoreComments(post.post_id, post.commentsCursor!)}
+                  disabled={loadingComments[post.post_id]}
+                  style={{
+                    alignSelf: "flex-start",
+                    fontSize: 13,
+                    color: "#93c5fd",
+                    background: "transparent",
+                    border: "none",
+                    padding: 0,
+                    cursor: loadingComments[post.post_id] ? "progress" : "pointer",
+                  }}
+                >
+                  {loadingComments[post.post_id] ? "Loading..." : "Load more comments"}
+                </button>
+              )}
             </div>
 
             <div style={{ display: "flex", gap: 8 }}>
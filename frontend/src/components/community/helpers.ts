@@ -45,6 +45,10 @@ export type PostReaction = {
 
 export type FeedPost = CommunityPost & {
   comments: PostComment[];
+  // thread size from X-Total-Count; comments holds only the pages loaded so far
+  commentCount: number;
+  // X-Next-Cursor of the last loaded page, or null once the thread is complete
+  commentsCursor: string | null;
   reactions: Record<string, number>;
   viewerReaction?: string | null;
 };
@@ -131,6 +135,37 @@ export const buildReactionMap = (summary: ReactionSummary[]) => {
   return map;
 };
 
+export const formatCommentCount = (count: number) =>
+  count === 0 ? "No comments yet" : `${count} comment${count > 1 ? "s" : ""}`;
+
+export type CommentPage = {
+  comments: PostComment[];
+  nextCursor: string | null;
+  total?: number;
+};
+
+// One page of a thread, oldest first; pass nextCursor back as `after` for the next one.
+export const fetchCommentPage = async (
+  postId: number,
+  after?: string | null
+): Promise<CommentPage> => {
+  const res = await api.get<PostComment[]>(`/api/community/posts/${postId}/comments`, {
+    params: after ? { after } : undefined,
+  });
+  const total = res.headers["x-total-count"];
+  return {
+    comments: res.data,
+    nextCursor: (res.headers["x-next-cursor"] as string | undefined) ?? null,
+    total: total === undefined ? undefined : Number(total),
+  };
+};
+
+// Appends a page, skipping comments already shown (e.g. posted here since the first page).
+export const mergeComments = (loaded: PostComment[], page: PostComment[]) => {
+  const seen = new Set(loaded.map((comment) => comment.comment_id));
+  return [...loaded, ...page.filter((comment) => !seen.has(comment.comment_id))];
+};
+
 type HydrationOptions = {
   userId?: number;
 };
@@ -161,15 +196,17 @@ export const hydratePost = async (
   post: CommunityPost,
   options?: HydrationOptions
 ): Promise<FeedPost> => {
-  const [commentsRes, reactionsRes, viewerReaction] = await Promise.all([
-    api.get<PostComment[]>(`/api/community/posts/${post.post_id}/comments`),
+  const [commentPage, reactionsRes, viewerReaction] = await Promise.all([
+    fetchCommentPage(post.post_id),
     api.get<ReactionSummary[]>(`/api/community/posts/${post.post_id}/reactions`),
     fetchViewerReaction(post.post_id, options?.userId),
   ]);
 
   return {
     ...post,
-    comments: commentsRes.data,
+    comments: commentPage.comments,
+    commentCount: commentPage.total ?? commentPage.comments.length,
+    commentsCursor: commentPage.nextCursor,
     reactions: buildReactionMap(reactionsRes.data),
     viewerReaction,
   };